@@ -0,0 +1,2 @@
+# sch/ 下的 test_yolo.py 等是连接真实调度器和 YOLO 模型的脚本, 不是 pytest 用例, 用例在 tests/
+collect_ignore = ["sch"]
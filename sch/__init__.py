@@ -1,24 +1,49 @@
-from .device.devicePool import cpu, gpu, npu, fpga
+from .device.devicePool import cpu, gpu, npu, fpga, input_signature, tune_budget, bucket_module, precision_module
+from .device.devicePool import to_device, invoke_staged, fetch_output, nbytes
+from .device.registry import ExecutorRegistry
+from .device.pipeline import DevicePipeline
+from .device.tracing import tracer
+from .tasks.admission import AdmissionQueue, AdmissionRejected
+from .tasks.concurrency import ConcurrencyLimiter, AIMDController
+from .tasks.recorder import TraceRecorder
+from .tasks.buckets import bucket_name, sort_buckets, select_bucket, fit_to_shape, restore_output
+from .tasks.tiling import split_tiles, assign_tiles, stitch_detections
+from .tasks.postprocess import BatchPostprocessor
+from .tasks import yolo
+from .schedule.metrics import MetricsRegistry
+from .schedule.dag import topological_order
+from .schedule.dispatch import pick_free
 from multiprocessing.managers import BaseManager
 from typing import Union, Callable, Any
 import traceback
+import numpy as np
 import tvm
 from tvm.ir.module import IRModule
 from pebble import ThreadPool
-from concurrent.futures import TimeoutError
+from concurrent.futures import TimeoutError, CancelledError, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
 import threading
 import time
+import os
 
 lock = threading.Lock()
 condition = threading.Condition(lock)
+_local = threading.local() # 当前 worker 线程上的请求在准入队列里等待的时间
 class MyManager(BaseManager): pass
 
 MyManager.register('register_task')
 MyManager.register('increase_task')
 MyManager.register('decrease_task')
 MyManager.register('get_strategy')
+MyManager.register('report_fps')
+MyManager.register('push_metrics')
+MyManager.register('get_profile_request')
+MyManager.register('put_profile')
+MyManager.register('register_dag')
+MyManager.register('set_dag_bytes')
+MyManager.register('get_dag_placement')
 
-mgr = MyManager(address="/tmp/scheduler.sock", authkey=b'lemon')
+mgr = MyManager(address=os.environ.get("SCH_SOCKET", "/tmp/scheduler.sock"), authkey=b'lemon')
 mgr.connect()
 
 str_to_dev = {"CPU": cpu,
@@ -26,96 +51,964 @@ str_to_dev = {"CPU": cpu,
               "NPU": npu,
               "FPGA": fpga}
 
+def _profile_report(task_type, dev, acc):
+    total = sum(us for us, calls in acc["ops"].values()) or 1
+    operators = [{"name": name, "total_us": us, "mean_us": us / acc["requests"], "calls": calls,
+                  "percent": 100 * us / total}
+                 for name, (us, calls) in acc["ops"].items()]
+    operators.sort(key=lambda op: op["total_us"], reverse=True)
+    return {"task_type": task_type, "device": dev, "requests": acc["requests"], "operators": operators}
+
 def _worker_call(function, index, func_args):
     result = function(*func_args)
     return index, result
 
 class TaskService:
-    def __init__(self, max_workers=8):
-        self.task_dict = {} # {task_type: usr_dict}
-        self.dev_state = {} # {device: is_free}
+    def __init__(self, max_workers=None, min_workers=2, worker_limit=64, memory_budget=None):
+        """
+        max_workers 为 None 时由 AIMD 控制器按设备利用率和等待时间自动调整并发数。
+        memory_budget 为 {device: bytes}, 超出时卸载最久没用的执行器。
+        """
+        self.task_dict = {} # {task_type: {device: executor_kind}}
+        self.registry = ExecutorRegistry(TaskService.load_lib, TaskService._warmup, memory_budget)
+        self.dev_state = {} # {device: 空闲的 slot 数}, 不开流水线时每个设备一个 slot
+        self.dev_slots = {} # {device: slot 总数}, 只记录开了流水线的设备
+        self.pipelines = {} # {device: DevicePipeline}
         self.inp_counter = {} # {task_type: counter}
         self.oup_counter = {} # {task_type: counter}
         self.task_strategy = {} # {task_type: strategy}
+        self.dev_done = {} # {task_type: {device: counter}}
+        self.dev_busy = {} # {task_type: {device: 计算时间}}, 和 dev_done 一起回报后清零
+        self.report_time = {} # {task_type: last report time}
+        self.latency = {} # {task_type: deque(compute latency)}
+        self.hedge = {} # {task_type: (percentile, min_samples)}
+        self.hedge_stats = {} # {task_type: {"requests": n, "hedged": n, "wins": n}}
+        self.hedge_pool = None
+        self.tile_pool = None
+        self.aux_pool_size = {} # {"hedge_pool"/"tile_pool": 线程数}, 见 _grow_pool
+        self.postprocess = {} # {task_type: BatchPostprocessor}
+        self.tile_latency = {} # {(task_type, device): 单块推理时间的滑动平均}
+        self.task_so = {} # {task_type: {device: (executor_kind, so_path)}}
+        self.task_devices = {} # {task_type: {device: affinity}}
+        self.task_version = {} # {task_type: 当前生效的版本}
+        self.task_buckets = {} # {task_type: [shape, ...]}, 从小到大
+        self.bucket_pad = {} # {task_type: 补边的值}
+        self.task_precision = {} # {task_type: {device: 生效的低精度版本}}, 没有的设备用 fp32
+        self.precision_report = {} # {task_type: {device: {precision: {"speedup", "error", "allowed"}}}}
+        self.precision_config = {} # {task_type: (precisions, calibration, tolerance)}, updateTask 按它重建低精度版本
+        self.update_pool = None
+        self.dags = {} # {name: ({stage: [parents]}, 拓扑序)}
+        self.dag_bytes = {} # {name: {(src, dst): bytes}}, 第一次运行后报给调度器
+        self.dag_stats = {} # {name: {"runs", "transfers", "transfer_bytes", "resident"}}
+        self.profile_pending = {} # {(task_type, device): 剩余要 profile 的请求数}
+        self.profile_acc = {} # {(task_type, device): {"requests": n, "ops": {name: [us, calls]}}}
+        self.profile_exe = {} # {(task_type, device): profiler executor}
+        self.last_profile = {} # {(task_type, device): report}
+        self.admission = {} # {task_type: AdmissionQueue}, None 为默认队列
+        self.busy_time = {} # {device: busy seconds}
+        self.busy_since = {} # {device: acquire time}
+        self.wait_time = 0 # worker 等待空闲设备的总时间
+        self.compute_time = 0
         self.total_time = 0
         self.batch_size = 20
         self.task_num = 0
-        self.pool = ThreadPool(max_workers=max_workers)
+        self.task_total = {} # {task_type: 预计请求数}, 多任务混合时覆盖 task_num
+        self.recorder = None
+        pool_size = max_workers or worker_limit
+        self.pool_size = pool_size
+        self.admission_default = (4*pool_size, "block")
+        self.pool = ThreadPool(max_workers=pool_size)
+        self.limiter = ConcurrencyLimiter(max_workers or 8)
+        self.controller = None
+        if max_workers is None:
+            self._last_sample = (time.time(), 0, 0, 0)
+            self.controller = AIMDController(self.limiter, self._sample_load,
+                                             min_limit=min_workers, max_limit=worker_limit)
+        self.metrics = MetricsRegistry()
+        self.metrics_interval = 1.0
+        self._metrics_state = (time.time(), {}) # (last push time, {device: busy seconds})
+        self._describe_metrics()
+    
+    def _describe_metrics(self):
+        m = self.metrics
+        m.describe("sch_queue_wait_seconds", "histogram", "Time a request waited in the admission queue before a worker picked it up.")
+        m.describe("sch_device_wait_seconds", "histogram", "Time a request waited for a free device.")
+        m.describe("sch_compute_seconds", "histogram", "Device compute time per request.")
+        m.describe("sch_requests_total", "counter", "Requests completed per device and task type.")
+        m.describe("sch_inflight_requests", "gauge", "Requests currently inside runTask.")
+        m.describe("sch_device_busy_seconds", "gauge", "Accumulated time each device was running a request.")
+        m.describe("sch_device_busy_ratio", "gauge", "Fraction of the last push interval each device was busy.")
+        m.describe("sch_admission_queue_depth", "gauge", "Requests queued in the admission queue.")
+        m.describe("sch_worker_limit", "gauge", "Current worker concurrency limit.")
+        m.describe("sch_hedge_requests_total", "counter", "Requests eligible for hedging.")
+        m.describe("sch_hedged_total", "counter", "Requests that sent a hedge duplicate.")
+        m.describe("sch_hedge_wins_total", "counter", "Hedge duplicates that returned first.")
+        m.describe("sch_executor_resident_bytes", "gauge", "Estimated footprint of executors loaded on each device.")
+        m.describe("sch_executor_loads_total", "counter", "Executors loaded on first use or after eviction.")
+        m.describe("sch_executor_evictions_total", "counter", "Executors unloaded to stay under the device memory budget.")
+    
+    def _push_metrics(self, force=False):
+        now = time.time()
+        with condition:
+            last_time, last_busy = self._metrics_state
+            if not force and now - last_time < self.metrics_interval:
+                return
+            busy = {dev: self.busy_time.get(dev, 0) + (now - self.busy_since[dev] if dev in self.busy_since else 0)
+                    for dev in self.dev_state}
+            self._metrics_state = (now, busy)
+            hedge_stats = {task_type: dict(stats) for task_type, stats in self.hedge_stats.items()}
+        m = self.metrics
+        elapsed = max(now - last_time, 1e-6)
+        for dev, seconds in busy.items():
+            m.set("sch_device_busy_seconds", seconds, device=dev)
+            m.set("sch_device_busy_ratio", (seconds - last_busy.get(dev, 0)) / elapsed, device=dev)
+        for task_type, queue in list(self.admission.items()):
+            m.set("sch_admission_queue_depth", queue.depth(), task_type=task_type or "default")
+        for task_type, stats in hedge_stats.items():
+            m.set("sch_hedge_requests_total", stats["requests"], task_type=task_type)
+            m.set("sch_hedged_total", stats["hedged"], task_type=task_type)
+            m.set("sch_hedge_wins_total", stats["wins"], task_type=task_type)
+        m.set("sch_worker_limit", self.limiter.limit)
+        for dev, stats in self.registry.snapshot().items():
+            m.set("sch_executor_resident_bytes", stats["used"], device=dev)
+            m.set("sch_executor_loads_total", stats["loads"], device=dev)
+            m.set("sch_executor_evictions_total", stats["evictions"], device=dev)
+        mgr.push_metrics(str(os.getpid()), m.snapshot())
     
     @staticmethod
     def load_lib(dev, executor_kind, so_path):
         device = str_to_dev[dev]
         return device.load_lib(executor_kind, so_path)
     
+    @staticmethod
+    def _warmup(dev, executor_kind, exe, signature):
+        # 加载后先跑一次全零输入, 第一个真实请求不用再付懒初始化的开销
+        shape, dtype = signature
+        str_to_dev[dev].compute(executor_kind, exe, np.zeros(shape, dtype=dtype))
+    
     def runTask(self, task_type:str, inputs:Any):
         batch_size = self.batch_size
-        dev_dict = self.task_dict[task_type]
+        task_num = self.task_total.get(task_type, self.task_num)
+        arrival = time.time()
         
         with condition:
             if self.inp_counter[task_type] == 0:
-                mgr.increase_task(task_type)
-                strategy = mgr.get_strategy(task_type)
-                self.task_strategy[task_type] = strategy.copy()
+                with tracer.span("get_strategy", task_type=task_type):
+                    mgr.increase_task(task_type, task_num)
+                    try:
+                        strategy = mgr.get_strategy(task_type)
+                    except ValueError:
+                        # 任务跑不了, 撤回计数, 不让它占着调度器的任务列表
+                        mgr.decrease_task(task_type, task_num)
+                        raise
+                    self.task_strategy[task_type] = strategy.copy()
+                self.report_time[task_type] = time.time()
             self.inp_counter[task_type] += 1
             if self.inp_counter[task_type] % batch_size == 0:
-                strategy = mgr.get_strategy(task_type)
-                self.task_strategy[task_type] = strategy.copy()
+                with tracer.span("get_strategy", task_type=task_type):
+                    strategy = mgr.get_strategy(task_type)
+                    self.task_strategy[task_type] = strategy.copy()
+                # 调度器命令行下发的 profile 请求
+                for dev, num in mgr.get_profile_request(task_type).copy().items():
+                    key = (task_type, dev)
+                    self.profile_pending[key] = self.profile_pending.get(key, 0) + num
             
         strategy = self.task_strategy[task_type]
         
-        with condition:  # 自动 acquire + release
-            free_dev = None
-            while not free_dev:
-                for dev in strategy:
-                    if self.dev_state[dev]:
-                        free_dev = dev
-                        self.dev_state[dev] = 0
-                        break
-                if not free_dev:
-                    condition.wait()
-        executor_kind, exe = dev_dict[free_dev]
-        device = str_to_dev[free_dev]
-        result = device.compute(executor_kind, exe, inputs)
-        with condition:
-            self.dev_state[free_dev] = 1
-            condition.notify_all()
+        metrics = self.metrics
+        metrics.add("sch_inflight_requests", 1, task_type=task_type)
+        queue_wait = getattr(_local, "queue_wait", None)
+        _local.queue_wait = None
+        if queue_wait is not None:
+            arrival -= queue_wait
+        free_dev = None
+        try:
+            wait_start = time.time()
+            with tracer.span("wait_device", task_type=task_type):
+                free_dev = self._acquire(strategy)
+            metrics.observe("sch_device_wait_seconds", time.time() - wait_start, device=free_dev, task_type=task_type)
+            if queue_wait is not None:
+                metrics.observe("sch_queue_wait_seconds", queue_wait, device=free_dev, task_type=task_type)
+            if task_type in self.hedge:
+                free_dev, result = self._compute_hedged(task_type, strategy, free_dev, inputs)
+            else:
+                result = self._compute(task_type, free_dev, inputs)
+            post = self.postprocess.get(task_type)
+            if post is not None:
+                # 设备已经释放, 后处理和其他请求攒批在 CPU worker 上跑
+                with tracer.span("postprocess", task_type=task_type):
+                    result = post.submit(result).result()
+        except Exception:
+            if self.recorder:
+                self.recorder.record(arrival, task_type, inputs, "error", time.time() - arrival, free_dev)
+            self._drop(task_type, 1)
+            raise
+        finally:
+            metrics.add("sch_inflight_requests", -1, task_type=task_type)
+        if self.recorder:
+            self.recorder.record(arrival, task_type, inputs, "ok", time.time() - arrival, free_dev)
+        metrics.inc("sch_requests_total", device=free_dev, task_type=task_type)
+        report = None
         with condition:
             self.oup_counter[task_type] += 1
-            if self.oup_counter[task_type] == self.task_num:
-                mgr.decrease_task(task_type)
+            done = self.dev_done[task_type]
+            done[free_dev] = done.get(free_dev, 0) + 1
+            if self.oup_counter[task_type] % batch_size == 0:
+                # 按设备统计实测帧率, 回报给调度器学习共置开销
+                now = time.time()
+                elapsed = now - self.report_time[task_type]
+                busy = self.dev_busy.get(task_type, {})
+                report = {dev: (num / elapsed, busy.get(dev, 0) / elapsed) for dev, num in done.items()}
+                self.dev_done[task_type] = {}
+                self.dev_busy[task_type] = {}
+                self.report_time[task_type] = now
+            if self.oup_counter[task_type] == task_num:
+                mgr.decrease_task(task_type, task_num)
+        if report:
+            for dev, (fps, busy) in report.items():
+                mgr.report_fps(dev, task_type, fps, busy)
+            self._push_metrics()
         return result
         
 
-    def registerTask(self, task_type:str, devices:dict[str, float], IR: Union[IRModule, str], params = None):
+    def _acquire(self, strategy, block=True):
+        start = time.time()
+        with condition:  # 自动 acquire + release
+            while True:
+                dev = pick_free(strategy, self.dev_state)
+                if dev is not None:
+                    self.dev_state[dev] -= 1
+                    now = time.time()
+                    self.busy_since.setdefault(dev, now)
+                    self.wait_time += now - start
+                    return dev
+                if not block:
+                    return None
+                condition.wait()
+    
+    def _release(self, dev):
+        with condition:
+            self.dev_state[dev] += 1
+            if self.dev_state[dev] >= self.dev_slots.get(dev, 1):
+                # 所有 slot 都空闲时才算设备空闲
+                self.busy_time[dev] = self.busy_time.get(dev, 0) + time.time() - self.busy_since.pop(dev)
+            condition.notify_all()
+    
+    def _compute(self, task_type, dev, inputs):
+        device = str_to_dev[dev]
+        start = time.time()
+        name, bucket = task_type, None
+        profiled = False
+        try:
+            if task_type in self.task_buckets:
+                # 选放得下输入的最小的桶, 补边后在该桶的静态形状执行器上跑
+                in_shape = inputs.shape
+                bucket = select_bucket(self.task_buckets[task_type], in_shape)
+                name = bucket_name(task_type, bucket)
+                inputs = fit_to_shape(inputs, bucket, self.bucket_pad[task_type])
+            precision = self.task_precision.get(task_type, {}).get(dev)
+            if precision:
+                name = f"{name}:{precision}"
+            profiled = bool(self.profile_pending.get((task_type, dev))) and self._profiler(task_type, dev, name) is not None
+            if profiled:
+                result = self._compute_profiled(task_type, dev, inputs, name)
+            else:
+                with tracer.span("load", task_type=task_type, device=dev):
+                    entry = self.registry.acquire(name, dev)
+                try:
+                    if entry.signature is None and hasattr(inputs, "shape"):
+                        # 模型没有静态输入形状时, 用真实请求的形状预热之后重新加载的执行器
+                        entry.signature = (list(inputs.shape), str(inputs.dtype))
+                    pipeline = self.pipelines.get(dev)
+                    with tracer.span("compute", task_type=task_type, device=dev):
+                        if pipeline is not None and entry.executor_kind != "BFS":
+                            result = pipeline.submit(entry.executor_kind, entry.exe, inputs).result()
+                        else:
+                            result = device.compute(entry.executor_kind, entry.exe, inputs)
+                finally:
+                    self.registry.release(entry)
+        finally:
+            self._release(dev)
+        if bucket is not None:
+            result = restore_output(result, in_shape, bucket)
+        if profiled:
+            return result
+        elapsed = time.time() - start
+        self.latency[task_type].append(elapsed)
+        self.metrics.observe("sch_compute_seconds", elapsed, device=dev, task_type=task_type)
+        with condition:
+            self.compute_time += elapsed
+            busy = self.dev_busy.setdefault(task_type, {})
+            busy[dev] = busy.get(dev, 0) + elapsed
+        return result
+    
+    def _names(self, task_type):
+        # 任务在执行器表里的名字, 分桶时每个桶一个
+        if task_type in self.task_buckets:
+            return [bucket_name(task_type, bucket) for bucket in self.task_buckets[task_type]]
+        return [task_type]
+    
+    def _profiler(self, task_type, dev, name):
+        key = (name, dev)
+        if key not in self.profile_exe:
+            executor_kind, so_path = self.task_so[name][dev]
+            profile_lib = getattr(str_to_dev[dev], "profile_lib", None)
+            profiler = profile_lib(executor_kind, so_path) if profile_lib else None
+            if profiler is None:
+                # 该后端没有 profiler, 放弃这次 profile 请求, 调度器命令行上能看到原因
+                report = {"task_type": task_type, "device": dev, "requests": 0, "operators": [],
+                          "error": f"profiling is not supported for {executor_kind} on {dev}"}
+                with condition:
+                    self.profile_pending.pop((task_type, dev), None)
+                    self.last_profile[(task_type, dev)] = report
+                mgr.put_profile(task_type, dev, report)
+                return None
+            self.profile_exe[key] = profiler
+        return self.profile_exe[key]
+    
+    def _compute_profiled(self, task_type, dev, inputs, name):
+        # 用带算子计时的执行器跑这一条请求, 按算子累计耗时, 凑够 N 条后把报告交给调度器
+        key = (task_type, dev)
+        device = str_to_dev[dev]
+        executor_kind, so_path = self.task_so[name][dev]
+        with tracer.span("profile", task_type=task_type, device=dev):
+            result, times = device.profile(executor_kind, self.profile_exe[(name, dev)], inputs)
+        report = None
+        with condition:
+            acc = self.profile_acc.setdefault(key, {"requests": 0, "ops": {}})
+            acc["requests"] += 1
+            for op, (us, calls) in times.items():
+                entry = acc["ops"].setdefault(op, [0.0, 0])
+                entry[0] += us
+                entry[1] += calls
+            self.profile_pending[key] = self.profile_pending.get(key, 0) - 1
+            if self.profile_pending[key] <= 0:
+                self.profile_pending.pop(key)
+                for n in self._names(task_type):
+                    self.profile_exe.pop((n, dev), None)
+                report = _profile_report(task_type, dev, self.profile_acc.pop(key))
+                self.last_profile[key] = report
+        if report:
+            mgr.put_profile(task_type, dev, report)
+        return result
+    
+    def profileTask(self, task_type:str, dev:str, inputs:list):
+        """
+        在 dev 上用带算子计时的执行器 (relayVM/relaxVM 的 profiler VM, graph 的 debug executor) 跑 inputs,
+        返回按算子汇总的耗时报告, 同时上报给调度器; 不支持的后端返回带 error 的报告。
+        """
+        with condition:
+            self.profile_pending[(task_type, dev)] = len(inputs)
+        self.profile_acc.pop((task_type, dev), None)
+        for inp in inputs:
+            self._acquire([dev])
+            self._compute(task_type, dev, inp)
+        with condition:
+            return self.last_profile.get((task_type, dev))
+    
+    def _sample_load(self):
+        # 给并发控制器的周期统计: 设备利用率, 等设备时间, 计算时间, 排队请求数
+        now = time.time()
+        with condition:
+            busy = sum(self.busy_time.values()) + sum(now - t for t in self.busy_since.values())
+            wait_time, compute_time = self.wait_time, self.compute_time
+            num_dev = len(self.dev_state)
+        last_time, last_busy, last_wait, last_compute = self._last_sample
+        self._last_sample = (now, busy, wait_time, compute_time)
+        elapsed = max(now - last_time, 1e-6)
+        return {"util": (busy - last_busy) / (elapsed * max(num_dev, 1)),
+                "dev_wait": wait_time - last_wait,
+                "compute": compute_time - last_compute,
+                "backlog": sum(queue.depth() for queue in list(self.admission.values()))}
+    
+    def _hedge_threshold(self, task_type):
+        percentile, min_samples = self.hedge[task_type]
+        samples = sorted(self.latency[task_type])
+        if len(samples) < min_samples:
+            return None
+        index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+        return samples[index]
+    
+    def _compute_hedged(self, task_type, strategy, free_dev, inputs):
+        # 超过该任务实测延迟的某个分位数还没返回, 就在另一个空闲设备上发一份副本, 先返回的结果生效
+        with condition:
+            stats = self.hedge_stats[task_type]
+            stats["requests"] += 1
+        threshold = self._hedge_threshold(task_type)
+        if threshold is None:
+            return free_dev, self._compute(task_type, free_dev, inputs)
+        primary = self._hedge_pool().submit(self._compute, task_type, free_dev, inputs)
+        try:
+            return free_dev, primary.result(timeout=threshold)
+        except TimeoutError:
+            pass
+        backup_dev = self._acquire([dev for dev in strategy if dev != free_dev], block=False)
+        if backup_dev is None:
+            return free_dev, primary.result()
+        backup = self._hedge_pool().submit(self._compute, task_type, backup_dev, inputs)
+        with condition:
+            stats["hedged"] += 1
+        done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+        winner, winner_dev = (primary, free_dev) if primary in done else (backup, backup_dev)
+        if winner.exception() is not None:
+            # 先返回的一方出错时退回到另一方的结果
+            winner, winner_dev = (backup, backup_dev) if winner is primary else (primary, free_dev)
+        result = winner.result()
+        if winner is backup:
+            with condition:
+                stats["wins"] += 1
+        # 输掉的一方在后台跑完后由 _compute 释放设备, 结果丢弃
+        return winner_dev, result
+    
+    def _hedge_pool(self):
+        # 池里每个在跑的任务都占着一个设备 slot (输掉的一方跑完才释放), 线程数不少于 slot 总数时提交的任务
+        # 不会排队; 线程不够时主请求排队会被误判为慢请求
+        with condition:
+            size = sum(self.dev_slots.get(dev, 1) for dev in self.dev_state)
+        return self._grow_pool("hedge_pool", size)
+    
+    def _grow_pool(self, name, size):
+        # 线程数不够 size 时 (注册了新设备, setPipeline 加了 slot) 换一个更大的池, 旧池里在跑的任务照常跑完
+        with condition:
+            old = None
+            if getattr(self, name) is None or self.aux_pool_size.get(name, 0) < size:
+                old = getattr(self, name)
+                setattr(self, name, ThreadPoolExecutor(max_workers=size))
+                self.aux_pool_size[name] = size
+            pool = getattr(self, name)
+        if old is not None:
+            old.shutdown(wait=False)
+        return pool
+    
+    def setHedge(self, task_type:str, percentile:float = 95, min_samples:int = 20):
+        """percentile 为 None 时关闭该任务的对冲请求。"""
+        if percentile is None:
+            self.hedge.pop(task_type, None)
+            return
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be in (0, 100)")
+        self.hedge[task_type] = (percentile, min_samples)
+    
+    def hedgeStats(self, task_type:str):
+        with condition:
+            stats = dict(self.hedge_stats[task_type])
+        stats["hedge_rate"] = stats["hedged"] / stats["requests"] if stats["requests"] else 0
+        stats["win_rate"] = stats["wins"] / stats["hedged"] if stats["hedged"] else 0
+        return stats
+
+    def registerTask(self, task_type:str, devices:dict[str, float], IR: Union[IRModule, str], params = None,
+                     executor_kind:str = None, buckets:list = None, pad_value:float = 0.0,
+                     precisions:list = None, calibration:list = None, tolerance:float = 0.01):
+        """
+        executor_kind 为 relayVM/graph/relaxVM, None 时编译各后端并按实测速度选最快的。
+        buckets 为输入形状列表, 每个桶单独编译成静态形状, 请求按形状选最小的放得下的桶,
+        在右下补 pad_value (比所有桶都大时报错, 大图用 runTiled), 输出和输入空间尺寸成比例时会裁回原尺寸。
+        此时 IR 为 ONNX 路径, 或者 shape -> (mod, params) 的函数。
+        precisions 为要额外编译的低精度版本 (fp16/int8), calibration 为校准输入, 见 _register_precisions。
+        执行器在第一次请求时才加载, 见 setMemoryBudget。
+        """
+        if precisions and not calibration:
+            raise ValueError("precision variants need calibration inputs")
+        self.task_precision.pop(task_type, None)
+        self.precision_report.pop(task_type, None)
+        self.precision_config.pop(task_type, None)
         usr_dict = {}
+        so_dict = {}
+        buckets = sort_buckets(buckets) if buckets else None
+        variants = TaskService._variants(task_type, IR, params, buckets)
         for dev, affinity in devices.items():
             if dev not in self.dev_state:
-                self.dev_state[dev] = 1
+                self.dev_state[dev] = self.dev_slots.get(dev, 1)
             device = str_to_dev[dev]
-            executor_kind, so_path = device.build(task_type, IR, params)
-            mgr.register_task(dev, task_type, affinity, executor_kind, so_path)
-            exe = TaskService.load_lib(dev, executor_kind, so_path)
-            usr_dict[dev] = (executor_kind, exe)
+            for name, build_name, mod, mod_params, signature, bucket in variants:
+                dev_kind, so_path = device.build(build_name, mod, mod_params, executor_kind)
+                self.registry.register(name, dev, dev_kind, so_path, signature)
+                self.task_so.setdefault(name, {})[dev] = (dev_kind, so_path)
+            # 调度器只按任务类型调度, 分桶时登记最大的桶
+            mgr.register_task(dev, task_type, affinity, dev_kind, so_path)
+            usr_dict[dev] = dev_kind
+            so_dict[dev] = (dev_kind, so_path)
+        if buckets:
+            self.task_buckets[task_type] = buckets
+            self.bucket_pad[task_type] = pad_value
+        else:
+            self.task_buckets.pop(task_type, None)
+            self.bucket_pad.pop(task_type, None)
         self.task_dict[task_type] = usr_dict
+        self.task_so[task_type] = so_dict
+        self.task_devices[task_type] = dict(devices)
+        self.task_version[task_type] = None
         self.inp_counter[task_type] = 0
         self.oup_counter[task_type] = 0
+        self.dev_done[task_type] = {}
+        self.dev_busy[task_type] = {}
+        self.report_time[task_type] = time.time()
+        self.latency[task_type] = deque(maxlen=200)
+        self.hedge_stats[task_type] = {"requests": 0, "hedged": 0, "wins": 0}
+        if precisions:
+            self.precision_config[task_type] = (list(precisions), list(calibration), tolerance)
+            self._register_precisions(task_type, devices, variants, precisions, calibration, tolerance, executor_kind)
+    
+    def _register_precisions(self, task_type, devices, variants, precisions, calibration, tolerance, executor_kind):
+        """
+        每个低精度版本单独编译, 在校准输入上和 fp32 比较误差 (最大绝对误差 / fp32 输出的最大绝对值) 并测速。
+        请求走误差在 tolerance 以内的最快版本, 调度器只看到 task_type, 它的 affinity 按该版本的实测加速比换算。
+        """
+        inputs = list(calibration)
+        for dev, affinity in devices.items():
+            device = str_to_dev[dev]
+            # 在最大的桶上比较误差和速度
+            largest, largest_bucket = variants[-1][0], variants[-1][5]
+            reference, base_time = self._evaluate(task_type, dev, largest, largest_bucket, inputs)
+            report = {"fp32": {"speedup": 1.0, "error": 0.0, "allowed": True}}
+            best, best_speedup = None, 1.0
+            for precision in precisions:
+                for name, build_name, mod, mod_params, signature, bucket in variants:
+                    prec_mod, prec_params = precision_module(mod, mod_params, precision, self._fit(task_type, inputs, bucket))
+                    dev_kind, so_path = device.build(f"{build_name}_{precision}", prec_mod, prec_params, executor_kind)
+                    self.registry.register(f"{name}:{precision}", dev, dev_kind, so_path, signature)
+                    self.task_so.setdefault(f"{name}:{precision}", {})[dev] = (dev_kind, so_path)
+                outputs, elapsed = self._evaluate(task_type, dev, f"{largest}:{precision}", largest_bucket, inputs)
+                error = max(float(np.abs(out.astype("float32") - ref).max() / (np.abs(ref).max() + 1e-6))
+                            for out, ref in zip(outputs, reference))
+                speedup = base_time / elapsed
+                allowed = error <= tolerance
+                report[precision] = {"speedup": speedup, "error": error, "allowed": allowed}
+                print(f"[TaskService] {task_type} {precision} on {dev}: {speedup:.2f}x, error {error:.4f}"
+                      + ("" if allowed else f" > tolerance {tolerance}"))
+                if allowed and speedup > best_speedup:
+                    best, best_speedup = precision, speedup
+            executor_kind_dev, so_path = self.task_so[f"{largest}:{best}" if best else largest][dev]
+            mgr.register_task(dev, task_type, affinity * best_speedup, executor_kind_dev, so_path)
+            with condition:
+                if best:
+                    self.task_precision.setdefault(task_type, {})[dev] = best
+                self.precision_report.setdefault(task_type, {})[dev] = report
+    
+    def _fit(self, task_type, inputs, bucket):
+        # 校准输入按桶的形状补边/裁剪, 不分桶时 bucket 为 None
+        if bucket is None:
+            return inputs
+        return [fit_to_shape(x, bucket, self.bucket_pad[task_type]) for x in inputs]
+    
+    def _evaluate(self, task_type, dev, name, bucket, inputs, repeat = 10):
+        # 返回 name (bucket 桶的执行器) 在校准输入上的输出和单次推理时间的中位数
+        device = str_to_dev[dev]
+        inputs = self._fit(task_type, inputs, bucket)
+        entry = self.registry.acquire(name, dev)
+        try:
+            outputs = [np.asarray(device.compute(entry.executor_kind, entry.exe, x)) for x in inputs]
+            times = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                device.compute(entry.executor_kind, entry.exe, inputs[i % len(inputs)])
+                times.append(time.perf_counter() - start)
+        finally:
+            self.registry.release(entry)
+        return outputs, sorted(times)[len(times) // 2]
+    
+    def precisionReport(self, task_type:str):
+        """每个设备上各精度版本的加速比, 误差和是否允许, 以及当前生效的版本。"""
+        report = {}
+        for dev, variants in self.precision_report.get(task_type, {}).items():
+            report[dev] = {"active": self.task_precision.get(task_type, {}).get(dev) or "fp32", "variants": variants}
+        return report
+        
+
+    def setPostprocess(self, task_type:str, fn:Callable = None, max_batch:int = 32, max_delay:float = 0.002,
+                       workers:int = 2, **kwargs):
+        """
+        runTask 返回前对模型输出做后处理, 并发请求的输出攒成批在 CPU worker 线程上整批处理。
+        fn(outputs: list) 返回等长的结果列表, 为 None 时用内置的 YOLO 解码加 NMS (kwargs 传给 yolo.postprocess,
+        如 conf_threshold, iou_threshold, max_det), runTask 返回 (M, 6) [x1, y1, x2, y2, score, class]。
+        fn 为 False 时关闭。
+        """
+        old = self.postprocess.pop(task_type, None)
+        if fn is not False:
+            if fn is None:
+                fn = lambda outputs: yolo.postprocess(outputs, **kwargs)
+            self.postprocess[task_type] = BatchPostprocessor(fn, max_batch, max_delay, workers)
+        if old is not None:
+            old.close()
+    
+    def postprocessStats(self, task_type:str):
+        """返回后处理的批数, 帧数, 平均批大小和累计耗时。"""
+        post = self.postprocess.get(task_type)
+        return post.snapshot() if post else {}
+    
+    def runTiled(self, task_type:str, frame, tile = None, overlap:float = 0.2, devices:list = None,
+                 decode:Callable = None, iou_threshold:float = 0.5):
+        """
+        把比模型输入大的帧切成互相重叠的块, 按各设备实测的单块吞吐分给多个设备并行推理,
+        再把检测框平移回原图坐标, 重叠区域的重复框用 NMS 去掉。
+        tile 为块的 (H, W), 默认取最大的桶或模型的静态输入形状; overlap 应大于目标尺寸占块的比例。
+        decode(output) 返回块内坐标的 (M, 6) [x1, y1, x2, y2, score, class], 默认按 YOLO 原始输出解码。
+        """
+        devices = list(devices or self.task_dict[task_type])
+        tile = tuple(tile or self._tile_shape(task_type, devices))
+        tiles = split_tiles(frame, tile, overlap, self.bucket_pad.get(task_type, 0.0))
+        plan = assign_tiles(len(tiles), self._tile_rates(task_type, devices))
+        outputs = [None] * len(tiles)
+        
+        def run(dev, indices):
+            for index in indices:
+                self._acquire([dev])
+                start = time.time()
+                outputs[index] = self._compute(task_type, dev, tiles[index][2])
+                elapsed = time.time() - start
+                with condition:
+                    last = self.tile_latency.get((task_type, dev))
+                    self.tile_latency[(task_type, dev)] = elapsed if last is None else 0.8 * last + 0.2 * elapsed
         
+        # 每个 runTiled 在每个设备上一个任务, 最多 pool_size 个 worker 同时切块
+        with condition:
+            size = self.pool_size * max(len(self.dev_state), 1)
+        tile_pool = self._grow_pool("tile_pool", size)
+        futures = [tile_pool.submit(run, dev, indices) for dev, indices in plan.items() if indices]
+        for future in futures:
+            future.result()
+        decode = decode or yolo.decode
+        return stitch_detections([decode(output) for output in outputs], [(y, x) for y, x, _ in tiles],
+                                 frame.shape, iou_threshold)
+    
+    def _tile_shape(self, task_type, devices):
+        if task_type in self.task_buckets:
+            return self.task_buckets[task_type][-1][-2:]
+        for dev in devices:
+            signature = self.registry.entries[(task_type, dev)].signature
+            if signature is not None:
+                return signature[0][-2:]
+        raise ValueError(f"{task_type} has no static input shape, pass tile=(H, W)")
+    
+    def _tile_rates(self, task_type, devices):
+        # 所有设备都测过时按实测吞吐分块, 否则先按注册时的 affinity
+        with condition:
+            latency = [self.tile_latency.get((task_type, dev)) for dev in devices]
+        if all(latency):
+            return {dev: 1 / value for dev, value in zip(devices, latency)}
+        return {dev: self.task_devices[task_type].get(dev, 1.0) for dev in devices}
+    
+    def registerDAG(self, name:str, stages:dict):
+        """
+        stages 为 {task_type: [上游 task_type]}, 各阶段先用 registerTask 注册 (不支持分桶)。
+        没有上游的阶段输入 runDAG 的 inputs, 有多个上游时按列表顺序作为模型的多个输入。
+        调度器给整条链选设备, 使计算时间加上中间结果在设备间搬运的时间最小。
+        """
+        stages = {stage: list(parents) for stage, parents in stages.items()}
+        order = topological_order(stages)
+        for stage in order:
+            if stage not in self.task_dict:
+                raise ValueError(f"stage {stage} is not registered")
+            if stage in self.task_buckets:
+                raise ValueError(f"stage {stage} uses shape buckets, DAG stages need a single shape")
+        mgr.register_dag(name, stages)
+        with condition:
+            self.dags[name] = (stages, order)
+            self.dag_bytes.pop(name, None)
+            self.dag_stats[name] = {"runs": 0, "transfers": 0, "transfer_bytes": 0, "resident": 0}
+    
+    def runDAG(self, name:str, inputs):
+        """
+        按调度器给的放置依次执行各阶段, 相邻阶段在同一设备上时中间结果以设备上的 NDArray 直接传下去,
+        不拷回主机。返回 {末端阶段: numpy 输出}。
+        """
+        stages, order = self.dags[name]
+        placement = mgr.get_dag_placement(name).copy()
+        outputs = {}
+        edge_bytes = {}
+        transfers = transfer_bytes = resident = 0
+        for stage in order:
+            dev = placement[stage]
+            parents = stages[stage]
+            args = [(parent, outputs[parent]) for parent in parents] if parents else [(None, inputs)]
+            self._acquire([dev])
+            start = time.time()
+            try:
+                staged = []
+                for parent, arg in args:
+                    data, moved = to_device(dev, arg)
+                    size = nbytes(data)
+                    edge_bytes[(parent, stage)] = size
+                    if moved:
+                        transfers += 1
+                        transfer_bytes += size
+                    else:
+                        resident += 1
+                    staged.append(data)
+                precision = self.task_precision.get(stage, {}).get(dev)
+                entry = self.registry.acquire(f"{stage}:{precision}" if precision else stage, dev)
+                try:
+                    pipeline = self.pipelines.get(dev)
+                    with tracer.span("compute", task_type=stage, device=dev, dag=name):
+                        if pipeline is not None:
+                            # 开了流水线时执行器由推理线程独占, 阶段也排进推理队列, 输出留在设备上
+                            outputs[stage] = pipeline.submit(entry.executor_kind, entry.exe, staged, staged=True).result()
+                        else:
+                            outputs[stage] = invoke_staged(entry.executor_kind, entry.exe, staged)
+                finally:
+                    self.registry.release(entry)
+            finally:
+                self._release(dev)
+            elapsed = time.time() - start
+            self.latency[stage].append(elapsed)
+            self.metrics.observe("sch_compute_seconds", elapsed, device=dev, task_type=stage)
+        parents = {parent for stage in order for parent in stages[stage]}
+        result = {}
+        for stage in order:
+            if stage not in parents:
+                edge_bytes[(stage, None)] = nbytes(outputs[stage])
+                result[stage] = fetch_output(outputs[stage])
+        with condition:
+            stat = self.dag_stats[name]
+            stat["runs"] += 1
+            stat["transfers"] += transfers
+            stat["transfer_bytes"] += transfer_bytes
+            stat["resident"] += resident
+            report = name not in self.dag_bytes
+            self.dag_bytes[name] = edge_bytes
+        if report:
+            # 实测的中间结果大小报给调度器, 之后按真实搬运开销重新放置
+            mgr.set_dag_bytes(name, edge_bytes)
+        return result
+    
+    def dagStats(self, name:str = None):
+        """返回各 DAG 的运行次数, 设备间拷贝次数和字节数, 以及留在设备上直接复用的中间结果数。"""
+        if name is not None:
+            return dict(self.dag_stats.get(name, {}))
+        return {key: dict(stat) for key, stat in self.dag_stats.items()}
+
+    @staticmethod
+    def _variants(task_type, IR, params, buckets, suffix = ""):
+        # [(执行器表里的名字, 编译名, IR, params, 预热输入的 signature, 桶的形状)], 分桶时每个桶一项, 不分桶时桶为 None
+        if not buckets:
+            return [(task_type, task_type + suffix, IR, params, input_signature(IR), None)]
+        variants = []
+        for bucket in buckets:
+            mod, mod_params = bucket_module(IR, params, bucket)
+            name = bucket_name(task_type, bucket)
+            signature = input_signature(mod) or (list(bucket), "float32")
+            variants.append((name, name.replace("@", "_") + suffix, mod, mod_params, signature, tuple(bucket)))
+        return variants
+
+    def updateTask(self, task_type:str, IR: Union[IRModule, str], params = None, version:str = None,
+                   devices:dict[str, float] = None, block:bool = False, executor_kind:str = None):
+        """
+        不停服更新模型: 后台编译并预热新版本, 全部就绪后原子切换, 之后的请求走新版本,
+        在途请求在旧版本上跑完后释放旧执行器。返回 Future, block=True 时等待切换完成并返回版本号。
+        registerTask 时指定了 precisions 的任务, 切换后用同样的校准输入重新编译并挑选低精度版本。
+        """
+        if task_type not in self.task_dict:
+            raise KeyError(f"task {task_type} is not registered")
+        if version is None:
+            version = time.strftime("%Y%m%d%H%M%S")
+        devices = dict(devices or self.task_devices[task_type])
+        missing = set(self.task_devices[task_type]) - set(devices)
+        if missing:
+            # 调度器没有注销能力的接口, 只能改 affinity 或增加设备
+            raise ValueError(f"devices of a registered task can not be removed: {', '.join(sorted(missing))}")
+        with condition:
+            if self.update_pool is None:
+                # 同一时间只做一个更新, 按提交顺序生效
+                self.update_pool = ThreadPoolExecutor(max_workers=1)
+        future = self.update_pool.submit(self._update_task, task_type, IR, params, version, devices, executor_kind)
+        return future.result() if block else future
+    
+    def _update_task(self, task_type, IR, params, version, devices, executor_kind):
+        # 分桶的任务按原来的桶重新编译
+        variants = TaskService._variants(task_type, IR, params, self.task_buckets.get(task_type), f"_{version}")
+        name_so = {} # {name: {device: (executor_kind, so_path)}}
+        with tracer.span("update_build", task_type=task_type, version=version):
+            for dev in devices:
+                for name, build_name, mod, mod_params, signature, bucket in variants:
+                    # 每个版本单独编译到 <DEV>_<task>_<version>.so, 不覆盖正在用的文件
+                    name_so.setdefault(name, {})[dev] = str_to_dev[dev].build(build_name, mod, mod_params, executor_kind)
+        entries = []
+        try:
+            with tracer.span("update_warmup", task_type=task_type, version=version):
+                for name, build_name, mod, mod_params, signature, bucket in variants:
+                    for dev, (dev_kind, so_path) in name_so[name].items():
+                        entries.append(self.registry.prepare(name, dev, dev_kind, so_path, signature))
+        except BaseException:
+            self.registry.discard(entries)
+            raise
+        so_dict = name_so[variants[-1][0]]
+        with condition:
+            for dev in devices:
+                if dev not in self.dev_state:
+                    self.dev_state[dev] = self.dev_slots.get(dev, 1)
+            self.registry.swap(entries)
+            self.task_so.update(name_so)
+            self.task_dict[task_type] = {dev: dev_kind for dev, (dev_kind, so_path) in so_dict.items()}
+            self.task_so[task_type] = so_dict
+            self.task_devices[task_type] = devices
+            self.task_version[task_type] = version
+            # 低精度版本在新版本切换后重新编译, 在那之前请求走新版本的 fp32
+            self.task_precision.pop(task_type, None)
+            for dev in devices:
+                for name in self._names(task_type):
+                    self.profile_exe.pop((name, dev), None)
+        for dev, affinity in devices.items():
+            dev_kind, so_path = so_dict[dev]
+            mgr.register_task(dev, task_type, affinity, dev_kind, so_path)
+        print(f"[TaskService] {task_type} switched to version {version}")
+        if task_type in self.precision_config:
+            precisions, calibration, tolerance = self.precision_config[task_type]
+            self._register_precisions(task_type, devices, variants, precisions, calibration, tolerance, executor_kind)
+        return version
+    
+    def taskVersion(self, task_type:str):
+        """当前生效的版本, registerTask 注册的初始版本为 None。"""
+        return self.task_version[task_type]
+
+    def setTuning(self, dev:str, seconds:float = None):
+        """之后在 dev 上编译的模型先用 AutoScheduler 调优 seconds 秒, None 关闭; 调优记录按设备持久保存。"""
+        if seconds is None:
+            tune_budget.pop(dev, None)
+        else:
+            tune_budget[dev] = seconds
+
+    def setMemoryBudget(self, dev:str, num_bytes:int = None):
+        """设置 dev 上执行器的内存预算 (按 .so/.bin 文件大小估计), None 表示不限。"""
+        self.registry.set_budget(dev, num_bytes)
+    
+    def executorStats(self):
+        """返回每个设备的常驻执行器, 占用, 加载/命中/卸载次数。"""
+        return self.registry.snapshot()
+
+    def setPipeline(self, dev:str, slots:int = 2):
+        """
+        dev 上最多 slots 个请求同时在途, 下一帧上传到设备和当前帧推理重叠, 结果异步拷回主机。
+        slots 为 None 或 1 时恢复逐个请求上传, 推理, 拷回。
+        """
+        pipeline = DevicePipeline(dev, slots) if slots and slots > 1 else None
+        with condition:
+            old = self.pipelines.pop(dev, None)
+            total = self.dev_slots.pop(dev, 1)
+            if pipeline is not None:
+                self.pipelines[dev] = pipeline
+                self.dev_slots[dev] = slots
+            # 在途请求释放时按新的 slot 数归还
+            self.dev_state[dev] = self.dev_state.get(dev, total) + self.dev_slots.get(dev, 1) - total
+            condition.notify_all()
+        if old is not None:
+            old.close()
+
+    def pipelineStats(self):
+        """返回开了流水线的设备的 slot 数和上传, 推理, 下载各阶段的累计耗时。"""
+        return {dev: pipeline.snapshot() for dev, pipeline in self.pipelines.items()}
+
+    def setAdmission(self, task_type:str = None, limit:int = 64, policy:str = "block"):
+        """
+        设置 task_type 的准入队列上限和满队列策略 (block/reject/shed_oldest)。
+        task_type 为 None 时是 runTaskMultiThread 不指定任务时用的默认队列, 只能用 block。
+        """
+        self.admission[task_type] = AdmissionQueue(limit, policy)
+    
+    def _admission_queue(self, task_type):
+        with condition:
+            if task_type not in self.admission:
+                self.admission[task_type] = AdmissionQueue(*self.admission_default)
+            return self.admission[task_type]
+    
+    def queueDepth(self, task_type:str = None):
+        """返回各准入队列中排队的请求数, 指定 task_type 时只返回该队列。"""
+        if task_type is not None:
+            queue = self.admission.get(task_type)
+            return queue.depth() if queue else 0
+        return {key: queue.depth() for key, queue in self.admission.items()}
+
+    def startTrace(self, capacity:int = 100000):
+        """开启请求追踪, 之后 dumpTrace 可导出 Chrome trace / Perfetto JSON。"""
+        tracer.clear()
+        tracer.enable(capacity)
+    
+    def stopTrace(self):
+        tracer.disable()
+    
+    def dumpTrace(self, path:str = None):
+        return tracer.dump(path)
+
+    def expectRequests(self, task_type:str, num:int):
+        """
+        声明接下来 task_type 共有 num 个请求, 用于多个任务混在一起的场景 (比如回放录制的流量)。
+        会重新开始计数, 只能在该任务没有在途请求时调用。
+        """
+        with condition:
+            if self.inp_counter.get(task_type, 0) != self.oup_counter.get(task_type, 0):
+                raise ValueError(f"{task_type} has requests in flight, expectRequests must be called between batches")
+            self.task_total[task_type] = num
+            self.inp_counter[task_type] = 0
+            self.oup_counter[task_type] = 0
+
+    def startRecord(self, path:str):
+        """把之后每个请求的到达时间, 任务类型, 输入形状和结果记录到 gzip JSON lines 文件, 可用 TraceReplayer 回放。"""
+        self.stopRecord()
+        self.recorder = TraceRecorder(path)
+    
+    def stopRecord(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder:
+            recorder.close()
+            return recorder.count
+
+    def close(self):
+        """停掉并发控制线程, 关闭流水线, 后处理和各个线程池, 已经提交的请求会处理完。"""
+        controller, self.controller = self.controller, None
+        if controller:
+            controller.stop()
+        self.stopRecord()
+        for task_type in list(self.postprocess):
+            self.setPostprocess(task_type, False)
+        for dev in list(self.pipelines):
+            self.setPipeline(dev, None)
+        for pool in (self.hedge_pool, self.tile_pool, self.update_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self.hedge_pool = self.tile_pool = self.update_pool = None
+        self.pool.close()
+        self.pool.join()
 
     def runTaskMultiThread(self,
                         function: Callable[..., Any],
-                        Inputs: list[Any]):
+                        Inputs: list[Any],
+                        task_type: str = None):
         n = len(Inputs)
         self.task_num = n
         results: list[Any] = [None] * n
         exceptions: list[BaseException] = [None] * n
+        queue = self._admission_queue(task_type)
+        if task_type is None and queue.policy != "block":
+            # 被拒绝或挤掉的请求要计入该任务的完成数, 否则调度器收不到 decrease_task
+            raise ValueError(f"task_type is required with the {queue.policy} admission policy")
 
         future_to_idx = {}
-        def worker_closure(idx, inp):
-            # 只传入 idx 和 input
-            func_args = (self,) + (tuple(inp) if isinstance(inp, (tuple, list)) else (inp,))
-            return _worker_call(function, idx, func_args)
+        arrivals = {} # {idx: 进入准入队列的时间}
+        def worker_closure(idx, inp, ticket):
+            self.limiter.acquire()
+            try:
+                if not queue.start(ticket):
+                    raise AdmissionRejected("shed from admission queue")
+                _local.queue_wait = time.time() - ticket.created
+                # 只传入 idx 和 input
+                func_args = (self,) + (tuple(inp) if isinstance(inp, (tuple, list)) else (inp,))
+                return _worker_call(function, idx, func_args)
+            finally:
+                self.limiter.release()
+        if self.controller:
+            # 已经在跑时不会再起线程, close() 里停掉
+            self.controller.start()
         for idx, inp in enumerate(Inputs):
-            future = self.pool.schedule(worker_closure, args=(idx, inp))
+            try:
+                ticket = queue.admit()
+            except AdmissionRejected as exc:
+                exceptions[idx] = exc
+                print(f"[Worker error] task {idx} rejected: {exc}")
+                if self.recorder:
+                    self.recorder.record(time.time(), task_type, inp, "rejected")
+                continue
+            arrivals[idx] = ticket.created
+            future = self.pool.schedule(worker_closure, args=(idx, inp, ticket))
+            queue.attach(ticket, future)
             future_to_idx[future] = idx
         for future in future_to_idx:
             try:
@@ -123,13 +1016,34 @@ class TaskService:
                 results[_idx] = value
             except TimeoutError:
                 print(f"[Worker error] task {future_to_idx[future]} timeout")
+            except (CancelledError, AdmissionRejected):
+                idx = future_to_idx[future]
+                exceptions[idx] = AdmissionRejected("shed from admission queue")
+                print(f"[Worker error] task {idx} shed")
+                if self.recorder:
+                    self.recorder.record(arrivals[idx], task_type, Inputs[idx], "rejected")
             except Exception as exc:
                 idx = future_to_idx[future]
                 exceptions[idx] = exc
                 print("[Worker error] exception received in parent:")
                 traceback.print_exception(type(exc), exc, exc.__traceback__)
 
+        dropped = sum(isinstance(exc, AdmissionRejected) for exc in exceptions)
+        self._drop(task_type, dropped)
+        self._push_metrics(force=True)
         return results
+    
+    def _drop(self, task_type, num):
+        # 被拒绝, 挤掉或出错的请求也计入完成数, 否则计数对不上, 调度器也收不到 decrease_task
+        if task_type not in self.oup_counter or not num:
+            return
+        task_num = self.task_total.get(task_type, self.task_num)
+        with condition:
+            if self.inp_counter[task_type] == 0:
+                return
+            self.oup_counter[task_type] += num
+            if self.oup_counter[task_type] == task_num:
+                mgr.decrease_task(task_type, task_num)
 
 def connect():
     return TaskService()
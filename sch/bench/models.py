@@ -0,0 +1,65 @@
+import numpy as np
+import tvm
+from tvm import relay
+
+
+def image_enhance(H: int = 224, W: int = 224):
+    """utils/create_so.py 里亮度/对比度调整的 Relay 版本, 几乎没有计算量, 用来测调度开销。"""
+    x = relay.var("x", shape=(1, 3, H, W), dtype="float32")
+    # 提升对比度: (x - 0.5) * contrast + 0.5, 再调整亮度
+    y = relay.subtract(x, relay.const(0.5, "float32"))
+    y = relay.multiply(y, relay.const(1.2, "float32"))
+    y = relay.add(y, relay.const(0.5, "float32"))
+    out = relay.add(y, relay.const(0.1, "float32"))
+    mod = tvm.IRModule.from_expr(relay.Function([x], out))
+    return mod, {}
+
+
+def small_convnet(H: int = 64, W: int = 64, channels: int = 16, classes: int = 10, seed: int = 0):
+    """两层卷积 + 全局池化 + 全连接的小分类网络, 权重随机生成, 单次推理在毫秒级。"""
+    rng = np.random.default_rng(seed)
+    x = relay.var("x", shape=(1, 3, H, W), dtype="float32")
+    w1 = relay.var("w1", shape=(channels, 3, 3, 3), dtype="float32")
+    w2 = relay.var("w2", shape=(channels, channels, 3, 3), dtype="float32")
+    fc = relay.var("fc", shape=(classes, channels), dtype="float32")
+    y = relay.nn.relu(relay.nn.conv2d(x, w1, kernel_size=(3, 3), padding=(1, 1), channels=channels))
+    y = relay.nn.relu(relay.nn.conv2d(y, w2, kernel_size=(3, 3), padding=(1, 1), channels=channels))
+    y = relay.nn.batch_flatten(relay.nn.global_avg_pool2d(y))
+    out = relay.nn.dense(y, fc)
+    mod = tvm.IRModule.from_expr(relay.Function([x, w1, w2, fc], out))
+    params = {"w1": rng.standard_normal((channels, 3, 3, 3), dtype="float32") * 0.1,
+              "w2": rng.standard_normal((channels, channels, 3, 3), dtype="float32") * 0.1,
+              "fc": rng.standard_normal((classes, channels), dtype="float32") * 0.1}
+    params = {name: tvm.nd.array(value) for name, value in params.items()}
+    return mod, params
+
+
+MODELS = {"enhance": image_enhance, "convnet": small_convnet}
+
+
+def make_input(mod, seed: int = 0):
+    shape = [int(dim) for dim in mod["main"].params[0].type_annotation.shape]
+    return np.random.default_rng(seed).random(shape, dtype="float32")
+
+
+def yolo_outputs(frames: int, H: int = 512, W: int = 768, classes: int = 1, objects: int = 15, seed: int = 0):
+    """
+    合成的 YOLO 原始输出 (frames, N, 5+C), N 和 H x W 输入在 stride 8/16/32 上的锚框数一致。
+    背景行的 obj 很低, 每个目标周围有一簇抖动的高分框, 和真实模型输出的分布接近。
+    """
+    rng = np.random.default_rng(seed)
+    rows = 3 * sum((H // stride) * (W // stride) for stride in (8, 16, 32))
+    out = np.zeros((frames, rows, 5 + classes), dtype=np.float32)
+    out[..., :4] = rng.random((frames, rows, 4), dtype=np.float32) * [W, H, 40, 40]
+    out[..., 4] = rng.random((frames, rows), dtype=np.float32) * 0.1
+    out[..., 5:] = rng.random((frames, rows, classes), dtype=np.float32)
+    for frame in range(frames):
+        for obj in range(objects):
+            center = rng.random(2) * [W, H]
+            size = rng.random(2) * 80 + 20
+            index = rng.choice(rows, 40, replace=False)
+            out[frame, index, :2] = center + rng.normal(0, 3, (40, 2))
+            out[frame, index, 2:4] = size * (1 + rng.normal(0, 0.05, (40, 2)))
+            out[frame, index, 4] = rng.random(40) * 0.6 + 0.4
+            out[frame, index, 5 + obj % classes] = 0.99
+    return out
@@ -0,0 +1,264 @@
+"""
+纯 CPU 机器上的调度栈基准测试, 不需要 GPU 和 YOLO 模型。
+用生成的小模型测 VM invoke, runTask, runTaskMultiThread, 策略求解和 RPC 的吞吐与 p50/p99 延迟,
+结果写成 JSON, 方便在上线前比对调度开销有没有变差。
+使用示例：
+  python sch/bench/run.py --iters 200 --workers 4 --output bench.json
+"""
+import argparse
+import glob
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCH_DIR = os.path.dirname(BENCH_DIR)
+# 调度器侧按 sch/ 目录做绝对导入, 客户端侧以 sch 包导入
+sys.path[:0] = [SCH_DIR, os.path.dirname(SCH_DIR)]
+
+import numpy as np
+import tvm
+
+import main as sch_main
+from schedule.scheduler import Scheduler
+from device.devicePool import cpu, gpu, npu, fpga, invoke_executor
+from device.pipeline import DevicePipeline
+from bench.models import MODELS, make_input, yolo_outputs
+from tasks import yolo
+
+
+def summarize(name:str, latencies:list, wall:float, **extra):
+    lat = np.asarray(latencies) * 1e3
+    out = {"name": name, **extra,
+           "requests": len(latencies),
+           "throughput": len(latencies) / wall if wall > 0 else 0,
+           "mean_ms": float(lat.mean()),
+           "p50_ms": float(np.percentile(lat, 50)),
+           "p99_ms": float(np.percentile(lat, 99)),
+           "max_ms": float(lat.max())}
+    return out
+
+
+def timed(fn, iters:int, warmup:int):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iters):
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - start
+
+
+def start_scheduler(socket_file:str):
+    # 调度器跑在单独的进程里, 和线上一样走 unix socket
+    def serve():
+        sch_main.sched.addDev(cpu(0))
+        sch_main.serve(socket_file)
+    if os.path.exists(socket_file):
+        os.remove(socket_file)
+    proc = multiprocessing.get_context("fork").Process(target=serve, daemon=True)
+    proc.start()
+    deadline = time.time() + 30
+    while not os.path.exists(socket_file):
+        if not proc.is_alive() or time.time() > deadline:
+            raise RuntimeError("scheduler process failed to start")
+        time.sleep(0.05)
+    time.sleep(0.1)
+    return proc
+
+
+def bench_strategy(iters:int, max_tasks:int):
+    results = []
+    rng = np.random.default_rng(0)
+    for num_tasks in range(1, max_tasks + 1):
+        tasks = [f"task{i}" for i in range(num_tasks)]
+        affinity = rng.uniform(0.2, 1.0, size=(4, num_tasks))
+        for mode in Scheduler.modes:
+            sched = Scheduler()
+            sched.mode = mode
+            for row, dev in zip(affinity, (cpu(0), gpu(0), npu(0), fpga(0))):
+                for task, value in zip(tasks, row):
+                    dev.add_ability(task, float(value), "relayVM", "")
+                sched.addDev(dev)
+            latencies, wall = timed(lambda: sched.find_best_strategy(tasks), iters, 1)
+            results.append(summarize("strategy_solve", latencies, wall, mode=mode, tasks=num_tasks,
+                                     devices=len(sched.devs)))
+    return results
+
+
+def build_model(model:str, executor_kind:str = None):
+    # 每次都重新编译, 避免用到旧的 .so 和后端选择结果
+    task_type = f"bench_{model}"
+    for path in glob.glob(os.path.join(SCH_DIR, "device", "CPU", f"CPU_{task_type}[._]*")):
+        os.remove(path)
+    mod, params = MODELS[model]()
+    executor_kind, so_path = cpu.build(task_type, mod, params, executor_kind)
+    return task_type, mod, params, executor_kind, so_path
+
+
+def bench_vm(model:str, executor_kind:str, so_path:str, x, iters:int, warmup:int):
+    exe = cpu.load_lib(executor_kind, so_path)
+    data = tvm.nd.array(x)
+    results = []
+    latencies, wall = timed(lambda: invoke_executor(executor_kind, exe, data), iters, warmup)
+    results.append(summarize("vm_invoke", latencies, wall, model=model, executor=executor_kind))
+    latencies, wall = timed(lambda: cpu.compute(executor_kind, exe, x), iters, warmup)
+    results.append(summarize("device_compute", latencies, wall, model=model, executor=executor_kind))
+    return results, cpu.compute(executor_kind, exe, x)
+
+
+def bench_pipeline(model:str, executor_kind:str, so_path:str, x, reference, iters:int, warmup:int, slots:int):
+    # 和 device_compute 同样多的请求一次排进流水线, 看上传/推理/下载重叠之后的吞吐
+    exe = cpu.load_lib(executor_kind, so_path)
+    pipeline = DevicePipeline("CPU", slots)
+    latencies = []
+
+    def submit():
+        sent = time.perf_counter()
+        future = pipeline.submit(executor_kind, exe, x)
+        future.add_done_callback(lambda f: latencies.append(time.perf_counter() - sent))
+        return future
+
+    try:
+        for future in [submit() for _ in range(warmup)]:
+            future.result()
+        latencies.clear()
+        start = time.perf_counter()
+        outputs = [future.result() for future in [submit() for _ in range(iters)]]
+        wall = time.perf_counter() - start
+    finally:
+        pipeline.close(wait=True)
+    error = max(float(np.abs(out - reference).max()) for out in outputs)
+    return summarize("device_pipeline", latencies, wall, model=model, executor=executor_kind, slots=slots,
+                     max_abs_err=error)
+
+
+def bench_postprocess(frames:int, batch:int, classes:int):
+    # 逐帧解码 + NMS 和整批向量化后处理的对比, 吞吐按帧数算
+    outputs = yolo_outputs(frames, classes=classes)
+    batches = [outputs[i:i + batch] for i in range(0, frames, batch)]
+    results = []
+    frame_iter = itertools.cycle(outputs)
+    latencies, wall = timed(lambda: yolo.nms(yolo.decode(next(frame_iter)), 0.45), frames, 1)
+    results.append(summarize("yolo_post_frame", latencies, wall, frames=frames))
+    batch_iter = itertools.cycle(batches)
+    latencies, wall = timed(lambda: yolo.postprocess(next(batch_iter)), len(batches), 1)
+    reference = [yolo.nms(yolo.decode(out), 0.45)[:300] for out in outputs]
+    got = [dets for chunk in batches for dets in yolo.postprocess(chunk)]
+    mismatch = sum(len(a) != len(b) or not np.allclose(a, b) for a, b in zip(reference, got))
+    result = summarize("yolo_post_batch", latencies, wall, batch=batch, frames=frames, mismatched_frames=mismatch)
+    result["throughput"] = frames / wall
+    results.append(result)
+    return results
+
+
+def bench_rpc(mgr, task_type:str, iters:int, warmup:int):
+    mgr.increase_task(task_type, 0)
+    results = []
+    latencies, wall = timed(lambda: mgr.get_strategy(task_type).copy(), iters, warmup)
+    results.append(summarize("rpc_get_strategy", latencies, wall))
+    latencies, wall = timed(lambda: mgr.get_profile_request(task_type).copy(), iters, warmup)
+    results.append(summarize("rpc_get_profile_request", latencies, wall))
+    mgr.decrease_task(task_type, 0)
+    return results
+
+
+def bench_run_task(svc, model:str, task_type:str, executor_kind:str, mod, params, x, reference, iters:int, warmup:int):
+    svc.registerTask(task_type, {"CPU": 1.0}, mod, params, executor_kind)
+    svc.task_num = warmup + iters
+    outputs = []
+    latencies, wall = timed(lambda: outputs.append(svc.runTask(task_type, x)), iters, warmup)
+    error = max(float(np.abs(out - reference).max()) for out in outputs)
+    return summarize("runTask", latencies, wall, model=model, max_abs_err=error)
+
+
+def bench_run_task_multithread(svc, model:str, task_type:str, executor_kind:str, mod, params, x, reference,
+                               iters:int, warmup:int, workers):
+    latencies = []
+
+    def app(service, inp):
+        start = time.perf_counter()
+        out = service.runTask(task_type, inp)
+        latencies.append(time.perf_counter() - start)
+        return out
+
+    # 重新注册会把客户端的请求计数清零, 预热和正式测量各算一轮
+    svc.registerTask(task_type, {"CPU": 1.0}, mod, params, executor_kind)
+    svc.runTaskMultiThread(app, [x] * max(warmup, 1), task_type)
+    svc.registerTask(task_type, {"CPU": 1.0}, mod, params, executor_kind)
+    latencies.clear()
+    start = time.perf_counter()
+    outputs = svc.runTaskMultiThread(app, [x] * iters, task_type)
+    wall = time.perf_counter() - start
+    error = max(float(np.abs(out - reference).max()) for out in outputs)
+    return summarize("runTaskMultiThread", latencies, wall, model=model, workers=workers or "auto",
+                     max_abs_err=error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU benchmark of the scheduler stack")
+    parser.add_argument("--models", default="enhance,convnet", help=f"comma separated, from {', '.join(MODELS)}")
+    parser.add_argument("--iters", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--executor", default=None, help="relayVM, graph or relaxVM; default picks the fastest")
+    parser.add_argument("--workers", type=int, default=4, help="0 lets the AIMD controller pick the concurrency")
+    parser.add_argument("--slots", type=int, default=2, help="in-flight requests of the pipelined CPU executor")
+    parser.add_argument("--solve-iters", type=int, default=20)
+    parser.add_argument("--max-tasks", type=int, default=3)
+    parser.add_argument("--post-frames", type=int, default=256, help="synthetic YOLO outputs for the postprocess case")
+    parser.add_argument("--post-batch", type=int, default=32)
+    parser.add_argument("--post-classes", type=int, default=1)
+    parser.add_argument("--output", default="sch_bench.json")
+    args = parser.parse_args()
+
+    results = bench_strategy(args.solve_iters, args.max_tasks)
+    results += bench_postprocess(args.post_frames, args.post_batch, args.post_classes)
+
+    socket_file = os.path.join(tempfile.gettempdir(), f"sch_bench_{os.getpid()}.sock")
+    server = start_scheduler(socket_file)
+    os.environ["SCH_SOCKET"] = socket_file
+    import sch
+
+    svc = sch.TaskService(max_workers=args.workers or None)
+    try:
+        for model in args.models.split(","):
+            task_type, mod, params, executor_kind, so_path = build_model(model, args.executor)
+            x = make_input(mod)
+            vm_results, reference = bench_vm(model, executor_kind, so_path, x, args.iters, args.warmup)
+            results += vm_results
+            results.append(bench_pipeline(model, executor_kind, so_path, x, reference, args.iters, args.warmup,
+                                          args.slots))
+            results.append(bench_run_task(svc, model, task_type, executor_kind, mod, params, x, reference,
+                                          args.iters, args.warmup))
+            results.append(bench_run_task_multithread(svc, model, task_type, executor_kind, mod, params, x,
+                                                      reference, args.iters, args.warmup, args.workers))
+        results += bench_rpc(sch.mgr, task_type, args.iters, args.warmup)
+    finally:
+        if svc.controller:
+            svc.controller.stop()
+        svc.pool.close()
+        svc.pool.join()
+        server.terminate()
+        if os.path.exists(socket_file):
+            os.remove(socket_file)
+
+    report = {"meta": {"host": platform.node(), "machine": platform.machine(), "python": platform.python_version(),
+                       "tvm": tvm.__version__, "cpu_count": os.cpu_count(), "time": time.time(), "args": vars(args)},
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for r in results:
+        labels = " ".join(f"{k}={r[k]}" for k in ("model", "executor", "mode", "tasks", "workers", "slots", "batch") if k in r)
+        print(f"{r['name']:<24} {labels:<28} {r['throughput']:10.1f}/s  p50 {r['p50_ms']:8.3f} ms  p99 {r['p99_ms']:8.3f} ms")
+    print(f"saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,419 @@
 from .ability import Ability
+from .tracing import tracer
+from .bfs import CSRGraph, load_csr
 import threading
 import os
 import time
+import json
+from contextlib import nullcontext
+import numpy as np
 import tvm
 from tvm import relay
 from tvm.ir.module import IRModule
+from tvm.contrib import graph_executor
 import onnx
 
+# 纯 CPU 机器上的 TVM 没有 iluvatar 后端, GPU 项留空
+has_iluvatar = hasattr(tvm, "iluvatar")
+
 to_tvm_device = {"CPU":tvm.cpu(),
-                "GPU":tvm.iluvatar(),
+                "GPU":tvm.iluvatar() if has_iluvatar else None,
                 "NPU":"npu",
                 "FPGA":"fpga"}
 
 to_tvm_target = {"CPU":"llvm",
-               "GPU":tvm.target.iluvatar(options="-libs=cudnn,cublas,ixinfer"),
+               "GPU":tvm.target.iluvatar(options="-libs=cudnn,cublas,ixinfer") if has_iluvatar else None,
                "NPU":"npu",
                "FPGA":"fpga"}
 
 lock = threading.Lock()
 
+# 可选的执行器后端, 编译时按实测速度选最快的
+EXECUTOR_KINDS = ("relayVM", "graph", "relaxVM")
+# 各后端的文件后缀, relayVM 保持原来的 <DEV>_<task>.so + .bin
+kind_suffix = {"relayVM": "", "graph": "_graph", "relaxVM": "_relax"}
+
+# 编译时自动调优的时间预算 (秒), 默认关闭, SCH_TUNE=秒数 对所有设备生效
+tune_budget = {dev_type: float(os.environ["SCH_TUNE"]) for dev_type in ("CPU", "GPU")} if os.environ.get("SCH_TUNE") else {}
+# 每个 workload 至少有这么多条测量记录才算调过, 不再重复调
+min_tune_trials = 64
+
+def load_relay_exec(so_path):
+    path, ext = os.path.splitext(so_path)
+    code_path = path + ".bin"
+    lib = tvm.runtime.load_module(so_path)
+    with open(code_path, "rb") as f:
+        code = f.read()
+    return tvm.runtime.vm.Executable.load_exec(code, lib)
+
+def input_signature(IR):
+    # 模型第一个输入的静态 (shape, dtype), 用来生成预热输入; 动态形状或拿不到时返回 None
+    try:
+        if isinstance(IR, IRModule):
+            ty = IR["main"].params[0].type_annotation
+            return [int(dim) for dim in ty.shape], ty.dtype
+        if isinstance(IR, str):
+            model = onnx.load(IR, load_external_data=False)
+            initializers = {init.name for init in model.graph.initializer}
+            for inp in model.graph.input:
+                if inp.name in initializers:
+                    continue
+                tensor_type = inp.type.tensor_type
+                shape = [dim.dim_value for dim in tensor_type.shape.dim]
+                if any(dim <= 0 for dim in shape):
+                    return None
+                return shape, str(onnx.helper.tensor_dtype_to_np_dtype(tensor_type.elem_type))
+    except Exception:
+        return None
+    return None
+
+def bucket_module(IR, params, shape):
+    """把模型的第一个输入固定成 shape, 返回 Relay (mod, params); IR 为 ONNX 路径或 shape -> (mod, params) 的函数。"""
+    if isinstance(IR, str):
+        model = onnx.load(IR)
+        initializers = {init.name for init in model.graph.initializer}
+        name = next(inp.name for inp in model.graph.input if inp.name not in initializers)
+        return relay.frontend.from_onnx(model, shape={name: list(shape)})
+    if callable(IR) and not isinstance(IR, IRModule):
+        return IR(tuple(shape))
+    raise ValueError("shape buckets need an ONNX path or a function shape -> (mod, params)")
+
+def precision_module(IR, params, precision, calibration = None):
+    """
+    转换成低精度版本, 返回 Relay (mod, params)。
+    fp16: ToMixedPrecision, 输入输出类型由 pass 决定; int8: relay.quantize, calibration 为校准输入列表。
+    """
+    mod, params = to_relay(IR, params)
+    if precision == "fp16":
+        if params:
+            mod["main"] = relay.build_module.bind_params_by_name(mod["main"], params)
+        mod = relay.transform.InferType()(mod)
+        mod = relay.transform.ToMixedPrecision("float16")(mod)
+        return mod, {}
+    if precision == "int8":
+        name = mod["main"].params[0].name_hint
+        dataset = [{name: x} for x in calibration]
+        with relay.quantize.qconfig(calibrate_mode="kl_divergence", weight_scale="max"):
+            mod = relay.quantize.quantize(mod, params, dataset=dataset)
+        return mod, {}
+    raise ValueError("precision must be one of the following: fp16, int8")
+
+def operator_times(report):
+    # 把 profiler 的 Report 汇总成 {算子名: [总耗时 us, 调用次数]}
+    times = {}
+    for call in json.loads(report.json()).get("calls", []):
+        name = call.get("Name", "unknown")
+        duration = call.get("Duration (us)", {})
+        duration = duration.get("microseconds", 0) if isinstance(duration, dict) else duration
+        entry = times.setdefault(name, [0.0, 0])
+        entry[0] += duration
+        entry[1] += 1
+    return times
+
+def profile_relay_vm(dev_type, so_path):
+    from tvm.runtime import profiler_vm
+    exe = load_relay_exec(so_path)
+    return profiler_vm.VirtualMachineProfiler(exe, to_tvm_device[dev_type])
+
+def run_relay_profiler(prof_exe, input):
+    # profile() 只返回报告不返回输出, 再 invoke 一次拿结果
+    data = tvm.nd.array(input)
+    report = prof_exe.profile(data, func_name="main")
+    result = prof_exe.invoke("main", data)[0].numpy()
+    return result, operator_times(report)
+
+def profile_executor(dev_type, executor_kind, so_path):
+    """加载带算子计时的执行器, 该后端没有 profiler 时返回 None。"""
+    dev = to_tvm_device[dev_type]
+    if executor_kind == "relayVM":
+        return profile_relay_vm(dev_type, so_path)
+    if executor_kind == "graph":
+        from tvm.contrib.debugger import debug_executor
+        lib = tvm.runtime.load_module(so_path)
+        return debug_executor.GraphModuleDebug(lib["debug_create"]("default", dev), [dev], lib["get_graph_json"](), None)
+    if executor_kind == "relaxVM":
+        from tvm import relax
+        return relax.VirtualMachine(tvm.runtime.load_module(so_path), dev, profile=True)
+    return None
+
+def run_profiler(dev_type, executor_kind, prof_exe, input):
+    # 返回 (输出, {算子名: [总耗时 us, 调用次数]})
+    if executor_kind == "relayVM":
+        return run_relay_profiler(prof_exe, input)
+    if executor_kind == "graph":
+        # profile() 按算子计时跑一遍整图, 输出留在输出缓冲区里
+        prof_exe.set_input(0, tvm.nd.array(input))
+        report = prof_exe.profile()
+        return prof_exe.get_output(0).numpy(), operator_times(report)
+    if executor_kind == "relaxVM":
+        data = tvm.nd.array(input, to_tvm_device[dev_type])
+        report = prof_exe.profile("main", data)
+        result = prof_exe["main"](data)
+        result = result if isinstance(result, tvm.nd.NDArray) else result[0]
+        return result.numpy(), operator_times(report)
+    raise ValueError(f"profiling is not supported for {executor_kind}")
+
+def is_relax_module(mod):
+    try:
+        from tvm import relax
+    except ImportError:
+        return False
+    return any(isinstance(func, relax.Function) for func in mod.functions.values())
+
+def to_relay(IR, params):
+    if isinstance(IR, str):
+        onnx_model = onnx.load(IR)
+        return relay.frontend.from_onnx(onnx_model)
+    return IR, params
+
+def to_relax(IR, params, target):
+    from tvm import relax
+    if isinstance(IR, IRModule) and is_relax_module(IR):
+        return IR
+    if isinstance(IR, str):
+        from tvm.relax.frontend.onnx import from_onnx
+        return from_onnx(onnx.load(IR))
+    from tvm.relax.testing import relay_translator
+    return relay_translator.from_relay(IR["main"], target, params)
+
+def tuning_log(dev_type):
+    # 每个设备一个持久化的 AutoScheduler 记录文件, 记录里带 workload 和 target, 跨模型和重启复用
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), dev_type, "tuning.json")
+
+def tuned_trials(log, target):
+    from tvm import auto_scheduler
+    trials = {}
+    if not os.path.exists(log):
+        return trials
+    for inp, res in auto_scheduler.load_records(log):
+        if str(inp.task.target) == str(target) and res.error_no == 0:
+            trials[inp.task.workload_key] = trials.get(inp.task.workload_key, 0) + 1
+    return trials
+
+def tune_relay(dev_type, mod, params, seconds, trials_per_round = 64):
+    """用 AutoScheduler 在 seconds 秒内调优 mod 里还没调过的 workload, 记录追加到设备的调优文件。"""
+    from tvm import auto_scheduler
+    target = tvm.target.Target(to_tvm_target[dev_type])
+    log = tuning_log(dev_type)
+    tasks, weights = auto_scheduler.extract_tasks(mod["main"], params, target, opt_level=2)
+
+    def untuned():
+        trials = tuned_trials(log, target)
+        return [(task, weight) for task, weight in zip(tasks, weights)
+                if trials.get(task.workload_key, 0) < min_tune_trials]
+
+    todo = untuned()
+    print(f"tuning {dev_type}: {len(tasks)} workloads, {len(tasks) - len(todo)} already tuned")
+    start = time.time()
+    deadline = start + seconds
+    rounds, per_trial = 0, None # per_trial 为上一轮实测的每次测量耗时 (含编译和代价模型更新)
+    # AutoScheduler 按测量次数而不是时间停止, 每轮的测量次数按剩余时间和实测速度定, 第一轮每个 workload 只测一次
+    while todo:
+        if per_trial is None:
+            num_trials = len(todo)
+        else:
+            num_trials = min(trials_per_round * len(todo), int((deadline - time.time()) / per_trial))
+        # TaskScheduler 每个 workload 至少测一次
+        if num_trials < len(todo):
+            break
+        tuner = auto_scheduler.TaskScheduler([task for task, _ in todo], [weight for _, weight in todo],
+                                             load_log_file=log if os.path.exists(log) else None)
+        options = auto_scheduler.TuningOptions(num_measure_trials=num_trials,
+                                               num_measures_per_round=min(trials_per_round, num_trials // len(todo)),
+                                               measure_callbacks=[auto_scheduler.RecordToFile(log)],
+                                               verbose=0)
+        round_start = time.time()
+        tuner.tune(options)
+        per_trial = (time.time() - round_start) / max(tuner.ct, 1)
+        rounds += 1
+        todo = untuned()
+    print(f"tuning {dev_type} done: {rounds} rounds in {time.time() - start:.0f} s, "
+          f"{len(todo)} workloads under {min_tune_trials} trials, log {log}")
+
+def tuning_context(dev_type):
+    # 设备有调优记录时, 编译用记录里最好的调度
+    log = tuning_log(dev_type)
+    if not os.path.exists(log):
+        return nullcontext(), {}
+    from tvm import auto_scheduler
+    return auto_scheduler.ApplyHistoryBest(log), {"relay.backend.use_auto_scheduler": True}
+
+def build_executor(dev_type, executor_kind, IR, params, so_path):
+    target = to_tvm_target[dev_type]
+    if executor_kind == "relaxVM":
+        from tvm import relax
+        mod = to_relax(IR, params, target)
+        relax.build(mod, target=target).export_library(so_path)
+        return
+    if is_relax_module(IR):
+        raise ValueError(f"{executor_kind} can not build a Relax module")
+    mod, params = to_relay(IR, params)
+    history, config = tuning_context(dev_type)
+    if executor_kind == "graph":
+        with history, tvm.transform.PassContext(opt_level=2, config=config):
+            lib = relay.build(mod, target=target, params=params)
+        lib.export_library(so_path)
+    else:
+        with history, tvm.transform.PassContext(opt_level=2, config=config):
+            vm_exec = relay.vm.compile(mod, target=target, params=params)
+        code, lib = vm_exec.save()
+        with open(os.path.splitext(so_path)[0] + ".bin", "wb") as f:
+            f.write(code)
+        lib.export_library(so_path)
+
+def build_bfs(dev_type, task_type, graph):
+    """BFS 不用编译: CSRGraph 存到 device/<DEV>/<DEV>_<task>_csr/, 图目录直接用, 返回 ("BFS", 目录)。"""
+    if dev_type != "CPU":
+        raise ValueError("BFS only runs on CPU")
+    if isinstance(graph, str):
+        load_csr(graph)
+        return "BFS", os.path.abspath(graph)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), dev_type, f"{dev_type}_{task_type}_csr")
+    graph.save(path)
+    return "BFS", path
+
+def load_executor(dev_type, executor_kind, so_path):
+    if executor_kind == "BFS":
+        return load_csr(so_path)
+    dev = to_tvm_device[dev_type]
+    if executor_kind == "relayVM":
+        return tvm.runtime.vm.VirtualMachine(load_relay_exec(so_path), dev)
+    lib = tvm.runtime.load_module(so_path)
+    if executor_kind == "graph":
+        return graph_executor.GraphModule(lib["default"](dev))
+    if executor_kind == "relaxVM":
+        from tvm import relax
+        return relax.VirtualMachine(lib, dev)
+
+def invoke_executor(executor_kind, exe, data):
+    # 返回输出列表, 各后端的输出格式不同; 多输入的模型 data 为按顺序的输入列表
+    args = data if isinstance(data, (list, tuple)) else [data]
+    if executor_kind == "relayVM":
+        return exe.invoke("main", *args)
+    if executor_kind == "graph":
+        for i, arg in enumerate(args):
+            exe.set_input(i, arg)
+        exe.run()
+        return [exe.get_output(i) for i in range(exe.get_num_outputs())]
+    if executor_kind == "relaxVM":
+        result = exe["main"](*args)
+        return [result] if isinstance(result, tvm.nd.NDArray) else result
+
+def compute_executor(dev_type, executor_kind, exe, input):
+    if executor_kind == "BFS":
+        # exe 为 mmap 的 CSRGraph, input 为起点 (一个或一组), 返回各点的层数
+        with tracer.span("bfs", track=dev_type):
+            return exe.bfs(input)
+    with tracer.span("nd.array", track=dev_type):
+        # relayVM 和 graph executor 会自己拷到设备上, Relax VM 需要输入已经在设备上
+        data = tvm.nd.array(input, to_tvm_device[dev_type]) if executor_kind == "relaxVM" else tvm.nd.array(input)
+    with tracer.span("invoke", track=dev_type):
+        result = invoke_executor(executor_kind, exe, data)
+    with tracer.span("numpy", track=dev_type):
+        result = result[0].numpy()
+    return result
+
+def stage_input(dev_type, input):
+    # 流水线的上传阶段: 显式拷到设备上, 各后端都接受已经在设备上的输入
+    return tvm.nd.array(input, to_tvm_device[dev_type])
+
+def invoke_staged(executor_kind, exe, data):
+    # 流水线的推理阶段: graph executor 的输出缓冲区下一次 run 会被覆盖, 先在设备上复制一份再交给下载阶段
+    result = invoke_executor(executor_kind, exe, data)[0]
+    return result.copyto(result.device) if executor_kind == "graph" else result
+
+def fetch_output(result):
+    # 流水线的下载阶段
+    return result.numpy()
+
+def to_device(dev_type, data):
+    """返回 (dev_type 上的 NDArray, 是否发生了拷贝), 已经在该设备上的 NDArray 直接复用。"""
+    device = to_tvm_device[dev_type]
+    if isinstance(data, tvm.nd.NDArray):
+        if data.device == device:
+            return data, False
+        data = data.numpy()
+    return tvm.nd.array(data, device), True
+
+def nbytes(data):
+    return int(np.prod(data.shape)) * np.dtype(data.dtype).itemsize
+
+def benchmark_executor(dev_type, executor_kind, so_path, signature, repeat=10):
+    # 编译时的快速测速: 预热两次后取 repeat 次的中位数, 单位秒
+    exe = load_executor(dev_type, executor_kind, so_path)
+    shape, dtype = signature
+    data = tvm.nd.array(np.zeros(shape, dtype=dtype), to_tvm_device[dev_type])
+    for _ in range(2):
+        invoke_executor(executor_kind, exe, data)[0].numpy()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        invoke_executor(executor_kind, exe, data)[0].numpy()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+def build_for(dev_type, task_type, IR, params = None, executor_kind = None):
+    """
+    编译到 device/<DEV>/<DEV>_<task><后缀>.so, 选择结果记在同名 .json 里, 再次编译时直接复用。
+    executor_kind 为 None 时编译所有可用后端, 按实测速度选最快的; 动态形状的模型只用 relayVM。
+    tune_budget 里设置了该设备时, 先调优再编译, 之前没调优的产物会重新编译。
+    """
+    if executor_kind == "BFS" or isinstance(IR, CSRGraph):
+        return build_bfs(dev_type, task_type, IR)
+    tune = tune_budget.get(dev_type)
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), dev_type)
+    prefix = os.path.join(base_dir, f"{dev_type}_{task_type}")
+    meta_path = prefix + ".json"
+    so_of = lambda kind: prefix + kind_suffix[kind] + ".so"
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if executor_kind in (None, meta["executor_kind"]) and os.path.exists(meta["so_path"]) \
+                and (not tune or meta.get("tuned")):
+            return meta["executor_kind"], meta["so_path"]
+    if executor_kind in (None, "relayVM") and os.path.exists(so_of("relayVM")) and not os.path.exists(meta_path) \
+            and not tune:
+        # 没有 .json 的旧产物都是 relayVM
+        return "relayVM", so_of("relayVM")
+    os.makedirs(base_dir, exist_ok=True)
+    if tune and not (isinstance(IR, IRModule) and is_relax_module(IR)):
+        tune_relay(dev_type, *to_relay(IR, params), tune)
+    signature = input_signature(IR)
+    if executor_kind is not None:
+        candidates = [executor_kind]
+    elif signature is None:
+        candidates = ["relayVM"]
+    else:
+        candidates = list(EXECUTOR_KINDS)
+    timings = {}
+    errors = {}
+    for kind in candidates:
+        so_path = so_of(kind)
+        try:
+            build_executor(dev_type, kind, IR, params, so_path)
+            print(f"build {kind} complete, saved to {so_path}")
+            if len(candidates) > 1:
+                timings[kind] = benchmark_executor(dev_type, kind, so_path, signature)
+        except Exception as e:
+            if len(candidates) == 1:
+                raise
+            # 某个后端不支持这个模型时跳过
+            errors[kind] = repr(e)
+            print(f"build {kind} failed: {e}")
+    if len(candidates) == 1:
+        best = candidates[0]
+    elif timings:
+        best = min(timings, key=timings.get)
+    else:
+        raise RuntimeError(f"no executor kind could build {task_type} for {dev_type}: {errors}")
+    meta = {"executor_kind": best, "so_path": so_of(best), "tuned": bool(tune),
+            "timings_ms": {kind: t * 1e3 for kind, t in timings.items()}, "errors": errors}
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    if timings:
+        print(f"{dev_type} {task_type}: use {best} " + ", ".join(f"{kind} {t*1e3:.3f} ms" for kind, t in timings.items()))
+    return best, so_of(best)
+
 class Device:
     input_pointer = {}# {task_type: pointer}
     output_pointer = {}
@@ -30,6 +425,7 @@ class Device:
     def __init__(self, id:int):
         self.id = id
         self.ComputePower = 0
+        self.Bandwidth = None # 主机和设备之间的带宽 (bytes/s), None 表示数据就在主机内存上
         self.is_free = 1
         self.lib_loaded = 0
         self.ability = {}
@@ -127,89 +523,42 @@ class cpu(Device):
         self.DeviceType = "CPU"
         self.ComputePower = 40 # 算力
         
-    def build(task_type:str, IR, params = None):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        so_path = os.path.join(base_dir, "CPU", f"CPU_{task_type}.so")
-        code_path = os.path.join(base_dir, "CPU", f"CPU_{task_type}.bin")
-        if not os.path.exists(so_path):
-            if isinstance(IR, IRModule):
-                mod = IR
-            elif isinstance(IR, str):
-                onnx_model = onnx.load(IR)
-                mod, params = relay.frontend.from_onnx(onnx_model)
-            tvm_target = to_tvm_target["CPU"]
-            with tvm.transform.PassContext(opt_level=2):
-                vm_exec = relay.vm.compile(mod, target=tvm_target, params=params)
-            print("build complete")
-            code, lib = vm_exec.save()
-            with open(code_path, "wb") as f:
-                f.write(code)
-            lib.export_library(so_path)
-            print(f"saved to {so_path}")
-        return "relayVM", so_path
+    def build(task_type:str, IR, params = None, executor_kind:str = None):
+        return build_for("CPU", task_type, IR, params, executor_kind)
         
     def load_lib(executor_kind, so_path):
-        if executor_kind == "relayVM":
-            path, ext = os.path.splitext(so_path)
-            code_path = path + ".bin"
-            lib = tvm.runtime.load_module(so_path)
-            with open(code_path, "rb") as f:
-                code = f.read()
-            exe = tvm.runtime.vm.Executable.load_exec(code, lib)
-            the_vm = tvm.runtime.vm.VirtualMachine(exe, to_tvm_device["CPU"])
-            return the_vm
+        return load_executor("CPU", executor_kind, so_path)
+    
+    def profile_lib(executor_kind, so_path):
+        return profile_executor("CPU", executor_kind, so_path)
+    
+    def profile(executor_kind, prof_exe, input):
+        return run_profiler("CPU", executor_kind, prof_exe, input)
                     
     def compute(executor_kind, exe, input):
-        result = None
-        if executor_kind == "relayVM":
-            result = exe.invoke("main", tvm.nd.array(input))
-        result = result[0].numpy()
-        return result
+        return compute_executor("CPU", executor_kind, exe, input)
         
 class gpu(Device):
     def __init__(self, id: int = 0):
         super().__init__(id)
         self.DeviceType = "GPU"
         self.ComputePower = 500 # 算力
+        self.Bandwidth = 12e9 # PCIe 3.0 x16
         
-    def build(task_type:str, IR, params = None):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        so_path = os.path.join(base_dir, "GPU", f"GPU_{task_type}.so")
-        code_path = os.path.join(base_dir, "GPU", f"GPU_{task_type}.bin")
-        if not os.path.exists(so_path):
-            if isinstance(IR, IRModule):
-                mod = IR
-            elif isinstance(IR, str):
-                onnx_model = onnx.load(IR)
-                mod, params = relay.frontend.from_onnx(onnx_model)
-            tvm_target = to_tvm_target["GPU"]
-            with tvm.transform.PassContext(opt_level=2):
-                vm_exec = relay.vm.compile(mod, target=tvm_target, params=params)
-            print("build complete")
-            code, lib = vm_exec.save()
-            with open(code_path, "wb") as f:
-                f.write(code)
-            lib.export_library(so_path)
-            print(f"saved to {so_path}")
-        return "relayVM", so_path
+    def build(task_type:str, IR, params = None, executor_kind:str = None):
+        return build_for("GPU", task_type, IR, params, executor_kind)
         
     def load_lib(executor_kind, so_path):
-        if executor_kind == "relayVM":
-            path, ext = os.path.splitext(so_path)
-            code_path = path + ".bin"
-            lib = tvm.runtime.load_module(so_path)
-            with open(code_path, "rb") as f:
-                code = f.read()
-            exe = tvm.runtime.vm.Executable.load_exec(code, lib)
-            the_vm = tvm.runtime.vm.VirtualMachine(exe, to_tvm_device["GPU"])
-            return the_vm
+        return load_executor("GPU", executor_kind, so_path)
+    
+    def profile_lib(executor_kind, so_path):
+        return profile_executor("GPU", executor_kind, so_path)
+    
+    def profile(executor_kind, prof_exe, input):
+        return run_profiler("GPU", executor_kind, prof_exe, input)
                     
     def compute(executor_kind, exe, input):
-        result = None
-        if executor_kind == "relayVM":
-            result = exe.invoke("main", tvm.nd.array(input))
-        result = result[0].numpy()
-        return result
+        return compute_executor("GPU", executor_kind, exe, input)
                
 
 class npu(Device):
@@ -217,6 +566,7 @@ class npu(Device):
         super().__init__(id)
         self.DeviceType = "NPU"
         self.ComputePower = 200 # 算力
+        self.Bandwidth = 8e9
               
 
 class fpga(Device):
@@ -224,4 +574,5 @@ class fpga(Device):
         super().__init__(id)
         self.DeviceType = "FPGA"
         self.ComputePower = 100 # 算力
+        self.Bandwidth = 8e9
                 
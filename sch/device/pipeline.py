@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from .devicePool import stage_input, invoke_staged, fetch_output
+from .tracing import tracer
+
+
+# 同一设备上的执行器有状态 (set_input/run/get_output), setPipeline 换流水线时新旧两个推理线程不能同时跑
+_invoke_locks = {}
+_invoke_locks_guard = threading.Lock()
+
+
+def invoke_lock(dev_type: str) -> threading.Lock:
+    with _invoke_locks_guard:
+        return _invoke_locks.setdefault(dev_type, threading.Lock())
+
+
+class _Job:
+    __slots__ = ("executor_kind", "exe", "data", "staged", "future")
+
+    def __init__(self, executor_kind, exe, data, staged):
+        self.executor_kind = executor_kind
+        self.exe = exe
+        self.data = data
+        self.staged = staged
+        self.future = Future()
+
+
+class DevicePipeline:
+    """
+    单个设备的流水线执行: 上传, 推理, 下载三个阶段各一个线程, 最多 slots 个请求同时在流水线里,
+    第 N+1 帧上传到设备和第 N 帧推理重叠, 第 N 帧拷回主机也和第 N+1 帧推理重叠。
+    推理阶段只有一个线程, 同一设备上的执行器仍然一次跑一个请求。
+    使用示例：
+      pipeline = DevicePipeline('CPU', slots=2)
+      futures = [pipeline.submit(executor_kind, exe, x) for x in frames]
+      outputs = [f.result() for f in futures]
+      pipeline.close()
+    """
+
+    def __init__(self, dev_type: str, slots: int = 2):
+        if slots < 2:
+            raise ValueError("pipeline needs at least 2 slots")
+        self.dev_type = dev_type
+        self.slots = slots
+        self.stats = {"requests": 0, "upload": 0.0, "invoke": 0.0, "download": 0.0}
+        self._invoke_lock = invoke_lock(dev_type)
+        self._free = threading.Semaphore(slots)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._queues = [queue.Queue() for _ in range(3)]
+        stages = (("upload", self._upload, self._queues[0], self._queues[1]),
+                  ("invoke", self._invoke, self._queues[1], self._queues[2]),
+                  ("download", self._download, self._queues[2], None))
+        self._threads = [threading.Thread(target=self._loop, args=stage, daemon=True,
+                                          name=f"{dev_type}-{stage[0]}") for stage in stages]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, executor_kind: str, exe, input, staged: bool = False) -> Future:
+        """
+        排进流水线, 没有空闲 slot 时阻塞, 返回输出 (numpy) 的 Future。
+        staged=True 时 input 已经在设备上 (NDArray 或其列表), 跳过上传和下载, Future 返回设备上的输出。
+        """
+        job = _Job(executor_kind, exe, input, staged)
+        self._free.acquire()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self.stats["requests"] += 1
+                self._queues[0].put(job)
+        if closed:
+            # 关闭后 (比如 setPipeline 换了 slot 数) 才提交的请求在调用线程里直接跑完
+            self._free.release()
+            try:
+                for stage in (self._upload, self._invoke, self._download):
+                    stage(job)
+                job.future.set_result(job.data)
+            except BaseException as e:
+                job.future.set_exception(e)
+        return job.future
+
+    def _upload(self, job):
+        if not job.staged:
+            job.data = stage_input(self.dev_type, job.data)
+
+    def _invoke(self, job):
+        with self._invoke_lock:
+            job.data = invoke_staged(job.executor_kind, job.exe, job.data)
+
+    def _download(self, job):
+        if not job.staged:
+            job.data = fetch_output(job.data)
+
+    def _loop(self, name, stage, inbox, outbox):
+        while True:
+            job = inbox.get()
+            if job is None:
+                if outbox is not None:
+                    outbox.put(None)
+                return
+            start = time.perf_counter()
+            try:
+                with tracer.span(name, track=self.dev_type):
+                    stage(job)
+            except BaseException as e:
+                job.future.set_exception(e)
+                self._free.release()
+                continue
+            finally:
+                with self._lock:
+                    self.stats[name] += time.perf_counter() - start
+            if outbox is not None:
+                outbox.put(job)
+            else:
+                job.future.set_result(job.data)
+                self._free.release()
+
+    def close(self, wait: bool = False):
+        # 已经排进来的请求会跑完
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queues[0].put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"slots": self.slots, **self.stats}
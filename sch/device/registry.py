@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def file_footprint(so_path: str) -> int:
+    # 以 .so 和同名 .bin (VM 代码和常量参数) 的文件大小估计常驻内存, BFS 的图目录按目录里的文件算
+    if os.path.isdir(so_path):
+        return sum(entry.stat().st_size for entry in os.scandir(so_path) if entry.is_file())
+    size = 0
+    path, ext = os.path.splitext(so_path)
+    for file in (so_path, path + ".bin"):
+        if os.path.exists(file):
+            size += os.path.getsize(file)
+    return size
+
+
+class ExecutorEntry:
+    __slots__ = ("task_type", "dev", "executor_kind", "so_path", "signature", "version",
+                 "exe", "footprint", "refcount", "loading", "retired")
+
+    def __init__(self, task_type, dev, executor_kind, so_path, signature=None, version=0):
+        self.task_type = task_type
+        self.dev = dev
+        self.executor_kind = executor_kind
+        self.so_path = so_path
+        self.signature = signature # (shape, dtype), 用于生成预热输入
+        self.version = version
+        self.exe = None
+        self.footprint = file_footprint(so_path) if so_path else 0
+        self.refcount = 0
+        self.loading = False
+        self.retired = False
+
+
+class ExecutorRegistry:
+    """
+    按 (task_type, device) 管理已加载的执行器: 第一次使用时加载并用假输入预热一次,
+    每个设备有内存预算, 超出时卸载最久没用且没有请求在用的执行器。
+    loader(dev, executor_kind, so_path) 返回执行器, warmup(dev, executor_kind, exe, signature) 跑一次假推理。
+    使用示例：
+      entry = registry.acquire('yolo', 'GPU')
+      try:
+          device.compute(entry.executor_kind, entry.exe, x)
+      finally:
+          registry.release(entry)
+    """
+
+    def __init__(self, loader, warmup=None, budget: dict = None):
+        self.loader = loader
+        self.warmup = warmup
+        self.budget = dict(budget or {}) # {device: bytes}, 没有设置的设备不限
+        self.entries = {} # {(task_type, device): ExecutorEntry}
+        self.versions = {} # {(task_type, device): 下一个版本号}
+        self.resident = {} # {device: OrderedDict((task_type, version) -> entry)}, 按最近使用排序
+        self.used = {} # {device: bytes}
+        self.stats = {} # {device: {"loads", "hits", "evictions", "load_seconds"}}
+        self._cond = threading.Condition()
+
+    def _stat(self, dev):
+        return self.stats.setdefault(dev, {"loads": 0, "hits": 0, "evictions": 0, "load_seconds": 0.0})
+
+    def _new_entry(self, task_type, dev, executor_kind, so_path, signature):
+        key = (task_type, dev)
+        version = self.versions.get(key, 0)
+        self.versions[key] = version + 1
+        return ExecutorEntry(task_type, dev, executor_kind, so_path, signature, version)
+
+    def register(self, task_type: str, dev: str, executor_kind: str, so_path: str, signature=None, preload=False):
+        with self._cond:
+            entry = self._new_entry(task_type, dev, executor_kind, so_path, signature)
+            old = self.entries.get((task_type, dev))
+            if old is not None:
+                self._retire(old)
+            self.entries[(task_type, dev)] = entry
+        if preload:
+            self.release(self.acquire(task_type, dev))
+        return entry
+
+    def prepare(self, task_type: str, dev: str, executor_kind: str, so_path: str, signature=None) -> ExecutorEntry:
+        """加载并预热一个还没生效的新版本, 请求仍然走旧版本, 之后用 swap 切换。"""
+        with self._cond:
+            entry = self._new_entry(task_type, dev, executor_kind, so_path, signature)
+            old = self.entries.get((task_type, dev))
+            if entry.signature is None and old is not None:
+                entry.signature = old.signature
+            entry.refcount = 1
+            entry.loading = True
+            self._evict(dev, entry.footprint)
+        self._load(entry)
+        return entry
+
+    def swap(self, entries: list):
+        """原子地把新请求切到 prepare 好的版本, 旧版本等在途请求结束后卸载。"""
+        with self._cond:
+            for entry in entries:
+                old = self.entries.get((entry.task_type, entry.dev))
+                self.entries[(entry.task_type, entry.dev)] = entry
+                if old is not None:
+                    self._retire(old)
+        for entry in entries:
+            self.release(entry)
+
+    def discard(self, entries: list):
+        # prepare 成功但没有切换的版本 (比如其他设备失败了)
+        with self._cond:
+            for entry in entries:
+                entry.retired = True
+        for entry in entries:
+            self.release(entry)
+
+    def set_budget(self, dev: str, num_bytes: int = None):
+        with self._cond:
+            if num_bytes is None:
+                self.budget.pop(dev, None)
+            else:
+                self.budget[dev] = num_bytes
+            self._evict(dev, 0)
+
+    def acquire(self, task_type: str, dev: str) -> ExecutorEntry:
+        """返回已加载的执行器并加引用计数, 用完必须 release。"""
+        with self._cond:
+            while True:
+                entry = self.entries[(task_type, dev)]
+                if entry.loading:
+                    self._cond.wait()
+                    continue
+                entry.refcount += 1
+                if entry.exe is not None:
+                    self.resident[dev].move_to_end((task_type, entry.version))
+                    self._stat(dev)["hits"] += 1
+                    return entry
+                entry.loading = True
+                self._evict(dev, entry.footprint)
+                break
+        self._load(entry)
+        return entry
+
+    def _load(self, entry: ExecutorEntry):
+        dev = entry.dev
+        start = time.time()
+        try:
+            exe = self.loader(dev, entry.executor_kind, entry.so_path)
+            if self.warmup and entry.signature is not None:
+                self.warmup(dev, entry.executor_kind, exe, entry.signature)
+        except BaseException:
+            with self._cond:
+                entry.loading = False
+                entry.refcount -= 1
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            entry.exe = exe
+            entry.loading = False
+            self.resident.setdefault(dev, OrderedDict())[(entry.task_type, entry.version)] = entry
+            self.used[dev] = self.used.get(dev, 0) + entry.footprint
+            stat = self._stat(dev)
+            stat["loads"] += 1
+            stat["load_seconds"] += time.time() - start
+            self._cond.notify_all()
+
+    def release(self, entry: ExecutorEntry):
+        with self._cond:
+            entry.refcount -= 1
+            if entry.refcount == 0 and entry.retired:
+                self._unload(entry)
+
+    def _retire(self, entry: ExecutorEntry):
+        # 被新版本替换或注销的执行器, 在途请求结束后卸载
+        entry.retired = True
+        if entry.refcount == 0:
+            self._unload(entry)
+
+    def _unload(self, entry: ExecutorEntry):
+        if entry.exe is None:
+            return
+        self.resident[entry.dev].pop((entry.task_type, entry.version), None)
+        self.used[entry.dev] -= entry.footprint
+        entry.exe = None
+
+    def _evict(self, dev: str, need: int):
+        budget = self.budget.get(dev)
+        if budget is None:
+            return
+        resident = self.resident.get(dev, {})
+        for key, entry in list(resident.items()):
+            if self.used.get(dev, 0) + need <= budget:
+                break
+            if entry.refcount > 0:
+                continue
+            self._unload(entry)
+            self._stat(dev)["evictions"] += 1
+        if self.used.get(dev, 0) + need > budget:
+            print(f"[ExecutorRegistry] {dev} over budget: {self.used.get(dev, 0) + need} > {budget} bytes, all resident executors in use")
+
+    def unregister(self, task_type: str, dev: str):
+        with self._cond:
+            entry = self.entries.pop((task_type, dev), None)
+            if entry is not None:
+                self._retire(entry)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            out = {}
+            for dev in set(self.used) | set(self.budget) | {dev for _, dev in self.entries}:
+                out[dev] = {"used": self.used.get(dev, 0), "budget": self.budget.get(dev),
+                            "resident": [f"{task_type}@v{version}" for task_type, version in self.resident.get(dev, {})],
+                            **self._stat(dev)}
+            return out
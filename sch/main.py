@@ -10,25 +10,41 @@ sched = Scheduler()
 def register_task(dev, task_type, affinity, executor, so_path):
     sched.register_task(dev, task_type, affinity, executor, so_path)
 
-def increase_task(task_type:str):
-    sched.increase_task(task_type)
+def increase_task(task_type:str, volume:int = 0):
+    sched.increase_task(task_type, volume)
     
-def decrease_task(task_type:str):
-    sched.decrease_task(task_type)
+def decrease_task(task_type:str, volume:int = 0):
+    sched.decrease_task(task_type, volume)
+
+def report_fps(dev:str, task_type:str, fps:float, busy:float = 0.0):
+    sched.report_fps(dev, task_type, fps, busy)
+
+def push_metrics(client:str, snapshot:dict):
+    sched.push_metrics(client, snapshot)
+
+def get_profile_request(task_type:str):
+    return sched.get_profile_request(task_type)
+
+def put_profile(task_type:str, dev:str, report:dict):
+    sched.put_profile(task_type, dev, report)
+
+def register_dag(name:str, stages:dict):
+    sched.register_dag(name, stages)
+
+def set_dag_bytes(name:str, edge_bytes:dict):
+    sched.set_dag_bytes(name, edge_bytes)
+
+def get_dag_placement(name:str):
+    return sched.get_dag_placement(name)
 
 def get_strategy(task_type):
+    if task_type not in sched.best_strategy:
+        raise ValueError(f"no device can run task {task_type}, check its affinity and the registered devices")
     return sched.best_strategy[task_type]
 
-if __name__ == "__main__":
-    gpu0 = gpu(0)
-    cpu0 = cpu(0)
-    sched.addDev(gpu0)
-    sched.addDev(cpu0)
-    sched.start_plot()
-    sched.listen_command()
+def serve(socket_file:str):
     class MyManager(BaseManager): pass      
     
-    socket_file = "/tmp/scheduler.sock"
     if os.path.exists(socket_file):
         os.remove(socket_file)
 
@@ -37,7 +53,22 @@ if __name__ == "__main__":
     MyManager.register('increase_task', callable=increase_task)
     MyManager.register('decrease_task', callable=decrease_task)
     MyManager.register('get_strategy', callable=get_strategy)
+    MyManager.register('report_fps', callable=report_fps)
+    MyManager.register('push_metrics', callable=push_metrics)
+    MyManager.register('get_profile_request', callable=get_profile_request)
+    MyManager.register('put_profile', callable=put_profile)
+    MyManager.register('register_dag', callable=register_dag)
+    MyManager.register('set_dag_bytes', callable=set_dag_bytes)
+    MyManager.register('get_dag_placement', callable=get_dag_placement)
     server = mgr.get_server()
     print(f"Scheduler RPC server listening on {socket_file}")
     server.serve_forever()
-    
+
+if __name__ == "__main__":
+    gpu0 = gpu(0)
+    cpu0 = cpu(0)
+    sched.addDev(gpu0)
+    sched.addDev(cpu0)
+    sched.start_plot()
+    sched.listen_command()
+    serve(os.environ.get("SCH_SOCKET", "/tmp/scheduler.sock"))
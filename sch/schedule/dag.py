@@ -0,0 +1,99 @@
+from itertools import product
+
+# 穷举放置方案的上限, 超过时按拓扑序贪心
+exhaustive_limit = 4096
+# 还没有实测中间结果大小时按这个估计 (bytes)
+default_edge_bytes = 1 << 20
+
+
+def topological_order(stages: dict) -> list:
+    """stages: {stage: [parent stages]}, 返回拓扑序, 有环或父阶段不存在时报错。"""
+    order = []
+    state = {} # 1: 访问中, 2: 已完成
+    def visit(stage):
+        if state.get(stage) == 2:
+            return
+        if state.get(stage) == 1:
+            raise ValueError(f"DAG has a cycle through {stage}")
+        if stage not in stages:
+            raise ValueError(f"unknown parent stage {stage}")
+        state[stage] = 1
+        for parent in stages[stage]:
+            visit(parent)
+        state[stage] = 2
+        order.append(stage)
+    for stage in stages:
+        visit(stage)
+    return order
+
+
+def edges(stages: dict) -> list:
+    """返回 [(src, dst)], src 为 None 表示主机上的输入, dst 为 None 表示拷回主机的输出。"""
+    children = {parent for parents in stages.values() for parent in parents}
+    out = []
+    for stage, parents in stages.items():
+        out += [(parent, stage) for parent in parents] if parents else [(None, stage)]
+        if stage not in children:
+            out.append((stage, None))
+    return out
+
+
+def transfer_time(src_dev, dst_dev, num_bytes: int) -> float:
+    # 设备 Bandwidth 为 None 时数据就在主机内存上; 两个加速器之间经主机中转
+    if src_dev is dst_dev:
+        return 0.0
+    seconds = 0.0
+    for dev in (src_dev, dst_dev):
+        if dev is not None and dev.Bandwidth:
+            seconds += num_bytes / dev.Bandwidth
+    return seconds
+
+
+def place_dag(stages: dict, edge_bytes: dict, devices: list):
+    """
+    给每个阶段选一个设备, 使计算时间 (1 / ComputePower*affinity) 加上中间结果在设备间搬运的时间最小。
+    edge_bytes: {(src, dst): bytes}, 没有的边按 default_edge_bytes 估计。
+    返回 ({stage: DeviceType}, 预计秒数)。
+    """
+    order = topological_order(stages)
+    capable = {stage: [dev for dev in devices if stage in dev.ability and dev.ability[stage].affinity > 0]
+               for stage in order}
+    for stage, devs in capable.items():
+        if not devs:
+            raise ValueError(f"no device can run stage {stage}")
+    links = edges(stages)
+    compute = {(stage, dev): 1 / (dev.ComputePower * dev.ability[stage].affinity)
+               for stage in order for dev in capable[stage]}
+
+    def cost(assign):
+        total = sum(compute[(stage, assign[stage])] for stage in order)
+        for src, dst in links:
+            num_bytes = edge_bytes.get((src, dst), default_edge_bytes)
+            total += transfer_time(assign.get(src), assign.get(dst), num_bytes)
+        return total
+
+    num_plans = 1
+    for stage in order:
+        num_plans *= len(capable[stage])
+    best, best_cost = None, float("inf")
+    if num_plans <= exhaustive_limit:
+        for plan in product(*(capable[stage] for stage in order)):
+            assign = dict(zip(order, plan))
+            value = cost(assign)
+            if value < best_cost:
+                best, best_cost = assign, value
+    else:
+        # 按拓扑序逐个放, 只计已放好的父阶段的搬运
+        best = {}
+        for stage in order:
+            def partial(dev):
+                value = compute[(stage, dev)]
+                for src, dst in links:
+                    if dst == stage and (src is None or src in best):
+                        value += transfer_time(best.get(src), dev, edge_bytes.get((src, dst), default_edge_bytes))
+                    elif src == stage and dst is None:
+                        value += transfer_time(dev, None, edge_bytes.get((src, dst), default_edge_bytes))
+                return value
+            best[stage] = min(capable[stage], key=partial)
+        best_cost = cost(best)
+    return {stage: dev.DeviceType for stage, dev in best.items()}, best_cost
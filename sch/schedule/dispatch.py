@@ -0,0 +1,12 @@
+"""
+请求派发到设备的规则, 客户端 TaskService._acquire 和 schedule/simulator.py 共用, 模拟结果和线上派发一致。
+不依赖 tvm 和调度器, 客户端 (sch 包) 和调度器进程 (sch/ 目录) 都能导入。
+"""
+
+
+def pick_free(strategy, free_slots: dict):
+    """按策略顺序返回第一个还有空闲 slot 的设备, 都没有时返回 None; free_slots 为 {device: 空闲 slot 数}。"""
+    for dev in strategy:
+        if free_slots.get(dev, 0) > 0:
+            return dev
+    return None
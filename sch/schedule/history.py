@@ -0,0 +1,124 @@
+import threading
+from array import array
+
+
+class RingBuffer:
+    """定长环形缓冲区, 保存 (ts, value), 写满后覆盖最旧的数据。"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.head = 0 # 下一个写入位置
+        self.size = 0
+
+    def append(self, ts: float, value: float):
+        self.ts[self.head] = ts
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def items(self, start: float = None, end: float = None) -> list:
+        first = (self.head - self.size) % self.capacity
+        lo = 0
+        if start is not None:
+            # 时间戳单调递增, 二分找到第一个 >= start 的点
+            hi = self.size
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.ts[(first + mid) % self.capacity] < start:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        out = []
+        for i in range(lo, self.size):
+            index = (first + i) % self.capacity
+            ts = self.ts[index]
+            if end is not None and ts > end:
+                break
+            out.append((ts, self.values[index]))
+        return out
+
+    def last_ts(self):
+        if not self.size:
+            return None
+        return self.ts[(self.head - 1) % self.capacity]
+
+
+class _Series:
+    def __init__(self, capacities: dict):
+        self.raw = RingBuffer(capacities["raw"])
+        self.downsampled = {} # {resolution: (interval, RingBuffer, [bucket_start, sum, count])}
+        for name, interval in HistoryStore.INTERVALS.items():
+            self.downsampled[name] = (interval, RingBuffer(capacities[name]), [None, 0.0, 0])
+
+    def append(self, ts: float, value: float):
+        self.raw.append(ts, value)
+        for interval, ring, bucket in self.downsampled.values():
+            bucket_start = ts - ts % interval
+            if bucket[0] is not None and bucket_start != bucket[0]:
+                # 桶结束, 写入平均值
+                ring.append(bucket[0], bucket[1] / bucket[2])
+                bucket[1], bucket[2] = 0.0, 0
+            bucket[0] = bucket_start
+            bucket[1] += value
+            bucket[2] += 1
+
+    def query(self, resolution: str, start: float = None, end: float = None) -> list:
+        if resolution == "raw":
+            return self.raw.items(start, end)
+        interval, ring, bucket = self.downsampled[resolution]
+        out = ring.items(start, end)
+        # 带上还没写完的当前桶
+        if bucket[2] and (start is None or bucket[0] >= start) and (end is None or bucket[0] <= end):
+            out.append((bucket[0], bucket[1] / bucket[2]))
+        return out
+
+
+class HistoryStore:
+    """
+    每条曲线一组定长环形缓冲区: 原始点, 1s 平均, 1min 平均。
+    默认容量: 原始点 6000 个 (10Hz 下 10 分钟), 1s 保留 6 小时, 1min 保留 7 天,
+    内存只和曲线条数有关, 不随运行时间增长。
+    """
+    INTERVALS = {"1s": 1, "1m": 60}
+    RESOLUTIONS = ("raw", "1s", "1m")
+
+    def __init__(self, raw_capacity: int = 6000, second_capacity: int = 6 * 3600, minute_capacity: int = 7 * 24 * 60):
+        self.capacities = {"raw": raw_capacity, "1s": second_capacity, "1m": minute_capacity}
+        self._series = {} # {name: _Series}
+        self._lock = threading.Lock()
+
+    def record(self, points: list):
+        """points: [(series, ts, value), ...]"""
+        with self._lock:
+            for name, ts, value in points:
+                series = self._series.get(name)
+                if series is None:
+                    series = self._series[name] = _Series(self.capacities)
+                series.append(ts, value)
+
+    def series(self) -> list:
+        with self._lock:
+            return sorted(self._series)
+
+    def query(self, names: list, resolution: str = "raw", start: float = None, end: float = None,
+              window: float = None) -> dict:
+        """返回 {series: [(ts, value), ...]}, window 表示只取最近 window 秒。"""
+        if resolution not in self.RESOLUTIONS:
+            raise ValueError(f"resolution must be one of the following: {', '.join(self.RESOLUTIONS)}")
+        out = {}
+        with self._lock:
+            for name in names:
+                series = self._series.get(name)
+                if series is None:
+                    out[name] = []
+                    continue
+                lo = start
+                if window is not None:
+                    last = series.raw.last_ts()
+                    if last is not None:
+                        lo = max(lo, last - window) if lo is not None else last - window
+                out[name] = series.query(resolution, lo, end)
+        return out
@@ -0,0 +1,54 @@
+class InterferenceModel:
+    """
+    按设备学习任务共置时的减速矩阵。
+    slowdown[dev_type][(task, other)] 表示 task 与 other 共用 dev_type 时,
+    task 的实际帧率比理想平分 (solo_fps / k) 慢多少倍, 1.0 表示没有额外开销。
+    只有任务在设备上一直有请求在跑 (busy >= saturation) 时帧率才反映设备能给它的算力,
+    请求少的任务帧率只取决于到达速率, 这些观测不计入。
+    """
+
+    def __init__(self, alpha: float = 0.3, max_slowdown: float = 10.0, saturation: float = 0.9):
+        self.alpha = alpha # EWMA 系数
+        self.max_slowdown = max_slowdown
+        self.saturation = saturation
+        self.solo_fps = {} # {(dev_type, task_type): fps}
+        self.slowdown = {} # {dev_type: {(task_type, other): factor}}
+
+    def _ewma(self, table: dict, key, value: float):
+        old = table.get(key)
+        table[key] = value if old is None else (1 - self.alpha) * old + self.alpha * value
+
+    def observe(self, dev_type: str, task_type: str, colocated: list, fps: float, busy: float):
+        """
+        记录一次观测: task_type 在与 colocated 共置的 dev_type 上跑出了 fps,
+        busy 为这段时间里该任务在设备上有请求在跑的时间占比 (开流水线时可以超过 1)。
+        """
+        others = [task for task in colocated if task != task_type]
+        if fps <= 0 or busy < self.saturation:
+            return
+        if not others:
+            self._ewma(self.solo_fps, (dev_type, task_type), fps)
+            return
+        solo = self.solo_fps.get((dev_type, task_type))
+        if not solo:
+            return
+        expected = solo / (len(others) + 1)
+        factor = min(max(expected / fps, 1.0), self.max_slowdown)
+        # 总减速按几何平均摊到每个共置任务上
+        pair_factor = factor ** (1 / len(others))
+        matrix = self.slowdown.setdefault(dev_type, {})
+        for other in others:
+            self._ewma(matrix, (task_type, other), pair_factor)
+
+    def factor(self, dev_type: str, task_type: str, colocated: list) -> float:
+        """task_type 与 colocated 共置时的预计减速倍数, 没有观测的组合按 1.0 计。"""
+        matrix = self.slowdown.get(dev_type, {})
+        factor = 1.0
+        for other in colocated:
+            if other != task_type:
+                factor *= matrix.get((task_type, other), 1.0)
+        return factor
+
+    def dump(self) -> dict:
+        return {dev_type: {f"{task}|{other}": round(value, 3) for (task, other), value in matrix.items()}
+                for dev_type, matrix in self.slowdown.items()}
@@ -0,0 +1,130 @@
+import threading
+import math
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(labels: dict):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """
+    进程内的指标表, 支持 counter / gauge / histogram, 可导出为可 pickle 的快照。
+    使用示例：
+      m = MetricsRegistry()
+      m.describe('sch_compute_seconds', 'histogram', 'device compute time')
+      m.observe('sch_compute_seconds', 0.012, device='GPU', task_type='yolo')
+      text = render([({}, m.snapshot())])
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.help = {} # {name: (kind, text)}
+        self.buckets = {} # {name: tuple(upper bounds)}
+        self.counters = {} # {name: {labels: value}}
+        self.gauges = {}
+        self.histograms = {} # {name: {labels: [bucket_counts, sum, count]}}
+
+    def describe(self, name: str, kind: str, text: str, buckets=DEFAULT_BUCKETS):
+        self.help[name] = (kind, text)
+        if kind == "histogram":
+            self.buckets[name] = tuple(buckets)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(labels)
+        with self._lock:
+            family = self.counters.setdefault(name, {})
+            family[key] = family.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_key(labels)] = value
+
+    def add(self, name: str, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            family = self.gauges.setdefault(name, {})
+            family[key] = family.get(key, 0) + value
+
+    def clear(self, name: str):
+        # 删掉整个 gauge 族, 标签取值会消失的指标先清空再按当前状态重新 set
+        with self._lock:
+            self.gauges.pop(name, None)
+
+    def observe(self, name: str, value: float, **labels):
+        bounds = self.buckets.get(name, DEFAULT_BUCKETS)
+        key = _key(labels)
+        with self._lock:
+            family = self.histograms.setdefault(name, {})
+            hist = family.get(key)
+            if hist is None:
+                hist = family[key] = [[0] * len(bounds), 0.0, 0]
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "help": dict(self.help),
+                "buckets": dict(self.buckets),
+                "counters": {name: dict(family) for name, family in self.counters.items()},
+                "gauges": {name: dict(family) for name, family in self.gauges.items()},
+                "histograms": {name: {key: [list(hist[0]), hist[1], hist[2]] for key, hist in family.items()}
+                               for name, family in self.histograms.items()},
+            }
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render(snapshots: list) -> str:
+    """把 [(extra_labels, snapshot)] 合并渲染成 Prometheus 文本格式。"""
+    help_text = {}
+    samples = {} # {name: [lines]}
+    for extra, snap in snapshots:
+        help_text.update(snap["help"])
+        extra_key = tuple(sorted(extra.items()))
+        for kind in ("counters", "gauges"):
+            for name, family in snap[kind].items():
+                lines = samples.setdefault(name, [])
+                for labels, value in family.items():
+                    lines.append(f"{name}{_format_labels(extra_key + labels)} {_format_value(value)}")
+        for name, family in snap["histograms"].items():
+            bounds = snap["buckets"].get(name, DEFAULT_BUCKETS)
+            lines = samples.setdefault(name, [])
+            for labels, (counts, total, count) in family.items():
+                labels = extra_key + labels
+                cumulative = 0
+                for bound, num in zip(bounds, counts):
+                    cumulative += num
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(float(bound))),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    out = []
+    for name, lines in samples.items():
+        kind, text = help_text.get(name, ("untyped", ""))
+        out.append(f"# HELP {name} {text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
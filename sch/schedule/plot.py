@@ -2,167 +2,137 @@ import threading
 import asyncio
 import time
 from contextlib import asynccontextmanager
-from typing import Dict, Set, Optional
+from typing import Dict, Set, Optional, Callable
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse
 import uvicorn
 import json
 import logging
 import math
+from schedule.history import HistoryStore
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-device_port = {
-    "CPU": 1900,
-    "GPU": 2000,
-    "NPU": 3000,
-    "FPGA": 4000
-}
+plot_port = 1900
 
 
-class _TaskManager:
-    """内部管理：维护 ui sockets 和 per-task sockets"""
+class _StreamManager:
+    """内部管理：维护所有曲线和订阅者, 每个订阅者只接收自己订阅的曲线"""
     
     def __init__(self):
-        self.ui_clients: Set[WebSocket] = set()
-        self.task_clients: Dict[str, Set[WebSocket]] = {}
-        self.tasks: Set[str] = set()
+        self.clients: Dict[WebSocket, Optional[Set[str]]] = {} # ws -> 订阅的曲线, None 表示全部
+        self.series: Set[str] = set()
         self._lock = asyncio.Lock()  # 添加锁以防止竞态条件
 
-    # UI (manager page) connect
-    async def connect_ui(self, ws: WebSocket):
+    async def connect(self, ws: WebSocket):
         await ws.accept()
         async with self._lock:
-            self.ui_clients.add(ws)
-        # send current task list
-        await self._safe_send(ws, {"event": "task_list", "tasks": list(self.tasks)})
+            self.clients[ws] = None
+            series = sorted(self.series)
+        # send current series list
+        await self._safe_send(ws, {"event": "series_list", "series": series})
 
-    async def disconnect_ui(self, ws: WebSocket):
+    async def disconnect(self, ws: WebSocket):
         async with self._lock:
-            self.ui_clients.discard(ws)
+            self.clients.pop(ws, None)
 
-    async def broadcast_ui(self, msg: dict):
+    async def subscribe(self, ws: WebSocket, names):
         async with self._lock:
-            clients = list(self.ui_clients)
-        
-        disconnected = []
-        for ws in clients:
-            try:
-                await ws.send_json(msg)
-            except Exception as e:
-                logger.warning(f"Failed to send to UI client: {e}")
-                disconnected.append(ws)
-        
-        # 清理断开的连接
-        for ws in disconnected:
-            await self.disconnect_ui(ws)
-
-    async def _safe_send(self, ws: WebSocket, msg: dict):
+            if ws not in self.clients:
+                return
+            if names == "*":
+                self.clients[ws] = None
+                return
+            subs = self.clients[ws]
+            self.clients[ws] = (set() if subs is None else subs) | set(names)
+
+    async def unsubscribe(self, ws: WebSocket, names):
+        async with self._lock:
+            if ws not in self.clients:
+                return
+            if names == "*":
+                self.clients[ws] = set()
+                return
+            subs = self.clients[ws]
+            if subs is None:
+                subs = set(self.series)
+            self.clients[ws] = subs - set(names)
+
+    async def _safe_send(self, ws: WebSocket, msg: dict) -> bool:
         try:
             await ws.send_json(msg)
+            return True
         except Exception as e:
             logger.warning(f"Failed to send message: {e}")
-            await self.disconnect_ui(ws)
-
-    # task ws connect
-    async def connect_task_ws(self, task: str, ws: WebSocket):
-        await ws.accept()
-        async with self._lock:
-            if task not in self.tasks:
-                # 任务不存在，拒绝连接
-                try:
-                    await ws.send_json({"error": "Task not found", "task": task})
-                    await ws.close()
-                except:
-                    pass
-                return False
-            self.task_clients.setdefault(task, set()).add(ws)
-        return True
-
-    async def disconnect_task_ws(self, task: str, ws: WebSocket):
-        async with self._lock:
-            cl = self.task_clients.get(task)
-            if cl:
-                cl.discard(ws)
-                if not cl:
-                    self.task_clients.pop(task, None)
+            await self.disconnect(ws)
+            return False
 
-    async def send_to_task_clients(self, task: str, msg: dict):
+    async def broadcast(self, msg: dict):
         async with self._lock:
-            clients = list(self.task_clients.get(task, set()))
-        
-        disconnected = []
+            clients = list(self.clients)
         for ws in clients:
-            try:
-                await ws.send_json(msg)
-            except Exception as e:
-                logger.warning(f"Failed to send to task client: {e}")
-                disconnected.append(ws)
-        
-        # 清理断开的连接
-        for ws in disconnected:
-            await self.disconnect_task_ws(task, ws)
+            await self._safe_send(ws, msg)
 
-    # task lifecycle controlled by external manager
-    async def add_task(self, task: str):
+    async def publish(self, points: list):
+        """一个 tick 的所有曲线更新, 每个订阅者只发一帧。points: [[series, ts, value], ...]"""
         async with self._lock:
-            if task in self.tasks:
+            clients = list(self.clients.items())
+        for ws, subs in clients:
+            frame = points if subs is None else [p for p in points if p[0] in subs]
+            if frame:
+                await self._safe_send(ws, {"event": "frame", "points": frame})
+
+    # series lifecycle controlled by external manager
+    async def add_series(self, name: str):
+        async with self._lock:
+            if name in self.series:
                 return False
-            self.tasks.add(task)
-        
-        await self.broadcast_ui({
-            "event": "task_online", 
-            "task": task, 
-            "ws_path": f"/ws/task/{task}"
-        })
+            self.series.add(name)
+        await self.broadcast({"event": "series_online", "series": name})
         return True
 
-    async def remove_task(self, task: str):
+    async def remove_series(self, name: str):
         async with self._lock:
-            if task not in self.tasks:
+            if name not in self.series:
                 return False
-            self.tasks.discard(task)
-            # 获取该任务的所有连接
-            clients = list(self.task_clients.get(task, set()))
-            self.task_clients.pop(task, None)
-        
-        # notify UI
-        await self.broadcast_ui({"event": "task_offline", "task": task})
-        
-        # notify task connections and close them
-        for ws in clients:
-            try:
-                await ws.send_json({"status": "offline", "task": task})
-                await ws.close()
-            except Exception as e:
-                logger.warning(f"Error closing task connection: {e}")
-        
+            self.series.discard(name)
+            for ws, subs in self.clients.items():
+                if subs is not None:
+                    subs.discard(name)
+        await self.broadcast({"event": "series_offline", "series": name})
         return True
 
-    async def get_tasks(self):
-        """获取当前所有任务列表"""
+    async def get_series(self):
+        """获取当前所有曲线"""
         async with self._lock:
-            return list(self.tasks)
+            return sorted(self.series)
 
 
 class TaskPlotServer:
     """
-    针对 task 的实时曲线监控服务。
+    所有设备、所有任务共用的实时曲线监控服务, 曲线名一般为 "设备/任务"。
     使用示例：
       s = TaskPlotServer(host='0.0.0.0', port=5000)
       s.start(background=True)
-      s.add_task('train_step')
-      s.push_value('train_step', time.time(), 0.123)
-      s.remove_task('train_step')
+      s.add_task('GPU/yolo')
+      s.push_values([('GPU/yolo', time.time(), 0.123), ('CPU/yolo', time.time(), 0.1)])
+      s.remove_task('GPU/yolo')
       s.stop()
+    每次 push_values 只调度一次协程, 给每个订阅者发一帧。
+    推送的数据同时写入 HistoryStore, 由 /history 提供回填和导出。
+    metrics_provider 返回 Prometheus 文本格式的指标, 由 /metrics 提供。
     """
 
-    def __init__(self, host: str = "0.0.0.0", port: int = 5000):
+    def __init__(self, host: str = "0.0.0.0", port: int = 5000,
+                 metrics_provider: Optional[Callable[[], str]] = None,
+                 history: Optional[HistoryStore] = None):
         self.host = host
         self.port = port
-        self.manager = _TaskManager()
+        self.metrics_provider = metrics_provider
+        self.history = history or HistoryStore()
+        self.manager = _StreamManager()
         self.loop: Optional[asyncio.AbstractEventLoop] = None
         self._server_thread: Optional[threading.Thread] = None
         self._server: Optional[uvicorn.Server] = None
@@ -173,8 +143,10 @@ class TaskPlotServer:
         self.app = FastAPI(lifespan=self._lifespan)
         # register routes
         self.app.get("/")(self._index)
-        self.app.websocket("/ws/manager")(self._ws_manager)
-        self.app.websocket("/ws/task/{task}")(self._ws_task)
+        self.app.get("/metrics")(self._metrics)
+        self.app.get("/history")(self._history)
+        self.app.get("/history/series")(self._history_series)
+        self.app.websocket("/ws/stream")(self._ws_stream)
 
     # ---------------- lifespan: 捕获 event loop，优雅关闭时清理 ----------------
     @asynccontextmanager
@@ -195,24 +167,40 @@ class TaskPlotServer:
 
     async def _cleanup_all_connections(self):
         """清理所有WebSocket连接"""
-        # 关闭所有UI客户端
-        for ws in list(self.manager.ui_clients):
+        for ws in list(self.manager.clients):
             try:
                 await ws.close()
             except:
                 pass
-        
-        # 关闭所有任务客户端
-        for task, clients in list(self.manager.task_clients.items()):
-            for ws in list(clients):
-                try:
-                    await ws.close()
-                except:
-                    pass
+
+    # ---------------- Prometheus 指标 ----------------
+    async def _metrics(self):
+        text = self.metrics_provider() if self.metrics_provider else ""
+        return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+    # ---------------- 历史数据查询 ----------------
+    async def _history(self, series: str, resolution: str = "raw", start: Optional[float] = None,
+                       end: Optional[float] = None, window: Optional[float] = None, format: str = "json"):
+        """series 逗号分隔; resolution 为 raw/1s/1m; window 表示只取最近 window 秒; format 为 json/csv。"""
+        names = [name for name in series.split(",") if name]
+        try:
+            data = self.history.query(names, resolution, start, end, window)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if format == "csv":
+            lines = ["series,ts,value"]
+            for name, points in data.items():
+                lines.extend(f"{name},{ts},{value}" for ts, value in points)
+            return PlainTextResponse("\n".join(lines) + "\n", media_type="text/csv")
+        return JSONResponse({"resolution": resolution,
+                             "series": {name: [[ts, value] for ts, value in points] for name, points in data.items()}})
+
+    async def _history_series(self):
+        return JSONResponse({"series": self.history.series()})
 
     # ---------------- 前端页面 (示例) ----------------
     async def _index(self):
-        # 嵌入的示例页面： manager websocket + per-task websockets
+        # 嵌入的示例页面： 一个 stream websocket 接收所有订阅曲线
         html = """
 <!doctype html>
 <html>
@@ -237,11 +225,11 @@ class TaskPlotServer:
 <body>
   <h3>实时任务指标监控（移动平均平滑 MA）</h3>
   <div id="status" class="disconnected">连接状态：未连接</div>
-  <div id="tasks">当前任务：无</div>
+  <div id="tasks">当前曲线：无</div>
 
   <div id="controls">
     <label><input id="smoothing_enabled" type="checkbox" checked> 启用平滑 (MA, 窗口=3s)</label>
-    <small style="margin-left:12px;color:#666">平滑在客户端实时计算，默认保留最后 20s 数据。</small>
+    <small style="margin-left:12px;color:#666">平滑在客户端实时计算，默认保留最后 20s 数据。勾选曲线即订阅，也可用 ?series=GPU/yolo,CPU/yolo 指定。</small>
   </div>
 
   <canvas id="chart" width="1000" height="420"></canvas>
@@ -250,8 +238,12 @@ class TaskPlotServer:
 const ctx = document.getElementById('chart').getContext('2d');
 const datasetIndex = {};
 const smoothingParams = { enabled: true, ma_window: 3.0 };
-const sockets = {};
-let managerSocket = null;
+const knownSeries = new Set();
+const selected = new Set();
+const urlSeries = new URLSearchParams(location.search).get('series');
+let selectAll = !urlSeries;
+if (urlSeries) urlSeries.split(',').forEach(n => selected.add(n));
+let streamSocket = null;
 let reconnectTimer = null;
 
 function randColor(){
@@ -288,9 +280,25 @@ function updateStatus(connected) {
   else { status.className = 'disconnected'; status.textContent = '连接状态：未连接'; }
 }
 
+function isSelected(name) { return selectAll || selected.has(name); }
+
 function updateTaskUI() {
-  const names = Object.keys(datasetIndex).filter(n => !n.endsWith('__raw'));
-  document.getElementById('tasks').innerHTML = names.length ? '当前任务：' + names.map(n => `<span>${n}</span>`).join('') : '当前任务：无';
+  const names = Array.from(knownSeries).sort();
+  const el = document.getElementById('tasks');
+  if (!names.length) { el.textContent = '当前曲线：无'; return; }
+  el.innerHTML = '当前曲线：' + names.map(n =>
+    `<label><input type="checkbox" data-series="${n}" ${isSelected(n) ? 'checked' : ''}><span>${n}</span></label>`).join('');
+  el.querySelectorAll('input[data-series]').forEach(box => box.addEventListener('change', e => toggleSeries(e.target.dataset.series, e.target.checked)));
+}
+
+function sendStream(msg) {
+  if (streamSocket && streamSocket.readyState === WebSocket.OPEN) streamSocket.send(JSON.stringify(msg));
+}
+
+function toggleSeries(name, on) {
+  if (selectAll) { selectAll = false; knownSeries.forEach(n => selected.add(n)); }
+  if (on) { selected.add(name); sendStream({subscribe: [name]}); backfill([name]); }
+  else { selected.delete(name); sendStream({unsubscribe: [name]}); removeDataset(name); }
 }
 
 function ensureDataset(task) {
@@ -365,63 +373,83 @@ function applySmoothingToAll() {
   chart.update('none');
 }
 
-function connectTask(task) {
-  if (sockets[task]) return;
-  const ws = new WebSocket(`ws://${location.host}/ws/task/${encodeURIComponent(task)}`);
-  sockets[task] = ws;
-  ws.onopen = () => { ensureDataset(task); console.log(`Task '${task}' connected`); };
-  ws.onmessage = ev => {
-    try {
-      const msg = JSON.parse(ev.data);
-      if (msg.error) { console.error(`Task '${task}' error:`, msg.error); ws.close(); return; }
-      if (msg.status === 'offline') { ws.close(); delete sockets[task]; removeDataset(task); return; }
-      if (typeof msg.ts === 'number' && typeof msg.value === 'number') {
-        const idx = ensureDataset(task);
-        const now = msg.ts;
-        const ds = chart.data.datasets[idx];
-        ds.raw.push({x: now, y: msg.value});
-        const horizon = 20;
-        ds.raw = ds.raw.filter(p => now - p.x <= horizon + Math.max(1, smoothingParams.ma_window || 0));
-        recomputeDatasetForDisplay(idx);
-        chart.update('none');
-      }
-    } catch (e) { console.error(`Error processing message for task '${task}':`, e); }
-  };
-  ws.onclose = () => { console.log(`Task '${task}' disconnected`); delete sockets[task]; removeDataset(task); };
-  ws.onerror = e => { console.error(`Task '${task}' WebSocket error:`, e); };
+let t0 = null; // 服务端推送的是 epoch 秒, 图上显示相对第一个点的时间
+
+function addPoint(name, ts, value) {
+  if (t0 === null) t0 = ts;
+  const x = ts - t0;
+  const idx = ensureDataset(name);
+  const ds = chart.data.datasets[idx];
+  ds.raw.push({x: x, y: value});
+  const horizon = 20;
+  const now = Math.max(...ds.raw.map(p => p.x));
+  ds.raw = ds.raw.filter(p => now - p.x <= horizon + Math.max(1, smoothingParams.ma_window || 0));
+  recomputeDatasetForDisplay(idx);
 }
 
-function disconnectTask(task) { const ws = sockets[task]; if (ws) { ws.close(); } delete sockets[task]; removeDataset(task); }
+// 从服务端历史缓冲区回填最近的数据, 晚连接或重连的页面不会从空白开始
+function backfill(names) {
+  if (!names.length) return;
+  fetch(`/history?series=${encodeURIComponent(names.join(','))}&window=25`)
+    .then(r => r.json())
+    .then(data => {
+      Object.entries(data.series || {}).forEach(([name, points]) => {
+        if (!isSelected(name) || !points.length) return;
+        const idx = datasetIndex[name];
+        const first = idx === undefined || !chart.data.datasets[idx].raw.length ? Infinity
+          : Math.min(...chart.data.datasets[idx].raw.map(p => p.x));
+        points.forEach(([ts, value]) => { if (t0 === null || ts - t0 < first) addPoint(name, ts, value); });
+      });
+      chart.update('none');
+    })
+    .catch(e => console.error('Backfill failed:', e));
+}
 
-function connectManager() {
-  if (managerSocket && managerSocket.readyState === WebSocket.OPEN) return;
-  managerSocket = new WebSocket(`ws://${location.host}/ws/manager`);
-  managerSocket.onopen = () => { updateStatus(true); console.log('Manager connected'); clearTimeout(reconnectTimer); };
-  managerSocket.onmessage = ev => {
+function connectStream() {
+  if (streamSocket && streamSocket.readyState === WebSocket.OPEN) return;
+  streamSocket = new WebSocket(`ws://${location.host}/ws/stream`);
+  streamSocket.onopen = () => {
+    updateStatus(true);
+    console.log('Stream connected');
+    clearTimeout(reconnectTimer);
+    // 服务端默认推送全部曲线, 指定了曲线时只订阅这些
+    if (!selectAll) { sendStream({unsubscribe: '*'}); sendStream({subscribe: Array.from(selected)}); }
+  };
+  streamSocket.onmessage = ev => {
     try {
       const msg = JSON.parse(ev.data);
-      if (msg.event === 'task_list') { (msg.tasks || []).forEach(task => connectTask(task)); }
-      else if (msg.event === 'task_online') { connectTask(msg.task); }
-      else if (msg.event === 'task_offline') { disconnectTask(msg.task); }
-    } catch (e) { console.error('Error processing manager message:', e); }
+      if (msg.event === 'frame') {
+        (msg.points || []).forEach(([name, ts, value]) => { if (isSelected(name)) addPoint(name, ts, value); });
+        chart.update('none');
+      }
+      else if (msg.event === 'series_list') {
+        (msg.series || []).forEach(n => knownSeries.add(n));
+        updateTaskUI();
+        backfill(Array.from(knownSeries).filter(isSelected));
+      }
+      else if (msg.event === 'series_online') { knownSeries.add(msg.series); updateTaskUI(); }
+      else if (msg.event === 'series_offline') { knownSeries.delete(msg.series); removeDataset(msg.series); updateTaskUI(); }
+    } catch (e) { console.error('Error processing stream message:', e); }
   };
-  managerSocket.onclose = () => {
+  streamSocket.onclose = () => {
     updateStatus(false);
-    console.log('Manager disconnected, reconnecting in 3s...');
-    Object.keys(sockets).forEach(task => disconnectTask(task));
-    reconnectTimer = setTimeout(connectManager, 3000);
+    console.log('Stream disconnected, reconnecting in 3s...');
+    Object.keys(datasetIndex).forEach(name => removeDataset(name));
+    knownSeries.clear();
+    updateTaskUI();
+    reconnectTimer = setTimeout(connectStream, 3000);
   };
-  managerSocket.onerror = e => { console.error('Manager WebSocket error:', e); };
+  streamSocket.onerror = e => { console.error('Stream WebSocket error:', e); };
 }
 
 // controls wiring
 document.getElementById('smoothing_enabled').addEventListener('change', (e)=>{ smoothingParams.enabled = e.target.checked; applySmoothingToAll(); });
 
 // initial connect
-connectManager();
+connectStream();
 
 // heartbeat
-setInterval(()=>{ if (managerSocket && managerSocket.readyState === WebSocket.OPEN) managerSocket.send('ping'); }, 30000);
+setInterval(()=>{ if (streamSocket && streamSocket.readyState === WebSocket.OPEN) streamSocket.send('ping'); }, 30000);
 </script>
 </body>
 </html>
@@ -430,52 +458,36 @@ setInterval(()=>{ if (managerSocket && managerSocket.readyState === WebSocket.OP
         return HTMLResponse(html)
 
     # ---------------- WebSocket endpoints ----------------
-    async def _ws_manager(self, ws: WebSocket):
-        await self.manager.connect_ui(ws)
+    async def _ws_stream(self, ws: WebSocket):
+        await self.manager.connect(ws)
         try:
             while True:
-                # 接收心跳或其他消息
+                # 接收订阅消息或心跳
                 try:
                     data = await asyncio.wait_for(ws.receive_text(), timeout=60.0)
-                    if data == 'ping':
-                        # 可以回应pong，但这里简单忽略
-                        pass
                 except asyncio.TimeoutError:
                     # 发送心跳检查连接
                     try:
                         await ws.send_json({"event": "ping"})
                     except:
                         break
-        except WebSocketDisconnect:
-            pass
-        except Exception as e:
-            logger.warning(f"Manager WebSocket error: {e}")
-        finally:
-            await self.manager.disconnect_ui(ws)
-
-    async def _ws_task(self, ws: WebSocket, task: str):
-        # 验证任务是否存在
-        connected = await self.manager.connect_task_ws(task, ws)
-        if not connected:
-            return
-        
-        try:
-            while True:
-                # 保持连接打开，但设置超时
+                    continue
+                if data == 'ping':
+                    continue
                 try:
-                    await asyncio.wait_for(ws.receive_text(), timeout=60.0)
-                except asyncio.TimeoutError:
-                    # 检查连接是否仍然有效
-                    try:
-                        await ws.send_json({"ping": True})
-                    except:
-                        break
+                    msg = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                if "subscribe" in msg:
+                    await self.manager.subscribe(ws, msg["subscribe"])
+                if "unsubscribe" in msg:
+                    await self.manager.unsubscribe(ws, msg["unsubscribe"])
         except WebSocketDisconnect:
             pass
         except Exception as e:
-            logger.warning(f"Task WebSocket error for '{task}': {e}")
+            logger.warning(f"Stream WebSocket error: {e}")
         finally:
-            await self.manager.disconnect_task_ws(task, ws)
+            await self.manager.disconnect(ws)
 
     # ---------------- 对外接口（线程/进程安全） ----------------
     def start(self, background: bool = True):
@@ -541,7 +553,7 @@ setInterval(()=>{ if (managerSocket && managerSocket.readyState === WebSocket.OP
         
         try:
             fut = asyncio.run_coroutine_threadsafe(
-                self.manager.add_task(task), 
+                self.manager.add_series(task), 
                 self.loop
             )
             return fut.result(timeout=2.0)
@@ -556,7 +568,7 @@ setInterval(()=>{ if (managerSocket && managerSocket.readyState === WebSocket.OP
         
         try:
             fut = asyncio.run_coroutine_threadsafe(
-                self.manager.remove_task(task), 
+                self.manager.remove_series(task), 
                 self.loop
             )
             return fut.result(timeout=2.0)
@@ -565,27 +577,29 @@ setInterval(()=>{ if (managerSocket && managerSocket.readyState === WebSocket.OP
             return False
 
     def push_value(self, task: str, ts: float, value: float):
-        """推送一条数据到该任务的所有前端订阅者（线程安全）。
+        """推送单条数据, 等价于只含一个点的 push_values。"""
+        self.push_values([(task, ts, value)])
+
+    def push_values(self, points: list):
+        """把一个 tick 内所有曲线的数据作为一帧推送给订阅者（线程安全）。
         
         Args:
-            task: 任务名称
-            ts: 时间戳（秒）
-            value: 数值（如帧率）
+            points: [(曲线名, 时间戳（秒）, 数值（如帧率）), ...]
         """
+        if not points:
+            return
+        self.history.record(points)
         if self.loop is None:
             raise RuntimeError("Server not running")
         
         try:
             # 不等待结果以提高性能
             asyncio.run_coroutine_threadsafe(
-                self.manager.send_to_task_clients(
-                    task, 
-                    {"task": task, "ts": ts, "value": value}
-                ),
+                self.manager.publish([list(p) for p in points]),
                 self.loop
             )
         except Exception as e:
-            logger.error(f"Failed to push value for task '{task}': {e}")
+            logger.error(f"Failed to push frame: {e}")
 
     def get_tasks(self) -> list:
         """获取当前所有任务列表（线程安全）。"""
@@ -594,7 +608,7 @@ setInterval(()=>{ if (managerSocket && managerSocket.readyState === WebSocket.OP
         
         try:
             fut = asyncio.run_coroutine_threadsafe(
-                self.manager.get_tasks(),
+                self.manager.get_series(),
                 self.loop
             )
             return fut.result(timeout=1.0)
@@ -614,7 +628,7 @@ if __name__ == "__main__":
     print("Press Ctrl+C to stop...")
     
     # 模拟数据推送
-    tasks = ["yolo", "BFS"]
+    tasks = ["GPU/yolo", "CPU/yolo", "CPU/BFS"]
     
     try:
         # 添加任务
@@ -624,10 +638,9 @@ if __name__ == "__main__":
         
         # 持续推送数据
         while True:
-            for task in tasks:
-                # 模拟帧率数据（20-60 FPS之间波动）
-                fps = 40 + 20 * math.sin(time.time()) + random.uniform(-5, 5)
-                server.push_value(task, time.time(), fps)
+            # 模拟帧率数据（20-60 FPS之间波动）
+            now = time.time()
+            server.push_values([(task, now, 40 + 20 * math.sin(now) + random.uniform(-5, 5)) for task in tasks])
             
             time.sleep(0.1)  # 10Hz更新频率
             
@@ -3,15 +3,33 @@ from device.devicePool import Device
 from tasks.task import Task
 import threading
 import time
-from schedule.plot import device_port, TaskPlotServer
+from schedule.plot import plot_port, TaskPlotServer
+from schedule.interference import InterferenceModel
+from schedule.metrics import MetricsRegistry, render
+from schedule.dag import place_dag
 
 lock = threading.Lock()
 
 class Scheduler:
-    devs = []
-    is_dynamic = 0
-    task_counter = {}# {task_type: num}
-    best_strategy = {} # {task_type: list[dev.DeviceType]}
+    modes = ["static", "dynamic", "balance"]
+    
+    def __init__(self):
+        # 状态都放在实例上, 基准测试可以单独建调度器而不影响 RPC 服务里的那个
+        self.devs = []
+        self.mode = "static"
+        self.task_counter = {}# {task_type: num}
+        self.task_volume = {}# {task_type: expected request num}
+        self.best_strategy = {} # {task_type: list[dev.DeviceType]}
+        self.interference = InterferenceModel()
+        self.metrics = MetricsRegistry()
+        self.metrics.describe("sch_strategy_solve_seconds", "histogram", "Time spent computing a new strategy.")
+        self.metrics.describe("sch_active_task_types", "gauge", "Clients currently running each task type.")
+        self.client_metrics = {} # {client_id: (last push time, snapshot)}
+        self.metrics_ttl = 60.0 # 超过这么久没推送的客户端视为已退出, 不再导出它的指标
+        self.profile_requests = {} # {task_type: {dev_type: num}}
+        self.profiles = {} # {"task_type/dev_type": report}
+        self.dags = {} # {name: {"stages": {stage: [parents]}, "bytes": {(src, dst): bytes}}}
+        self.dag_placement = {} # {name: {stage: dev_type}}, 设备能力或中间结果大小变化时重算
     
     def addDev(self, dev:Device):
         self.devs.append(dev)
@@ -20,8 +38,69 @@ class Scheduler:
         for device in self.devs:
             if device.DeviceType == dev:
                 device.add_ability(task_type, affinity, ir_type, so_path)
+        self.dag_placement.clear()
+
+    def report_fps(self, dev:str, task_type:str, fps:float, busy:float = 0.0):
+        # 客户端回报的实测帧率和设备忙碌占比, 帧率用于画图, 设备跑满时的帧率用来学习共置减速
+        for device in self.devs:
+            if device.DeviceType != dev or task_type not in device.task_type:
+                continue
+            index = device.task_type.index(task_type)
+            device.task_fps[index] = [time.time(), fps]
+            self.interference.observe(dev, task_type, device.task_type, fps, busy)
+
+    def push_metrics(self, client:str, snapshot:dict):
+        self.client_metrics[client] = (time.time(), snapshot)
+    
+    def render_metrics(self) -> str:
+        metrics = self.metrics
+        # 已经结束的任务类型不能留着最后一次的值
+        metrics.clear("sch_active_task_types")
+        for task_type, num in list(self.task_counter.items()):
+            metrics.set("sch_active_task_types", num, task_type=task_type)
+        now = time.time()
+        for client, (pushed, _) in list(self.client_metrics.items()):
+            if now - pushed > self.metrics_ttl:
+                self.client_metrics.pop(client, None)
+        snapshots = [({}, metrics.snapshot())]
+        snapshots += [({"client": client}, snap) for client, (_, snap) in list(self.client_metrics.items())]
+        return render(snapshots)
+    
+    def request_profile(self, task_type:str, dev:str, num:int):
+        self.profile_requests.setdefault(task_type, {})[dev] = num
+    
+    def get_profile_request(self, task_type:str):
+        return self.profile_requests.pop(task_type, {})
     
-    def increase_task(self, task_type:str):
+    def put_profile(self, task_type:str, dev:str, report:dict):
+        self.profiles[f"{task_type}/{dev}"] = report
+        if report.get("error"):
+            print(f"[Scheduler] profile of {task_type} on {dev} failed: {report['error']}")
+            return
+        print(f"[Scheduler] profile of {task_type} on {dev}, {report['requests']} requests:")
+        for op in report["operators"][:10]:
+            print(f"  {op['percent']:6.2f}%  {op['mean_us']:10.1f} us  {op['name']}")
+    
+    def register_dag(self, name:str, stages:dict):
+        self.dags[name] = {"stages": dict(stages), "bytes": {}}
+        self.dag_placement.pop(name, None)
+    
+    def set_dag_bytes(self, name:str, edge_bytes:dict):
+        # 客户端实测的中间结果大小, 用来重新估计搬运开销
+        self.dags[name]["bytes"] = dict(edge_bytes)
+        self.dag_placement.pop(name, None)
+    
+    def get_dag_placement(self, name:str):
+        if name not in self.dag_placement:
+            dag = self.dags[name]
+            placement, cost = place_dag(dag["stages"], dag["bytes"], self.devs)
+            print(f"[Scheduler] place {name}: " + ", ".join(f"{stage}->{dev}" for stage, dev in placement.items())
+                  + f", estimated {cost*1e3:.2f} ms")
+            self.dag_placement[name] = placement
+        return self.dag_placement[name]
+    
+    def increase_task(self, task_type:str, volume:int = 0):
+        self.task_volume[task_type] = self.task_volume.get(task_type, 0) + volume
         if task_type in self.task_counter:
             self.task_counter[task_type] += 1
         else:
@@ -29,16 +108,22 @@ class Scheduler:
             self.on_event("new_task_type")
         
         
-    def decrease_task(self, task_type:str):
+    def decrease_task(self, task_type:str, volume:int = 0):
         self.task_counter[task_type] -= 1
+        self.task_volume[task_type] = max(self.task_volume.get(task_type, 0) - volume, 0)
         if self.task_counter[task_type] == 0:
-            self.on_event("Algorithm_done")
             self.task_counter.pop(task_type)
+            self.task_volume.pop(task_type, None)
+            self.on_event("Algorithm_done")
     
-    def switch_mode(self):
-        mode = self.is_dynamic
-        mode = 1 - mode
-        self.is_dynamic = mode
+    def switch_mode(self, mode:str = None):
+        # 不指定模式时按 static -> dynamic -> balance 轮换
+        if mode is None:
+            index = self.modes.index(self.mode)
+            mode = self.modes[(index + 1) % len(self.modes)]
+        if mode not in self.modes:
+            raise ValueError(f"mode must be one of the following: {', '.join(self.modes)}")
+        self.mode = mode
         self.on_event("switch")
     
     def on_event(self, event_kind):
@@ -54,6 +139,7 @@ class Scheduler:
                 
     def find_dynamic_strategy(self, task_kinds:list, devices:list):
         max_power = 0
+        best_strategy = None
         device_combinations = [()]
         for num_devices in range(1, len(devices) + 1):
             device_combinations.extend(combinations(devices, num_devices))
@@ -70,12 +156,7 @@ class Scheduler:
                             device.task_type.append(task)
                     compute_power = 0
                     for dev in devices:
-                        equivalent_power = 0
-                        if not dev.task_type:
-                            continue
-                        for task in dev.task_type:
-                            equivalent_power += dev.ComputePower*dev.ability[task].affinity
-                        dev.equivalent_power = equivalent_power/len(dev.task_type)
+                        dev.equivalent_power = self.equivalent_power(dev)
                         compute_power += dev.equivalent_power
                     if compute_power > max_power:
                         max_power = compute_power
@@ -105,18 +186,73 @@ class Scheduler:
                     best_device = dev
             best_strategy.append((task_str, [best_device]))
         return best_strategy
+    
+    def find_balance_strategy(self, task_kinds:list, devices:list):
+        # LPT: 按预计工作量从大到小排序, 每个任务放到完成时间最早的设备上
+        for dev in devices:
+            dev.task_type = []
+        load = {dev: 0.0 for dev in devices}
+        volume = {task: self.task_volume.get(task) or 1 for task in task_kinds}
+        # affinity 为 0 的设备跑不了该任务
+        capable = {task: [dev for dev in devices if task in dev.ability and Scheduler.task_power(dev, task) > 0]
+                   for task in task_kinds}
+        cost = {} # {(task, dev): 该任务在 dev 上占用的时间}
+        
+        def work(task):
+            powers = [Scheduler.task_power(dev, task) for dev in capable[task]]
+            return volume[task] / max(powers) if powers else 0
+        
+        assignment = {task: [] for task in task_kinds}
+        order = sorted((task for task in task_kinds if capable[task]), key=work, reverse=True)
+        for task in order:
+            best_device = min(capable[task], key=lambda dev: load[dev] + volume[task] / Scheduler.task_power(dev, task))
+            cost[(task, best_device)] = volume[task] / Scheduler.task_power(best_device, task)
+            load[best_device] += cost[(task, best_device)]
+            assignment[task].append(best_device)
+        
+        # 空闲设备分担负载最重设备上的任务, runTask 会在策略内的空闲设备间分流
+        for dev in devices:
+            if load[dev] > 0:
+                continue
+            candidates = [task for task in order if dev in capable[task]]
+            if not candidates:
+                continue
+            task = max(candidates, key=lambda t: load[assignment[t][0]])
+            assignment[task].append(dev)
+            total_power = sum(Scheduler.task_power(d, task) for d in assignment[task])
+            for d in assignment[task]:
+                # 按算力分流, d 分到 volume * power / total_power 的请求
+                power = Scheduler.task_power(d, task)
+                share = volume[task] * power / total_power
+                load[d] += share / power - cost.get((task, d), 0.0)
+                cost[(task, d)] = share / power
+        # 没有设备能跑的任务不出现在策略里, 和 find_best_strategy 的过滤一致
+        return [(task, assignment[task]) for task in task_kinds if assignment[task]]
         
     def find_best_strategy(self, task_kinds:list):
         devices = self.devs
         best_strategy = None
+        # 没有设备能跑的任务不参与求解, 否则 dynamic 找不到合理分配, 其余模式会给它空设备列表
+        runnable = [task for task in task_kinds
+                    if any(task in dev.ability and Scheduler.task_power(dev, task) > 0 for dev in devices)]
+        for task in task_kinds:
+            if task not in runnable:
+                print(f"[Scheduler] 没有设备能运行任务 {task}, 不为它分配设备")
+        task_kinds = runnable
         if not task_kinds:
+            self.best_strategy = {}
             for dev in devices:
                 dev.task_type = []
             return
-        if self.is_dynamic:
+        solve_start = time.time()
+        if self.mode == "dynamic":
             best_strategy = self.find_dynamic_strategy(task_kinds, devices)
+        elif self.mode == "balance":
+            best_strategy = self.find_balance_strategy(task_kinds, devices)
         else:
             best_strategy = self.find_static_strategy(task_kinds, devices)
+        best_strategy = best_strategy or []
+        self.metrics.observe("sch_strategy_solve_seconds", time.time() - solve_start, mode=self.mode)
         
         for dev in devices:
             dev.task_type = []
@@ -131,53 +267,35 @@ class Scheduler:
                 device.task_fps.append([start_time, 0])
         self.best_strategy = new_best_strategy
         for dev in devices:
-            equivalent_power = 0
-            if not dev.task_type:
-                dev.equivalent_power = 0
-                continue
-            for task in dev.task_type:
-                equivalent_power += dev.ComputePower*dev.ability[task].affinity
-            dev.equivalent_power = equivalent_power/len(dev.task_type)
+            dev.equivalent_power = self.equivalent_power(dev)
         
-    def start_plot(self):
-        dev_plots = {} # dev_type: plotter
-        dev_job = {} # task_type: fps
-        dev_fps = {} # dev_type: dev_job
-        for dev in self.devs:
-            dev_type = dev.DeviceType
-            if dev_type not in dev_plots:
-                device_plot = TaskPlotServer(host="127.0.0.1", port=device_port[dev_type])
-                dev_plots[dev_type] = device_plot
-                dev_fps[dev_type] = {}
-                device_plot.start(background=True)
+    def start_plot(self, port:int = plot_port):
+        # 所有设备共用一个画图服务, 曲线名为 "设备/任务", 每个 tick 推送一帧
+        plotter = TaskPlotServer(host="127.0.0.1", port=port, metrics_provider=self.render_metrics)
+        plotter.app.get("/profile")(lambda: {"profiles": sorted(self.profiles)})
+        plotter.app.get("/profile/{task_type}/{dev}")(
+            lambda task_type, dev: self.profiles.get(f"{task_type}/{dev}", {"error": "no profile"}))
+        plotter.start(background=True)
+        self.plotter = plotter
         
         def keep_plot():
-            begin_time = time.time()
+            series = set()
             while(1):
-                dev_new_jobs = {} # dev_type: set[job_kinds]
-                for dev_type in dev_fps:
-                    dev_job = dev_fps[dev_type]
-                    dev_job = {key: 0 for key in dev_job}
-                    dev_fps[dev_type] = dev_job
+                dev_fps = {} # "dev_type/task_type": fps
                 for dev in self.devs:
-                    dev_type = dev.DeviceType
-                    if dev_type not in dev_new_jobs:
-                        dev_new_jobs[dev_type] = set()
+                    task_fps = dev.task_fps
                     for index, task_type in enumerate(dev.task_type):
-                        if task_type not in dev_fps[dev_type]:
-                            dev_plots[dev_type].add_task(task_type)
-                            dev_fps[dev_type][task_type] = 0
-                        dev_new_jobs[dev_type].add(task_type)
-                        fps = dev.task_fps[index][1]
-                        dev_fps[dev_type][task_type] += fps
-                for dev_type, plotter in dev_plots.items():
-                    for dev_job in list(dev_fps[dev_type]):
-                        if dev_job not in dev_new_jobs[dev_type]:
-                            dev_fps[dev_type].pop(dev_job)
-                            plotter.remove_task(dev_job)
-                    for job_type, fps in dev_fps[dev_type].items():
-                        cur_time = time.time() - begin_time
-                        plotter.push_value(job_type, cur_time, fps)
+                        if index >= len(task_fps):
+                            break
+                        name = f"{dev.DeviceType}/{task_type}"
+                        dev_fps[name] = dev_fps.get(name, 0) + task_fps[index][1]
+                for name in series - dev_fps.keys():
+                    plotter.remove_task(name)
+                for name in dev_fps.keys() - series:
+                    plotter.add_task(name)
+                series = set(dev_fps)
+                cur_time = time.time()
+                plotter.push_values([(name, cur_time, fps) for name, fps in dev_fps.items()])
                 time.sleep(0.1)
 
         t = threading.Thread(target=keep_plot)
@@ -186,14 +304,31 @@ class Scheduler:
     def listen_command(self):
         def keep_listen():
             while(1):
-                command = input("#")
-                if command == "switch":
-                    if self.is_dynamic:
-                        print("use static schedule")
-                    else:
-                        print("use dynamic schedule")
-                    self.switch_mode()
-                elif command == "exit":
+                command = input("#").split()
+                if not command:
+                    continue
+                if command[0] == "switch":
+                    mode = command[1] if len(command) > 1 else None
+                    try:
+                        self.switch_mode(mode)
+                    except ValueError as e:
+                        print(e)
+                        continue
+                    print(f"use {self.mode} schedule")
+                elif command[0] == "profile":
+                    # profile <task_type> <dev_type> [N]: 下 N 个该任务在该设备上的请求走 profiler
+                    try:
+                        num = int(command[3]) if len(command) > 3 else 20
+                    except ValueError:
+                        num = 0
+                    if len(command) < 3 or num <= 0:
+                        print("usage: profile <task_type> <dev_type> [N]")
+                        continue
+                    self.request_profile(command[1], command[2], num)
+                    print(f"profiling next {num} {command[1]} requests on {command[2]}")
+                elif command[0] == "interference":
+                    print(self.interference.dump())
+                elif command[0] == "exit":
                     break
                 else:
                     print("Invalid command.")
@@ -201,9 +336,26 @@ class Scheduler:
         t = threading.Thread(target=keep_listen)
         t.start()
     
+    def equivalent_power(self, dev:Device):
+        # k 个任务平分设备, 再按学到的共置减速矩阵打折
+        if not dev.task_type:
+            return 0
+        equivalent_power = 0
+        for task in dev.task_type:
+            slowdown = self.interference.factor(dev.DeviceType, task, dev.task_type)
+            equivalent_power += Scheduler.task_power(dev, task) / slowdown
+        return equivalent_power/len(dev.task_type)
+    
+    @staticmethod
+    def task_power(dev:Device, task_type:str):
+        return dev.ComputePower*dev.ability[task_type].affinity
+    
     @staticmethod
     def is_rational(strategy):
         for task, assigned_devices in strategy:
+            # 没有分到设备的任务在 runTask 里会一直等待
+            if not assigned_devices:
+                return False
             for device in assigned_devices:
                 ability = list(device.ability.keys())
                 if task not in ability:
@@ -0,0 +1,262 @@
+"""
+离散事件模拟器: 用模拟设备和合成的到达序列驱动真实的 Scheduler 策略, 几秒内比较多种调度模式。
+设备的延迟分布来自配置或 profile 报告, 派发和客户端 _acquire 共用 schedule/dispatch.py 的 pick_free:
+请求按策略顺序占用第一个空闲设备, 没有空闲设备时排队, 设备空闲后排队最久的请求先重新选设备。
+使用示例 (在 sch/ 目录下)：
+  python -m schedule.simulator sim.json --modes static,dynamic,balance
+sim.json:
+  {"devices": {"GPU": {"compute_power": 500, "latency": {"yolo": {"dist": "lognormal", "mean": 0.01, "cv": 0.2}}},
+               "CPU": {"compute_power": 40, "latency": {"yolo": 0.08}}},
+   "workload": {"duration": 60, "rates": {"yolo": 80}}}
+"""
+import heapq
+import json
+import math
+import random
+import time
+from collections import deque
+from device.devicePool import Device
+from schedule.scheduler import Scheduler
+from schedule.dispatch import pick_free
+
+
+class LatencyModel:
+    """单个 (设备, 任务) 的服务时间分布, 单位秒。dist 为 const / exp / lognormal / empirical。"""
+
+    def __init__(self, dist: str = "lognormal", mean: float = 0.01, cv: float = 0.2, samples: list = None):
+        if dist not in ("const", "exp", "lognormal", "empirical"):
+            raise ValueError("dist must be one of the following: const, exp, lognormal, empirical")
+        if dist == "empirical" and not samples:
+            raise ValueError("empirical latency needs samples")
+        self.dist = dist
+        self.samples = list(samples) if samples else None
+        self.mean = sum(self.samples) / len(self.samples) if self.samples else mean
+        self.cv = cv
+        # lognormal 按均值和变异系数换算参数
+        self._sigma = math.sqrt(math.log(1 + cv * cv))
+        self._mu = math.log(self.mean) - self._sigma ** 2 / 2 if self.mean > 0 else 0
+
+    @classmethod
+    def from_config(cls, config):
+        # 纯数字表示固定延迟, 列表表示实测样本
+        if isinstance(config, (int, float)):
+            return cls("const", mean=float(config))
+        if isinstance(config, list):
+            return cls("empirical", samples=config)
+        return cls(config.get("dist", "lognormal"), config.get("mean", 0.01), config.get("cv", 0.2),
+                   config.get("samples"))
+
+    @classmethod
+    def from_profile(cls, report: dict, cv: float = 0.1):
+        """用 profileTask / put_profile 的算子报告估计单次请求耗时。"""
+        mean = sum(op["mean_us"] for op in report["operators"]) / 1e6
+        return cls("lognormal", mean=mean, cv=cv)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.dist == "const":
+            return self.mean
+        if self.dist == "exp":
+            return rng.expovariate(1 / self.mean)
+        if self.dist == "empirical":
+            return rng.choice(self.samples)
+        return rng.lognormvariate(self._mu, self._sigma)
+
+
+class SimDevice(Device):
+    def __init__(self, name: str, compute_power: float, latency: dict, affinity: dict = None):
+        super().__init__(0)
+        self.DeviceType = name
+        self.ComputePower = compute_power
+        self.latency = {task: LatencyModel.from_config(model) if not isinstance(model, LatencyModel) else model
+                        for task, model in latency.items()}
+        affinity = affinity or {}
+        for task, model in self.latency.items():
+            # 没给 affinity 时按实际吞吐换算, 使 ComputePower*affinity 等于每秒请求数
+            value = affinity.get(task, 1 / (model.mean * compute_power) if model.mean > 0 else 1.0)
+            self.add_ability(task, value, "sim", "")
+
+    def service_time(self, task_type: str, rng: random.Random) -> float:
+        return self.latency[task_type].sample(rng)
+
+
+def poisson_trace(rates: dict, duration: float, seed: int = 0) -> list:
+    """按各任务的到达率 (每秒请求数) 生成 [(time, task_type)], 按时间排序。"""
+    rng = random.Random(seed)
+    trace = []
+    for task_type, rate in rates.items():
+        if rate <= 0:
+            continue
+        t = rng.expovariate(rate)
+        while t < duration:
+            trace.append((t, task_type))
+            t += rng.expovariate(rate)
+    trace.sort()
+    return trace
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    index = min(int(len(values) * p / 100), len(values) - 1)
+    return values[index]
+
+
+def _summary(values: list) -> dict:
+    values = sorted(values)
+    return {"mean": sum(values) / len(values) if values else 0.0,
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1] if values else 0.0}
+
+
+class Simulator:
+    """
+    每个模拟对应一个独立的 Scheduler 实例, 任务第一次到达时加入调度, 最后一个请求完成后退出,
+    每次变化都调用真实的 find_best_strategy 重新求解, 新策略立即作用于之后的派发。
+    """
+
+    def __init__(self, devices: dict, mode: str = "static", seed: int = 0):
+        if mode not in Scheduler.modes:
+            raise ValueError(f"mode must be one of the following: {', '.join(Scheduler.modes)}")
+        self.sched = Scheduler()
+        self.sched.mode = mode
+        self.seed = seed
+        for name, config in devices.items():
+            if isinstance(config, SimDevice):
+                self.sched.addDev(config)
+            else:
+                self.sched.addDev(SimDevice(name, config.get("compute_power", 1.0), config["latency"],
+                                            config.get("affinity")))
+        self.devices = {dev.DeviceType: dev for dev in self.sched.devs}
+
+    def _resolve(self):
+        start = time.perf_counter()
+        self.sched.find_best_strategy(list(self.sched.task_counter.keys()))
+        self.solve_time += time.perf_counter() - start
+        self.solves += 1
+
+    def run(self, trace: list) -> dict:
+        """trace: [(arrival_time, task_type)], 返回吞吐, 延迟分位数和设备利用率。"""
+        sched = self.sched
+        rng = random.Random(self.seed)
+        sched.task_counter.clear()
+        sched.task_volume.clear()
+        sched.best_strategy = {}
+        self.solve_time = 0.0
+        self.solves = 0
+
+        total = {} # {task_type: 请求总数}
+        for _, task_type in trace:
+            total[task_type] = total.get(task_type, 0) + 1
+        arrived = {task_type: 0 for task_type in total}
+        finished = {task_type: 0 for task_type in total}
+        waiting = {task_type: deque() for task_type in total} # 排队中的到达时间
+        free = {name: 1 for name in self.devices} # {device: 空闲 slot 数}, 和客户端的 dev_state 一样
+        busy = {name: 0.0 for name in self.devices}
+        latency = {task_type: [] for task_type in total}
+        queue_wait = []
+
+        events = [] # (time, seq, kind, payload)
+        seq = 0
+        for t, task_type in trace:
+            events.append((t, seq, "arrive", task_type))
+            seq += 1
+        heapq.heapify(events)
+
+        def start(now, name, task_type, arrival):
+            nonlocal seq
+            free[name] -= 1
+            service = self.devices[name].service_time(task_type, rng)
+            busy[name] += service
+            queue_wait.append(now - arrival)
+            heapq.heappush(events, (now + service, seq, "done", (name, task_type, arrival)))
+            seq += 1
+
+        def dispatch(now):
+            # 设备空闲或策略变化后, 排队的请求按等待时间从长到短重新选设备, 直到没有请求能开始
+            while True:
+                for task_type in sorted((t for t, queue in waiting.items() if queue), key=lambda t: waiting[t][0]):
+                    name = pick_free(sched.best_strategy.get(task_type, ()), free)
+                    if name is not None:
+                        start(now, name, task_type, waiting[task_type].popleft())
+                        break
+                else:
+                    return
+
+        now = 0.0
+        while events:
+            now, _, kind, payload = heapq.heappop(events)
+            if kind == "arrive":
+                task_type = payload
+                arrived[task_type] += 1
+                if arrived[task_type] == 1:
+                    sched.task_counter[task_type] = 1
+                    sched.task_volume[task_type] = total[task_type]
+                    self._resolve()
+                    dispatch(now)
+                name = pick_free(sched.best_strategy.get(task_type, ()), free) if not waiting[task_type] else None
+                if name is not None:
+                    start(now, name, task_type, now)
+                else:
+                    waiting[task_type].append(now)
+            else:
+                name, task_type, arrival = payload
+                free[name] += 1
+                latency[task_type].append(now - arrival)
+                finished[task_type] += 1
+                if finished[task_type] == total[task_type]:
+                    sched.task_counter.pop(task_type, None)
+                    sched.task_volume.pop(task_type, None)
+                    self._resolve()
+                dispatch(now)
+
+        makespan = now if trace else 0.0
+        completed = sum(finished.values())
+        all_latency = [value for values in latency.values() for value in values]
+        return {"mode": sched.mode,
+                "requests": len(trace),
+                "completed": completed,
+                "makespan": makespan,
+                "throughput": completed / makespan if makespan > 0 else 0.0,
+                "latency": _summary(all_latency),
+                "queue_wait": _summary(queue_wait),
+                "per_task": {task_type: {"completed": finished[task_type],
+                                         "throughput": finished[task_type] / makespan if makespan > 0 else 0.0,
+                                         **_summary(latency[task_type])}
+                             for task_type in total},
+                "utilization": {name: busy[name] / makespan if makespan > 0 else 0.0 for name in self.devices},
+                "solves": self.solves,
+                "solve_seconds": self.solve_time}
+
+
+def compare(devices: dict, trace: list, modes: list = None, seed: int = 0) -> dict:
+    """用同一组设备和到达序列分别跑各调度模式, 返回 {mode: report}。"""
+    return {mode: Simulator(devices, mode, seed).run(trace) for mode in (modes or Scheduler.modes)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate scheduling policies on synthetic workloads")
+    parser.add_argument("config", help="JSON with devices and workload")
+    parser.add_argument("--modes", default=",".join(Scheduler.modes))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    workload = config["workload"]
+    if "trace" in workload:
+        trace = sorted((t, task_type) for t, task_type in workload["trace"])
+    else:
+        trace = poisson_trace(workload["rates"], workload["duration"], args.seed)
+    reports = compare(config["devices"], trace, args.modes.split(","), args.seed)
+    for mode, report in reports.items():
+        print(f"{mode:<8} {report['throughput']:10.1f}/s  p50 {report['latency']['p50']*1e3:8.2f} ms  "
+              f"p99 {report['latency']['p99']*1e3:8.2f} ms  util "
+              + " ".join(f"{name}={value:.2f}" for name, value in report["utilization"].items()))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import deque
+
+
+class AdmissionRejected(Exception):
+    """请求在准入队列满时被拒绝或被挤掉。"""
+
+
+class _Ticket:
+    __slots__ = ("future", "shed", "created")
+
+    def __init__(self):
+        self.future = None
+        self.shed = False
+        self.created = time.time()
+
+
+class AdmissionQueue:
+    """
+    有界准入队列: 记录已提交但还没被 worker 取走的请求。
+    队列满时按 policy 处理新请求:
+      block       生产者阻塞, 直到有 worker 取走请求
+      reject      直接抛出 AdmissionRejected
+      shed_oldest 丢弃最早排队的请求, 接收新请求
+    """
+    POLICIES = {"block", "reject", "shed_oldest"}
+
+    def __init__(self, limit: int = 64, policy: str = "block"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of the following: {', '.join(self.POLICIES)}")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        self.limit = limit
+        self.policy = policy
+        self.rejected = 0
+        self.shed = 0
+        self._pending = deque()
+        self._cond = threading.Condition()
+
+    def admit(self) -> _Ticket:
+        with self._cond:
+            while len(self._pending) >= self.limit:
+                if self.policy == "block":
+                    self._cond.wait()
+                elif self.policy == "reject":
+                    self.rejected += 1
+                    raise AdmissionRejected(f"admission queue full (limit {self.limit})")
+                else:
+                    oldest = self._pending.popleft()
+                    oldest.shed = True
+                    self.shed += 1
+                    if oldest.future is not None:
+                        oldest.future.cancel()
+            ticket = _Ticket()
+            self._pending.append(ticket)
+            return ticket
+
+    def attach(self, ticket: _Ticket, future):
+        with self._cond:
+            ticket.future = future
+            if ticket.shed:
+                future.cancel()
+
+    def start(self, ticket: _Ticket) -> bool:
+        """worker 开始处理请求时调用, 返回 False 表示该请求已被挤掉。"""
+        with self._cond:
+            if ticket.shed:
+                return False
+            self._pending.remove(ticket)
+            self._cond.notify_all()
+            return True
+
+    def depth(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,47 @@
+import math
+import numpy as np
+
+
+def bucket_name(task_type: str, shape) -> str:
+    return f"{task_type}@{'x'.join(str(dim) for dim in shape)}"
+
+
+def sort_buckets(buckets) -> list:
+    # 从小到大排, 选桶时取第一个放得下的
+    return sorted((tuple(int(dim) for dim in bucket) for bucket in buckets), key=lambda shape: (math.prod(shape), shape))
+
+
+def select_bucket(buckets: list, shape) -> tuple:
+    """返回每一维都放得下 shape 的最小的桶; 都放不下时报错, 不悄悄裁掉输入 (大图用 runTiled 切块)。"""
+    for bucket in buckets:
+        if len(bucket) == len(shape) and all(dim <= limit for dim, limit in zip(shape, bucket)):
+            return bucket
+    raise ValueError(f"input shape {tuple(shape)} does not fit any bucket, the largest is {buckets[-1]}; "
+                     "use runTiled for larger inputs")
+
+
+def fit_to_shape(x: np.ndarray, shape, pad_value: float = 0.0) -> np.ndarray:
+    # 从左上角裁剪或在右下补边, 检测框坐标不受影响
+    shape = tuple(shape)
+    x = x[tuple(slice(0, min(dim, limit)) for dim, limit in zip(x.shape, shape))]
+    if x.shape == shape:
+        return np.ascontiguousarray(x)
+    out = np.full(shape, pad_value, dtype=x.dtype)
+    out[tuple(slice(0, dim) for dim in x.shape)] = x
+    return out
+
+
+def restore_output(output, in_shape, bucket):
+    """
+    撤销补边/裁剪: 输出最后两维 (H, W) 和桶的空间尺寸成比例时 (分割图, 增强后的图像),
+    按同样比例裁回原输入对应的区域; 其他输出 (检测框等) 原样返回。
+    """
+    if not isinstance(output, np.ndarray) or output.ndim < 2 or len(bucket) < 2:
+        return output
+    out_h, out_w = output.shape[-2:]
+    bucket_h, bucket_w = bucket[-2:]
+    if out_h * bucket_w != out_w * bucket_h or out_h % bucket_h and bucket_h % out_h:
+        return output
+    ratio = out_h / bucket_h
+    target = output.shape[:-2] + (round(in_shape[-2] * ratio), round(in_shape[-1] * ratio))
+    return fit_to_shape(output, target)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+
+class ConcurrencyLimiter:
+    """可在运行时调整上限的信号量, 限制同时执行的 worker 数。"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def resize(self, limit: int):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+
+class AIMDController:
+    """
+    AIMD 并发控制: 每个周期读取一次负载统计
+      设备利用率低于 target_util 且有请求在排队      -> 并发数 +1
+      worker 等设备的时间超过计算时间的 wait_ratio 倍 -> 并发数 *backoff
+    sample() 返回该周期内的 util, dev_wait, compute, backlog。
+    """
+
+    def __init__(self, limiter: ConcurrencyLimiter, sample, min_limit: int = 1, max_limit: int = 64,
+                 interval: float = 0.5, target_util: float = 0.9, wait_ratio: float = 2.0, backoff: float = 0.8):
+        self.limiter = limiter
+        self.sample = sample
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.interval = interval
+        self.target_util = target_util
+        self.wait_ratio = wait_ratio
+        self.backoff = backoff
+        self.history = [] # [(time, limit)]
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def step(self, stats: dict) -> int:
+        limit = self.limiter.limit
+        if stats["dev_wait"] > stats["compute"] * self.wait_ratio and stats["dev_wait"] > 0:
+            limit = int(limit * self.backoff)
+        elif stats["util"] < self.target_util and stats["backlog"] > 0:
+            limit += 1
+        limit = max(self.min_limit, min(self.max_limit, limit))
+        if limit != self.limiter.limit:
+            self.limiter.resize(limit)
+            self.history.append((time.time(), limit))
+        return limit
+
+    def start(self):
+        # 多个 runTaskMultiThread 并发调用时只起一个控制线程
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+
+            def _loop():
+                while not self._stop.wait(self.interval):
+                    self.step(self.sample())
+
+            self._thread = threading.Thread(target=_loop, daemon=True, name="aimd-controller")
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread and thread is not threading.current_thread():
+            thread.join()
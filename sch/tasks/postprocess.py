@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class BatchPostprocessor:
+    """
+    把并发请求的模型输出攒成批, 在 CPU worker 线程上整批后处理, 设备不用等后处理就能接下一个请求。
+    fn(outputs: list) 返回和 outputs 等长的结果列表; 攒够 max_batch 个或第一个等了 max_delay 秒就开跑。
+    使用示例：
+      post = BatchPostprocessor(yolo.postprocess, max_batch=32)
+      dets = post.submit(raw_output).result()
+    """
+
+    def __init__(self, fn, max_batch: int = 32, max_delay: float = 0.002, workers: int = 2):
+        if max_batch < 1:
+            raise ValueError("max_batch must be positive")
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = {"batches": 0, "frames": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="postprocess")
+        self._thread = threading.Thread(target=self._collect, daemon=True, name="postprocess-batcher")
+        self._thread.start()
+
+    def submit(self, output) -> Future:
+        future = Future()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((output, future))
+        if closed:
+            # 关闭后 (比如 setPostprocess 换了参数) 才提交的输出在调用线程里直接处理
+            self._run([(output, future)])
+        return future
+
+    def _collect(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch):
+        start = time.perf_counter()
+        try:
+            results = list(self.fn([output for output, _ in batch]))
+            if len(results) != len(batch):
+                # 对不上就没法知道哪个结果属于哪个请求, 整批都报错, 不能让多出来的请求永远等下去
+                raise ValueError(f"postprocess returned {len(results)} results for a batch of {len(batch)}")
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["frames"] += len(batch)
+            self.stats["seconds"] += time.perf_counter() - start
+
+    def close(self):
+        # 已经提交的输出会处理完
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["mean_batch"] = stats["frames"] / stats["batches"] if stats["batches"] else 0
+        return stats
@@ -0,0 +1,151 @@
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TRACE_VERSION = 1
+
+
+def _describe(inputs):
+    # 只记录形状和类型, 不保存输入数据
+    shape = getattr(inputs, "shape", None)
+    if shape is not None:
+        return [int(dim) for dim in shape], str(getattr(inputs, "dtype", ""))
+    if isinstance(inputs, (tuple, list)) and inputs:
+        return _describe(inputs[0])
+    return None, None
+
+
+class TraceRecorder:
+    """
+    把 TaskService 收到的请求记录成 gzip 压缩的 JSON lines。
+    第一行是头 {"version", "start"}, 之后每行一个请求：
+      {"t": 相对 start 的到达时间, "task": task_type, "shape": [...], "dtype": "float32",
+       "status": "ok" | "error" | "rejected", "latency": 秒, "device": "GPU"}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start = time.time()
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt")
+        self._file.write(json.dumps({"version": TRACE_VERSION, "start": self.start}) + "\n")
+
+    def record(self, arrival: float, task_type: str, inputs, status: str, latency: float = None, device: str = None):
+        shape, dtype = _describe(inputs)
+        entry = {"t": round(arrival - self.start, 6), "task": task_type, "shape": shape, "dtype": dtype,
+                 "status": status}
+        if latency is not None:
+            entry["latency"] = round(latency, 6)
+        if device is not None:
+            entry["device"] = device
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_trace(path: str):
+    """返回 (header, records), records 按到达时间排序。"""
+    with gzip.open(path, "rt") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version {header.get('version')}")
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda record: record["t"])
+    return header, records
+
+
+def _summary(values: list) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    pick = lambda p: values[min(int(len(values) * p / 100), len(values) - 1)]
+    return {"mean": sum(values) / len(values), "p50": pick(50), "p99": pick(99), "max": values[-1]}
+
+
+class TraceReplayer:
+    """
+    按录制时的到达时间开环回放: 请求按时间表发出, 不等前一个请求返回, 延迟从计划到达时间算起。
+    make_input(record) 返回该请求的输入, 默认按记录的形状和类型生成全零数组。
+    使用示例：
+      header, records = load_trace('trace.jsonl.gz')
+      stats = TraceReplayer(records, speed=2.0).replay(svc)
+    """
+
+    def __init__(self, records: list, make_input=None, speed: float = 1.0, max_inflight: int = 256):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.records = records
+        self.make_input = make_input or self._zeros
+        self.speed = speed
+        self.max_inflight = max_inflight
+        self._inputs = {}
+
+    def _zeros(self, record):
+        import numpy as np
+        key = (tuple(record["shape"] or ()), record["dtype"] or "float32")
+        if key not in self._inputs:
+            self._inputs[key] = np.zeros(key[0], dtype=key[1])
+        return self._inputs[key]
+
+    def replay(self, svc) -> dict:
+        """对 svc 回放, 未注册的任务类型跳过, 返回每个任务的完成数, 错误数, 延迟和发出滞后。"""
+        records = [record for record in self.records if record["task"] in svc.task_dict]
+        counts = {}
+        for record in records:
+            counts[record["task"]] = counts.get(record["task"], 0) + 1
+        for task_type, num in counts.items():
+            svc.expectRequests(task_type, num)
+        stats = {task_type: {"sent": 0, "completed": 0, "errors": 0, "latency": [], "lag": []}
+                 for task_type in counts}
+        lock = threading.Lock()
+
+        def call(record, scheduled, inputs):
+            status = "completed"
+            try:
+                svc.runTask(record["task"], inputs)
+            except Exception:
+                status = "errors"
+            latency = time.time() - scheduled
+            with lock:
+                stat = stats[record["task"]]
+                stat[status] += 1
+                stat["latency"].append(latency)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_inflight)
+        start = time.time()
+        try:
+            for record in records:
+                scheduled = start + record["t"] / self.speed
+                delay = scheduled - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                inputs = self.make_input(record)
+                stat = stats[record["task"]]
+                stat["sent"] += 1
+                stat["lag"].append(max(time.time() - scheduled, 0))
+                pool.submit(call, record, scheduled, inputs)
+            pool.shutdown(wait=True)
+        finally:
+            pool.shutdown(wait=False)
+            for task_type in counts:
+                svc.task_total.pop(task_type, None)
+        elapsed = time.time() - start
+        report = {"elapsed": elapsed, "skipped": len(self.records) - len(records), "tasks": {}}
+        for task_type, stat in stats.items():
+            report["tasks"][task_type] = {"sent": stat["sent"], "completed": stat["completed"],
+                                          "errors": stat["errors"],
+                                          "throughput": stat["completed"] / elapsed if elapsed > 0 else 0,
+                                          "latency": _summary(stat["latency"]), "lag": _summary(stat["lag"])}
+        return report
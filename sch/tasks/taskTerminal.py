@@ -3,23 +3,31 @@ import json
 from taskqueue import TaskQueue
 
 
-file_path = "./tasks/taskqueue.json"
-
-if os.path.exists(file_path):
-        os.remove(file_path)
-with open(file_path, "w") as file:
-    pass
+file_path = "./tasks/taskqueue.db"
 
+# 队列保存在 SQLite 里, 重启后接着用之前没做完的任务
 task_queue = TaskQueue(file_path)
 while(1):
-    command = input("#")
-    if command == "add":
+    command = input("#").split()
+    if not command:
+        continue
+    if command[0] == "add":
         task_json = input("task_json:")
-        task_queue.add_task(task_json)
-        print("successful")
-    elif command == "queue":
+        if task_queue.add_task(task_json):
+            print("successful")
+    elif command[0] == "queue":
         print("task queue:", task_queue.get_queue())
-    elif command == "exit":
+    elif command[0] == "next":
+        print("running:", task_queue.dequeue())
+    elif command[0] == "done":
+        # done <name>
+        if len(command) < 2:
+            print("usage: done <name>")
+            continue
+        task_queue.complete_task(command[1])
+        print("successful")
+    elif command[0] == "exit":
+        task_queue.close()
         break
     else:
-        print("Invalid command.")
\ No newline at end of file
+        print("Invalid command.")
@@ -1,49 +1,95 @@
 from tasks.task import Task
-import os
-import fcntl
+import sqlite3
+import threading
+import time
 
 class TaskQueue:
-    def __init__(self, tasks_file="./tasks/taskqueue.json"):
+    """
+    SQLite (WAL 模式) 上的任务队列, 多个进程可以同时读写, 进程崩溃不会丢已经提交的任务。
+    按 name 唯一索引, 按 (status, id) 索引取最早排队的任务, 入队, 出队, 完成都不用读写整个队列。
+    running 的任务超过 lease 秒没有 complete_task/requeue/renew (比如处理它的进程崩溃了) 就放回队列。
+    """
+    def __init__(self, tasks_file="./tasks/taskqueue.db", lease: float = 600):
         self.tasks_file = tasks_file
-        self.queue = self.load_tasks()
-        self.max_tasks = 5
-        
-    def load_tasks(self):
-        if not os.path.exists(self.tasks_file):
-            return []
-        with open(self.tasks_file, "r", encoding="utf-8") as f:
-            try:
-                return [Task.from_json(task_str) for task_str in f.readlines()]
-            except ValueError:
-                return []
-
-    def save_tasks(self):
-        with open(self.tasks_file, "w", encoding="utf-8") as f:
-            fcntl.flock(f, fcntl.LOCK_EX)
-            for task in self.queue:
-                f.write(repr(task) + "\n")
-            fcntl.flock(f, fcntl.LOCK_UN)
+        self.lease = lease
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(tasks_file, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                 name TEXT NOT NULL UNIQUE,
+                                 type TEXT NOT NULL,
+                                 task TEXT NOT NULL,
+                                 status TEXT NOT NULL DEFAULT 'queued',
+                                 created REAL NOT NULL,
+                                 started REAL)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id)")
 
     def add_task(self, json_str: str):
-        self.queue = self.load_tasks()
-        if len(self.queue) >= self.max_tasks:
-            print(f"can't add new task. max = {self.max_tasks}")
-            return
         new_task = Task.from_json(json_str)
-        if any(task.name == new_task.name for task in self.queue):
+        try:
+            with self._lock:
+                self.conn.execute("INSERT INTO tasks (name, type, task, created) VALUES (?, ?, ?, ?)",
+                                  (new_task.name, new_task.type, repr(new_task), time.time()))
+        except sqlite3.IntegrityError:
             print(f"Task with name '{new_task.name}' already exists.")
-            return
-        self.queue.append(new_task)
-        self.save_tasks()
+            return False
+        return True
+
+    def dequeue(self):
+        """取出最早排队的任务并标记为 running, 队列为空时返回 None; 处理完调用 complete_task。"""
+        with self._lock:
+            # BEGIN IMMEDIATE 先拿写锁, 多个进程不会取到同一个任务
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                # 租约过期的任务按原来的排队顺序放回队列
+                self.conn.execute("UPDATE tasks SET status = 'queued', started = NULL WHERE status = 'running' AND started < ?",
+                                  (now - self.lease,))
+                row = self.conn.execute("SELECT id, task FROM tasks WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+                if row is not None:
+                    self.conn.execute("UPDATE tasks SET status = 'running', started = ? WHERE id = ?", (now, row[0]))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return Task.from_json(row[1]) if row else None
+
+    def requeue(self, name: str):
+        # 处理失败的任务放回队列, 保持原来的排队顺序
+        with self._lock:
+            self.conn.execute("UPDATE tasks SET status = 'queued', started = NULL WHERE name = ?", (name,))
+
+    def renew(self, name: str):
+        # 处理时间超过 lease 的任务定期续约, 避免被当成崩溃的任务放回队列
+        with self._lock:
+            self.conn.execute("UPDATE tasks SET started = ? WHERE name = ? AND status = 'running'", (time.time(), name))
 
     def complete_task(self, name: str):
-        self.queue = self.load_tasks()
-        self.queue = [task for task in self.queue if task.name != name]
-        self.save_tasks()
+        with self._lock:
+            self.conn.execute("DELETE FROM tasks WHERE name = ?", (name,))
+
+    def get_task(self, name: str):
+        with self._lock:
+            row = self.conn.execute("SELECT task FROM tasks WHERE name = ?", (name,)).fetchone()
+        return Task.from_json(row[0]) if row else None
+
+    def get_queue(self, status: str = None):
+        with self._lock:
+            if status is None:
+                rows = self.conn.execute("SELECT task FROM tasks ORDER BY id").fetchall()
+            else:
+                rows = self.conn.execute("SELECT task FROM tasks WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
 
-    def get_queue(self):
-        self.queue = self.load_tasks()
-        return [repr(task) for task in self.queue]
+    def close(self):
+        with self._lock:
+            self.conn.close()
 
 if __name__ == "__main__":
     task_queue = TaskQueue()
@@ -56,8 +102,9 @@ if __name__ == "__main__":
     task_queue.add_task(task3_json)
     print("task queue:", task_queue.get_queue())
 
-    task_queue.complete_task("Task1")
+    task = task_queue.dequeue()
+    print("running:", task)
+    task_queue.complete_task(task.name)
     print("task queue:", task_queue.get_queue())
     task_queue.complete_task("Task2")
     print("task queue:", task_queue.get_queue())
-    
\ No newline at end of file
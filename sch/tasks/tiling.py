@@ -0,0 +1,56 @@
+import math
+import numpy as np
+from .buckets import fit_to_shape
+from .yolo import nms
+
+
+def tile_origins(size: int, tile: int, overlap: float) -> list:
+    # 一维上各块的起点, 相邻块重叠 overlap 比例, 最后一块贴齐边缘
+    if size <= tile:
+        return [0]
+    stride = max(int(tile * (1 - overlap)), 1)
+    num = math.ceil((size - tile) / stride) + 1
+    return sorted({min(i * stride, size - tile) for i in range(num)})
+
+
+def split_tiles(frame: np.ndarray, tile, overlap: float = 0.2, pad_value: float = 0.0) -> list:
+    """
+    把 (..., H, W) 的帧切成 tile=(h, w) 大小, 互相重叠的块, 返回 [(y, x, 块)]。
+    帧在某一维比块小时在右下补 pad_value。
+    """
+    height, width = frame.shape[-2:]
+    tile_h, tile_w = tile
+    shape = frame.shape[:-2] + (tile_h, tile_w)
+    tiles = []
+    for y in tile_origins(height, tile_h, overlap):
+        for x in tile_origins(width, tile_w, overlap):
+            tiles.append((y, x, fit_to_shape(frame[..., y:y + tile_h, x:x + tile_w], shape, pad_value)))
+    return tiles
+
+
+def assign_tiles(num_tiles: int, rates: dict) -> dict:
+    """按吞吐 (每秒块数) 分配, 每块给加上它之后完成时间最早的设备, 返回 {device: [块下标]}。"""
+    plan = {dev: [] for dev in rates}
+    for index in range(num_tiles):
+        dev = min(rates, key=lambda d: (len(plan[d]) + 1) / rates[d])
+        plan[dev].append(index)
+    return plan
+
+
+def stitch_detections(detections: list, origins: list, frame_shape, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    detections 为各块的 (M, 6) [x1, y1, x2, y2, score, class] (块内坐标), origins 为对应的 (y, x)。
+    平移回原图坐标, 裁到原图范围内, 重叠区域里重复的框用 NMS 去掉。
+    """
+    height, width = frame_shape[-2:]
+    merged = []
+    for dets, (y, x) in zip(detections, origins):
+        if len(dets) == 0:
+            continue
+        dets = np.array(dets, dtype=np.float32)
+        dets[:, [0, 2]] = np.clip(dets[:, [0, 2]] + x, 0, width)
+        dets[:, [1, 3]] = np.clip(dets[:, [1, 3]] + y, 0, height)
+        merged.append(dets)
+    if not merged:
+        return np.zeros((0, 6), dtype=np.float32)
+    return nms(np.concatenate(merged), iou_threshold)
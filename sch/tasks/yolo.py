@@ -0,0 +1,118 @@
+import numpy as np
+
+
+def decode(output, conf_threshold: float = 0.25) -> np.ndarray:
+    """
+    YOLO 原始输出 (1, N, 5+C) 或 (N, 5+C), 每行 [cx, cy, w, h, obj, cls...]。
+    返回 (M, 6) [x1, y1, x2, y2, score, class], score = obj * 类别概率, 低于 conf_threshold 的丢掉。
+    """
+    pred = np.asarray(output, dtype=np.float32).reshape(-1, np.shape(output)[-1])
+    if pred.shape[1] > 5:
+        cls = pred[:, 5:].argmax(axis=1)
+        score = pred[:, 4] * pred[np.arange(len(pred)), 5 + cls]
+    else:
+        cls = np.zeros(len(pred), dtype=np.int64)
+        score = pred[:, 4]
+    keep = score >= conf_threshold
+    pred, score, cls = pred[keep], score[keep], cls[keep]
+    half = pred[:, 2:4] / 2
+    return np.concatenate([pred[:, :2] - half, pred[:, :2] + half, score[:, None], cls[:, None].astype(np.float32)], axis=1)
+
+
+def nms(dets: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """按类别的贪心 NMS, dets 为 (M, 6), 返回按 score 从大到小保留下来的框。"""
+    if len(dets) == 0:
+        return dets
+    # 不同类别的框平移到互不重叠的区域, 一次 NMS 就是按类别做
+    offset = dets[:, 5:6] * (dets[:, :4].max() - dets[:, :4].min() + 1)
+    boxes = dets[:, :4] + offset
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = dets[:, 4].argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        lt = np.maximum(boxes[i, :2], boxes[rest, :2])
+        rb = np.minimum(boxes[i, 2:4], boxes[rest, 2:4])
+        inter = np.clip(rb - lt, 0, None).prod(axis=1)
+        iou = inter / (area[i] + area[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return dets[keep]
+
+
+def decode_batch(outputs, conf_threshold: float = 0.25):
+    """
+    一批帧的 YOLO 原始输出, (B, N, 5+C) 的数组或各帧输出的列表 (各帧的 N 可以不同, 比如分桶), 整批一次解码。
+    返回 (dets (K, 6), frame (K,)), frame 为每个框所属帧的下标, 按帧排序。
+    """
+    if len(outputs) == 0:
+        return np.zeros((0, 6), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    if isinstance(outputs, np.ndarray):
+        pred = outputs.reshape(-1, outputs.shape[-1])
+        sizes = [pred.shape[0] // len(outputs)] * len(outputs)
+    else:
+        parts = [np.asarray(output).reshape(-1, np.shape(output)[-1]) for output in outputs]
+        pred = np.concatenate(parts)
+        sizes = [len(part) for part in parts]
+    offsets = np.cumsum([0] + sizes)
+    # 类别概率不超过 1, 先按 obj 筛掉绝大多数行, 只对候选行算类别
+    index = np.flatnonzero(pred[:, 4] >= conf_threshold)
+    frame = np.searchsorted(offsets, index, side="right") - 1
+    rows = pred[index].astype(np.float32)
+    if rows.shape[1] > 5:
+        cls = rows[:, 5:].argmax(axis=1)
+        score = rows[:, 4] * rows[np.arange(len(rows)), 5 + cls]
+    else:
+        cls = np.zeros(len(rows), dtype=np.int64)
+        score = rows[:, 4]
+    keep = score >= conf_threshold
+    rows, score, cls, frame = rows[keep], score[keep], cls[keep], frame[keep]
+    half = rows[:, 2:4] / 2
+    dets = np.concatenate([rows[:, :2] - half, rows[:, :2] + half, score[:, None],
+                           cls[:, None].astype(np.float32)], axis=1)
+    return dets, frame
+
+
+def batched_nms(dets: np.ndarray, groups: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    按组 (比如 帧 x 类别) 的贪心 NMS, 结果和逐组调用 nms 相同。
+    每轮同时取所有组里 score 最高的剩余框, 一次算出同组其他框和它的 IoU, 轮数等于单组最多保留的框数。
+    返回保留下来的框的下标。
+    """
+    if len(dets) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((-dets[:, 4], groups))
+    boxes = dets[order, :4]
+    group = groups[order]
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    alive = np.ones(len(order), dtype=bool)
+    keep = []
+    while alive.any():
+        index = np.flatnonzero(alive)
+        # 按组排好序, 每组第一个存活的框就是该组本轮保留的框
+        first = np.r_[True, group[index[1:]] != group[index[:-1]]]
+        leaders = index[first]
+        keep.append(leaders)
+        alive[leaders] = False
+        leader = leaders[np.cumsum(first) - 1]
+        lt = np.maximum(boxes[index, :2], boxes[leader, :2])
+        rb = np.minimum(boxes[index, 2:4], boxes[leader, 2:4])
+        inter = np.clip(rb - lt, 0, None).prod(axis=1)
+        iou = inter / (area[index] + area[leader] - inter + 1e-9)
+        alive[index[iou > iou_threshold]] = False
+    return order[np.sort(np.concatenate(keep))]
+
+
+def postprocess(outputs, conf_threshold: float = 0.25, iou_threshold: float = 0.45, max_det: int = 300) -> list:
+    """一批帧的解码加按类别的 NMS, 返回每帧一个 (M, 6) [x1, y1, x2, y2, score, class], 按 score 从大到小。"""
+    num_frames = len(outputs)
+    dets, frame = decode_batch(outputs, conf_threshold)
+    num_classes = int(dets[:, 5].max()) + 1 if len(dets) else 1
+    keep = batched_nms(dets, frame * num_classes + dets[:, 5].astype(np.int64), iou_threshold)
+    dets, frame = dets[keep], frame[keep]
+    # 先按帧再按 score 排序后切开
+    order = np.lexsort((-dets[:, 4], frame))
+    dets, frame = dets[order], frame[order]
+    bounds = np.searchsorted(frame, np.arange(num_frames + 1))
+    return [dets[bounds[i]:bounds[i + 1]][:max_det] for i in range(num_frames)]
@@ -5,19 +5,20 @@ import time
 
 def app(svc, input):
     # preprocess code
+    # 检测框解码和 NMS 由 setPostprocess 整批完成, 返回 (M, 6) [x1, y1, x2, y2, score, class]
     res = svc.runTask("yolo", input)
-    # postprocess code
     return res
 
 if __name__ == "__main__":
     dev_dict = {"CPU": 0.9, "GPU": 0.7}
     svc = sch.connect()
     svc.registerTask("yolo", dev_dict, "cagyolov7-tiny-s0_llvip_512x768.onnx")
+    svc.setPostprocess("yolo", conf_threshold=0.25, iou_threshold=0.45)
     file_paths = glob.glob("data/*")
     inputs = [np.load(path) for path in file_paths]
     
     start = time.time()
-    outs = svc.runTaskMultiThread(app, inputs)
+    outs = svc.runTaskMultiThread(app, inputs, "yolo")
     end = time.time()
     total = end - start
     print(1000/total)
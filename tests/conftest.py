@@ -0,0 +1,81 @@
+"""
+测试在纯 CPU 机器上跑, 不需要 GPU 和 YOLO 模型: 和 bench 一样在临时 unix socket 上启动调度器进程,
+客户端侧用 FakeDevice 代替真实设备, 只测调度, 计数和准入逻辑。
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCH_DIR = os.path.join(os.path.dirname(TESTS_DIR), "sch")
+# 调度器侧按 sch/ 目录做绝对导入, 客户端侧以 sch 包导入
+sys.path[:0] = [SCH_DIR, os.path.dirname(SCH_DIR)]
+
+
+class FakeDevice:
+    """用 Python 函数代替编译好的模型, fn(input) 的返回值就是推理结果。"""
+
+    def __init__(self, fn=lambda x: x, latency:float = 0.0):
+        self.fn = fn
+        self.latency = latency
+
+    def build(self, task_type, mod, params = None, executor_kind = None):
+        return executor_kind or "relayVM", ""
+
+    def load_lib(self, executor_kind, so_path):
+        return self.fn
+
+    def compute(self, executor_kind, exe, input):
+        time.sleep(self.latency)
+        return exe(input)
+
+
+class RecordingManager:
+    """转发给调度器的 RPC, 同时按顺序记下调用。"""
+
+    def __init__(self, mgr):
+        self.mgr = mgr
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.mgr, name)
+        def call(*args):
+            self.calls.append((name,) + args)
+            return method(*args)
+        return call
+
+
+@pytest.fixture(scope="session")
+def client():
+    # sch 包 import 时就连接调度器, 先起调度器再 import
+    from bench.run import start_scheduler
+    socket_file = os.path.join(tempfile.mkdtemp(), "scheduler.sock")
+    os.environ["SCH_SOCKET"] = socket_file
+    proc = start_scheduler(socket_file)
+    import sch
+    yield sch
+    proc.terminate()
+
+
+@pytest.fixture
+def rpc(client, monkeypatch):
+    recorder = RecordingManager(client.mgr)
+    monkeypatch.setattr(client, "mgr", recorder)
+    return recorder
+
+
+@pytest.fixture
+def fake_cpu(client, monkeypatch):
+    device = FakeDevice()
+    monkeypatch.setitem(client.str_to_dev, "CPU", device)
+    return device
+
+
+@pytest.fixture
+def fake_gpu(client, monkeypatch):
+    device = FakeDevice()
+    monkeypatch.setitem(client.str_to_dev, "GPU", device)
+    return device
@@ -0,0 +1,40 @@
+import pytest
+
+
+def run(svc, x):
+    return svc.runTask("admit", x)
+
+
+def test_rejected_batch_still_decreases_task(client, rpc, fake_cpu):
+    fake_cpu.latency = 0.05
+    svc = client.TaskService(max_workers=1)
+    svc.registerTask("admit", {"CPU": 1.0}, None)
+    svc.setAdmission("admit", limit=1, policy="reject")
+    results = svc.runTaskMultiThread(run, list(range(8)), "admit")
+
+    done = [x for x in results if x is not None]
+    assert 0 < len(done) < 8
+    assert done == sorted(done)
+    assert svc.queueDepth("admit") == 0
+    assert svc.oup_counter["admit"] == 8
+    assert ("increase_task", "admit", 8) in rpc.calls
+    assert rpc.calls.count(("decrease_task", "admit", 8)) == 1
+
+
+def test_shed_batch_still_decreases_task(client, rpc, fake_cpu):
+    fake_cpu.latency = 0.05
+    svc = client.TaskService(max_workers=1)
+    svc.registerTask("admit", {"CPU": 1.0}, None)
+    svc.setAdmission("admit", limit=1, policy="shed_oldest")
+    results = svc.runTaskMultiThread(run, list(range(8)), "admit")
+
+    assert results[-1] == 7
+    assert None in results
+    assert rpc.calls.count(("decrease_task", "admit", 8)) == 1
+
+
+def test_non_block_policy_needs_task_type(client, fake_cpu):
+    svc = client.TaskService(max_workers=1)
+    svc.setAdmission(None, limit=1, policy="reject")
+    with pytest.raises(ValueError):
+        svc.runTaskMultiThread(run, [0, 1], None)
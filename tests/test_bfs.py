@@ -0,0 +1,63 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+import device.bfs as bfs
+from device.bfs import CSRGraph, random_graph, load_csr
+
+
+def reference_bfs(graph, sources):
+    # 逐点出队的教科书 BFS, 只用出边
+    level = np.full(graph.num_vertices, -1, dtype=np.int32)
+    queue = deque()
+    for source in np.atleast_1d(sources):
+        if level[source] < 0:
+            level[source] = 0
+            queue.append(int(source))
+    while queue:
+        u = queue.popleft()
+        for v in graph.indices[graph.indptr[u]:graph.indptr[u + 1]]:
+            if level[v] < 0:
+                level[v] = level[u] + 1
+                queue.append(int(v))
+    return level
+
+
+def test_from_edges_dedups_and_drops_self_loops():
+    graph = CSRGraph.from_edges([0, 0, 1, 2, 2], [1, 1, 2, 2, 0], undirected=False)
+    assert graph.indptr.tolist() == [0, 1, 2, 3]
+    assert graph.indices.tolist() == [1, 2, 0]
+    undirected = CSRGraph.from_edges([0, 1], [1, 2], num_vertices=4)
+    assert undirected.degree.tolist() == [1, 2, 1, 0]
+    assert undirected.bfs(0).tolist() == [0, 1, 2, -1]
+
+
+@pytest.mark.parametrize("undirected", [True, False])
+@pytest.mark.parametrize("direction_optimizing", [True, False])
+def test_bfs_matches_reference(undirected, direction_optimizing):
+    graph = random_graph(2000, degree=8, seed=3, undirected=undirected)
+    rng = np.random.default_rng(0)
+    for source in rng.choice(graph.num_vertices, 4, replace=False):
+        np.testing.assert_array_equal(graph.bfs(source, direction_optimizing), reference_bfs(graph, source))
+    sources = rng.choice(graph.num_vertices, 3, replace=False)
+    np.testing.assert_array_equal(graph.bfs(sources, direction_optimizing), reference_bfs(graph, sources))
+
+
+@pytest.mark.parametrize("undirected", [True, False])
+def test_bottom_up_matches_reference(monkeypatch, undirected):
+    # alpha 很大时第一层之后就切到 bottom-up, 有向图走入边的 CSR
+    monkeypatch.setattr(bfs, "alpha", 1e9)
+    monkeypatch.setattr(bfs, "beta", 1e-9)
+    graph = random_graph(1000, degree=6, seed=5, undirected=undirected)
+    for source in (0, 17, 999):
+        np.testing.assert_array_equal(graph.bfs(source), reference_bfs(graph, source))
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    graph = random_graph(500, degree=4, seed=1, undirected=False)
+    graph.save(str(tmp_path))
+    loaded = load_csr(str(tmp_path))
+    assert loaded.num_edges == graph.num_edges
+    np.testing.assert_array_equal(loaded.t_indices, graph.t_indices)
+    np.testing.assert_array_equal(loaded.bfs(7), reference_bfs(graph, 7))
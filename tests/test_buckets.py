@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from tasks.buckets import bucket_name, sort_buckets, select_bucket, fit_to_shape, restore_output
+
+BUCKETS = sort_buckets([(1, 3, 64, 96), (1, 3, 32, 32), (1, 3, 48, 64)])
+
+
+def test_sort_and_name():
+    assert BUCKETS == [(1, 3, 32, 32), (1, 3, 48, 64), (1, 3, 64, 96)]
+    assert bucket_name("yolo", BUCKETS[0]) == "yolo@1x3x32x32"
+
+
+def test_select_smallest_bucket_that_fits():
+    assert select_bucket(BUCKETS, (1, 3, 32, 32)) == (1, 3, 32, 32)
+    assert select_bucket(BUCKETS, (1, 3, 20, 40)) == (1, 3, 48, 64)
+    assert select_bucket(BUCKETS, (1, 3, 50, 10)) == (1, 3, 64, 96)
+
+
+def test_select_rejects_inputs_larger_than_every_bucket():
+    with pytest.raises(ValueError, match="does not fit any bucket"):
+        select_bucket(BUCKETS, (1, 3, 65, 10))
+    with pytest.raises(ValueError, match="does not fit any bucket"):
+        select_bucket(BUCKETS, (3, 32, 32))
+
+
+def test_fit_to_shape_pads_bottom_right():
+    x = np.arange(6, dtype=np.float32).reshape(1, 2, 3)
+    out = fit_to_shape(x, (1, 4, 5), pad_value=-1)
+    np.testing.assert_array_equal(out[:, :2, :3], x)
+    assert (out[:, 2:, :] == -1).all() and (out[:, :, 3:] == -1).all()
+    # 切块时块比剩下的帧大, 只补边; 比目标大的维度从左上裁剪
+    np.testing.assert_array_equal(fit_to_shape(x, (1, 2, 2)), x[:, :, :2])
+
+
+def test_restore_output_crops_proportional_outputs():
+    bucket, in_shape = (1, 3, 48, 64), (1, 3, 20, 40)
+    # 分割图为输入的一半大小
+    seg = np.zeros((1, 5, 24, 32), dtype=np.float32)
+    assert restore_output(seg, in_shape, bucket).shape == (1, 5, 10, 20)
+    same = np.zeros((1, 3, 48, 64), dtype=np.float32)
+    assert restore_output(same, in_shape, bucket).shape == (1, 3, 20, 40)
+    dets = np.zeros((100, 6), dtype=np.float32)
+    assert restore_output(dets, in_shape, bucket) is dets
+
+
+def test_oversize_input_releases_device(client, fake_cpu):
+    svc = client.TaskService(max_workers=2)
+    svc.registerTask("oversize", {"CPU": 1.0}, None)
+    svc.task_buckets["oversize"] = [(1, 8, 8)]
+    svc.bucket_pad["oversize"] = 0.0
+    dev = svc._acquire(["CPU"])
+    with pytest.raises(ValueError, match="does not fit any bucket"):
+        svc._compute("oversize", dev, np.zeros((1, 16, 8), dtype=np.float32))
+    assert svc.dev_state["CPU"] == 1
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from tasks.concurrency import ConcurrencyLimiter, AIMDController
+
+
+def stats(util=1.0, dev_wait=0.0, compute=1.0, backlog=0):
+    return {"util": util, "dev_wait": dev_wait, "compute": compute, "backlog": backlog}
+
+
+def test_resize_up_wakes_waiters():
+    limiter = ConcurrencyLimiter(1)
+    limiter.acquire()
+    entered = []
+    threads = [threading.Thread(target=lambda: (limiter.acquire(), entered.append(1))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    threads[0].join(0.1)
+    assert not entered
+    limiter.resize(3)
+    for thread in threads:
+        thread.join(5)
+    assert len(entered) == 2 and limiter.active == 3
+
+
+def test_resize_down_blocks_until_active_drops():
+    limiter = ConcurrencyLimiter(3)
+    for _ in range(3):
+        limiter.acquire()
+    limiter.resize(1)
+    thread = threading.Thread(target=limiter.acquire)
+    thread.start()
+    limiter.release()
+    limiter.release()
+    thread.join(0.1)
+    assert thread.is_alive()
+    limiter.release()
+    thread.join(5)
+    assert not thread.is_alive() and limiter.active == 1
+
+
+def test_aimd_increase_and_decrease():
+    limiter = ConcurrencyLimiter(4)
+    controller = AIMDController(limiter, None, min_limit=2, max_limit=6, backoff=0.5)
+    # 设备没跑满且有请求排队, 加一
+    assert controller.step(stats(util=0.5, backlog=3)) == 5
+    # 没有排队时不加
+    assert controller.step(stats(util=0.5, backlog=0)) == 5
+    assert controller.step(stats(util=0.5, backlog=3)) == 6
+    assert controller.step(stats(util=0.5, backlog=3)) == 6
+    # 等设备的时间远大于计算时间, 乘性减小, 不低于 min_limit
+    assert controller.step(stats(dev_wait=3.0, compute=1.0, backlog=3)) == 3
+    assert controller.step(stats(dev_wait=3.0, compute=1.0, backlog=3)) == 2
+    assert controller.step(stats(dev_wait=3.0, compute=1.0, backlog=3)) == 2
+    assert limiter.limit == 2
+    assert [limit for _, limit in controller.history] == [5, 6, 3, 2]
+
+
+def test_controller_starts_once_and_stops():
+    limiter = ConcurrencyLimiter(1)
+    controller = AIMDController(limiter, lambda: stats(util=0.0, backlog=1), max_limit=4, interval=0.01)
+    controller.start()
+    thread = controller._thread
+    controller.start()
+    assert controller._thread is thread
+    deadline = time.time() + 5
+    while limiter.limit == 1 and time.time() < deadline:
+        time.sleep(0.005)
+    controller.stop()
+    assert not thread.is_alive()
+    limit = limiter.limit
+    time.sleep(0.05)
+    assert limiter.limit == limit
+
+
+def test_task_service_close_stops_controller(client):
+    svc = client.TaskService(max_workers=None)
+    svc.runTaskMultiThread(lambda self, x: x, [1, 2, 3])
+    controller = svc.controller
+    assert controller._thread.is_alive()
+    svc.close()
+    assert svc.controller is None
+    assert controller._thread is None and controller._stop.is_set()
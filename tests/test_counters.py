@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+
+def test_expect_requests_rejected_while_in_flight(client, rpc, fake_cpu):
+    gate = threading.Event()
+    fake_cpu.fn = lambda x: gate.wait(5) and x
+    svc = client.TaskService(max_workers=2)
+    svc.registerTask("replay", {"CPU": 1.0}, None)
+    svc.expectRequests("replay", 1)
+    thread = threading.Thread(target=svc.runTask, args=("replay", 1))
+    thread.start()
+    try:
+        with pytest.raises(ValueError):
+            svc.expectRequests("replay", 5)
+    finally:
+        gate.set()
+        thread.join(5)
+    assert ("decrease_task", "replay", 1) in rpc.calls
+    svc.expectRequests("replay", 5)
+    assert svc.inp_counter["replay"] == svc.oup_counter["replay"] == 0
+
+
+def test_failed_requests_count_as_done(client, rpc, fake_cpu):
+    def fn(x):
+        if x % 2:
+            raise RuntimeError("bad input")
+        return x
+    fake_cpu.fn = fn
+    svc = client.TaskService(max_workers=2)
+    svc.registerTask("flaky", {"CPU": 1.0}, None)
+    svc.expectRequests("flaky", 4)
+    for x in range(4):
+        if x % 2:
+            with pytest.raises(RuntimeError):
+                svc.runTask("flaky", x)
+        else:
+            assert svc.runTask("flaky", x) == x
+    assert rpc.calls.count(("decrease_task", "flaky", 4)) == 1
+    svc.expectRequests("flaky", 2)
@@ -0,0 +1,70 @@
+import pytest
+
+from schedule import dag
+from schedule.dag import topological_order, place_dag
+
+
+class Ability:
+    def __init__(self, affinity):
+        self.affinity = affinity
+
+
+class Dev:
+    def __init__(self, name, power, bandwidth, affinity:dict):
+        self.DeviceType = name
+        self.ComputePower = power
+        self.Bandwidth = bandwidth
+        self.ability = {stage: Ability(value) for stage, value in affinity.items()}
+
+
+def test_topological_order():
+    stages = {"post": ["det", "seg"], "det": ["pre"], "seg": ["pre"], "pre": []}
+    order = topological_order(stages)
+    assert sorted(order) == sorted(stages)
+    for stage, parents in stages.items():
+        assert all(order.index(parent) < order.index(stage) for parent in parents)
+
+
+def test_topological_order_rejects_cycles_and_unknown_parents():
+    with pytest.raises(ValueError, match="cycle"):
+        topological_order({"a": ["c"], "b": ["a"], "c": ["b"]})
+    with pytest.raises(ValueError, match="unknown"):
+        topological_order({"a": ["missing"]})
+
+
+def chain():
+    # GPU 算得快但拷贝贵
+    stages = {"pre": [], "det": ["pre"], "post": ["det"]}
+    devices = [Dev("CPU", 100, None, {"pre": 1.0, "det": 0.1, "post": 1.0}),
+               Dev("GPU", 200, 1e6, {"pre": 1.0, "det": 1.0, "post": 1.0})]
+    return stages, devices
+
+
+def test_place_dag_keeps_cheap_stages_with_their_neighbour():
+    stages, devices = chain()
+    # 默认按 1 MB 估计中间结果, 过一次 PCIe 要 1 s, 比 det 在 CPU 上多算的 0.095 s 贵, 整条链留在 CPU
+    placement, cost = place_dag(stages, {}, devices)
+    assert placement == {"pre": "CPU", "det": "CPU", "post": "CPU"}
+    assert cost == pytest.approx(0.01 + 0.1 + 0.01)
+    # 中间结果很小时 det 放到 GPU, pre/post 跟着 det 留在 GPU 上省一次拷贝
+    small = {edge: 10 for edge in dag.edges(stages)}
+    placement, cost = place_dag(stages, small, devices)
+    assert placement == {"pre": "GPU", "det": "GPU", "post": "GPU"}
+    assert cost == pytest.approx(0.015 + 20 / 1e6)
+
+
+def test_place_dag_greedy_matches_exhaustive_on_a_chain(monkeypatch):
+    stages, devices = chain()
+    edge_bytes = {edge: 1000 for edge in dag.edges(stages)}
+    exhaustive = place_dag(stages, edge_bytes, devices)
+    monkeypatch.setattr(dag, "exhaustive_limit", 0)
+    greedy = place_dag(stages, edge_bytes, devices)
+    assert greedy[0] == exhaustive[0]
+    assert greedy[1] == pytest.approx(exhaustive[1])
+
+
+def test_place_dag_needs_a_capable_device():
+    stages = {"pre": [], "det": ["pre"]}
+    devices = [Dev("CPU", 100, None, {"pre": 1.0, "det": 0.0})]
+    with pytest.raises(ValueError, match="det"):
+        place_dag(stages, {}, devices)
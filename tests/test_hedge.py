@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def hedged(client, fake_cpu, fake_gpu):
+    # 调度器只有 CPU, 直接调用 _compute_hedged, 不经过调度器的策略
+    devices = {"CPU": fake_cpu, "GPU": fake_gpu}
+    svc = client.TaskService(max_workers=2)
+    svc.registerTask("hedged", {"CPU": 1.0, "GPU": 1.0}, None)
+    svc.setHedge("hedged", percentile=50, min_samples=4)
+    yield svc, devices
+    svc.close()
+
+
+def run_hedged(svc):
+    free_dev = svc._acquire(["CPU"])
+    return svc._compute_hedged("hedged", ["CPU", "GPU"], free_dev, np.array([1]))
+
+
+def slow(seconds, fn=lambda x: x):
+    def run(x):
+        time.sleep(seconds)
+        return fn(x)
+    return run
+
+
+def test_hedge_threshold(hedged):
+    svc, _ = hedged
+    svc.latency["hedged"].extend([0.4, 0.1, 0.3])
+    assert svc._hedge_threshold("hedged") is None
+    svc.latency["hedged"].append(0.2)
+    assert svc._hedge_threshold("hedged") == 0.3
+    svc.setHedge("hedged", percentile=99, min_samples=4)
+    assert svc._hedge_threshold("hedged") == 0.4
+
+
+def test_no_hedge_before_enough_samples(hedged):
+    svc, devices = hedged
+    devices["CPU"].fn = slow(0.05, lambda x: x + 1)
+    assert run_hedged(svc)[0] == "CPU"
+    assert svc.hedgeStats("hedged")["hedged"] == 0
+
+
+def test_backup_wins(hedged):
+    svc, devices = hedged
+    svc.latency["hedged"].extend([0.01] * 4)
+    devices["CPU"].fn = slow(0.5, lambda x: x + 1)
+    devices["GPU"].fn = lambda x: x + 2
+    dev, result = run_hedged(svc)
+    assert (dev, result[0]) == ("GPU", 3)
+    stats = svc.hedgeStats("hedged")
+    assert (stats["hedged"], stats["wins"]) == (1, 1)
+    # 输掉的主请求跑完后归还设备
+    deadline = time.time() + 5
+    while svc.dev_state["CPU"] != 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert svc.dev_state == {"CPU": 1, "GPU": 1}
+
+
+def test_primary_error_falls_back_to_backup(hedged):
+    svc, devices = hedged
+    svc.latency["hedged"].extend([0.01] * 4)
+    def fail(x):
+        raise RuntimeError("bad device")
+    devices["CPU"].fn = slow(0.05, fail)
+    devices["GPU"].fn = slow(0.2, lambda x: x + 2)
+    dev, result = run_hedged(svc)
+    assert (dev, result[0]) == ("GPU", 3)
+    assert svc.dev_state == {"CPU": 1, "GPU": 1}
+
+
+def test_pool_covers_every_device_slot(hedged):
+    svc, _ = hedged
+    svc.setPipeline("CPU", 3)
+    try:
+        svc._hedge_pool()
+        assert svc.aux_pool_size["hedge_pool"] == 4
+    finally:
+        svc.setPipeline("CPU", None)
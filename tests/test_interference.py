@@ -0,0 +1,61 @@
+import pytest
+
+from schedule.interference import InterferenceModel
+from schedule.scheduler import Scheduler
+from device.devicePool import cpu, gpu
+
+
+def test_unsaturated_observations_are_ignored():
+    model = InterferenceModel()
+    model.observe("GPU", "a", ["a"], 100, busy=0.2)
+    assert model.solo_fps == {}
+    model.observe("GPU", "a", ["a"], 100, busy=1.0)
+    # 请求少的任务帧率低只是因为到达得少, 不算被 b 拖慢
+    model.observe("GPU", "a", ["a", "b"], 5, busy=0.1)
+    assert model.factor("GPU", "a", ["a", "b"]) == 1.0
+
+
+def test_saturated_slowdown_is_learned():
+    model = InterferenceModel(alpha=1.0)
+    model.observe("GPU", "a", ["a"], 100, busy=1.0)
+    # 理想平分是 50 fps, 实际 25 fps
+    model.observe("GPU", "a", ["a", "b"], 25, busy=0.95)
+    assert model.factor("GPU", "a", ["a", "b"]) == pytest.approx(2.0)
+    model.observe("GPU", "a", ["a", "b"], 1, busy=1.0)
+    assert model.factor("GPU", "a", ["a", "b"]) == model.max_slowdown
+
+
+def dynamic_scheduler():
+    sched = Scheduler()
+    sched.mode = "dynamic"
+    for dev in (gpu(0), cpu(0)):
+        for task in ("a", "b"):
+            dev.add_ability(task, 1.0, "relayVM", "")
+        sched.addDev(dev)
+    return sched
+
+
+def shares_gpu(sched):
+    return "GPU" in sched.best_strategy["a"] and "GPU" in sched.best_strategy["b"]
+
+
+def test_dynamic_strategy_avoids_learned_interference():
+    sched = dynamic_scheduler()
+    sched.find_best_strategy(["a", "b"])
+    assert shares_gpu(sched)
+    for task in ("a", "b"):
+        sched.interference.observe("GPU", task, [task], 100, busy=1.0)
+        sched.interference.observe("GPU", task, ["a", "b"], 10, busy=1.0)
+    sched.find_best_strategy(["a", "b"])
+    assert not shares_gpu(sched)
+
+
+def test_lightly_loaded_reports_do_not_split_tasks():
+    sched = dynamic_scheduler()
+    sched.find_best_strategy(["a", "b"])
+    for task in ("a", "b"):
+        sched.interference.observe("GPU", task, [task], 100, busy=1.0)
+        # 共置后帧率低只是因为请求少, 设备大半时间空闲
+        sched.report_fps("GPU", task, 10, busy=0.1)
+    sched.find_best_strategy(["a", "b"])
+    assert shares_gpu(sched)
@@ -0,0 +1,63 @@
+from schedule.metrics import MetricsRegistry, render
+from schedule.scheduler import Scheduler
+
+
+def lines(text):
+    return text.strip().split("\n")
+
+
+def test_render_counter_gauge_and_labels():
+    m = MetricsRegistry()
+    m.describe("sch_requests_total", "counter", "requests")
+    m.inc("sch_requests_total", device="GPU", task_type="yolo")
+    m.inc("sch_requests_total", 2, device="GPU", task_type="yolo")
+    m.set("sch_worker_limit", 4.0)
+    m.set("sch_note", 1, task_type='a"b\\c')
+    out = lines(render([({"client": "7"}, m.snapshot())]))
+    assert out[:3] == ["# HELP sch_requests_total requests",
+                       "# TYPE sch_requests_total counter",
+                       'sch_requests_total{client="7",device="GPU",task_type="yolo"} 3']
+    assert "# TYPE sch_worker_limit untyped" in out
+    assert 'sch_worker_limit{client="7"} 4' in out
+    assert 'sch_note{client="7",task_type="a\\"b\\\\c"} 1' in out
+
+
+def test_render_histogram_is_cumulative():
+    m = MetricsRegistry()
+    m.describe("sch_compute_seconds", "histogram", "compute", buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        m.observe("sch_compute_seconds", value, device="CPU")
+    out = lines(render([({}, m.snapshot())]))
+    assert out == ["# HELP sch_compute_seconds compute",
+                   "# TYPE sch_compute_seconds histogram",
+                   'sch_compute_seconds_bucket{device="CPU",le="0.01"} 1',
+                   'sch_compute_seconds_bucket{device="CPU",le="0.1"} 3',
+                   'sch_compute_seconds_bucket{device="CPU",le="+Inf"} 4',
+                   'sch_compute_seconds_sum{device="CPU"} 3.105',
+                   'sch_compute_seconds_count{device="CPU"} 4']
+
+
+def test_finished_task_type_leaves_metrics():
+    sched = Scheduler()
+    sched.increase_task("yolo")
+    assert 'sch_active_task_types{task_type="yolo"} 1' in sched.render_metrics()
+    sched.decrease_task("yolo")
+    assert 'task_type="yolo"' not in sched.render_metrics()
+
+
+def test_stale_client_metrics_are_dropped(monkeypatch):
+    import schedule.scheduler as scheduler_module
+    now = [1000.0]
+    monkeypatch.setattr(scheduler_module.time, "time", lambda: now[0])
+    sched = Scheduler()
+    client = MetricsRegistry()
+    client.set("sch_worker_limit", 4)
+    sched.push_metrics("11", client.snapshot())
+    now[0] += sched.metrics_ttl / 2
+    sched.push_metrics("12", client.snapshot())
+    assert 'client="11"' in sched.render_metrics()
+    now[0] += sched.metrics_ttl
+    text = sched.render_metrics()
+    assert 'client="11"' not in text
+    assert 'client="12"' in text
+    assert "11" not in sched.client_metrics
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def stages(client, monkeypatch):
+    # 三个阶段换成 numpy 上的等价操作, 不用编译模型就能测 slot 和异常处理
+    import sch.device.pipeline as pipeline_module
+    monkeypatch.setattr(pipeline_module, "stage_input", lambda dev_type, x: np.array(x))
+    monkeypatch.setattr(pipeline_module, "invoke_staged", lambda executor_kind, exe, data: exe(data))
+    monkeypatch.setattr(pipeline_module, "fetch_output", lambda data: data)
+
+
+def wait_until(predicate, timeout:float = 5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_pipeline_matches_serial_compute(client):
+    # 真实编译的 CPU 模型, 每帧输入不同, 输出错位或被下一帧覆盖都会比对失败
+    from bench.run import build_model
+    from bench.models import make_input
+    task_type, mod, params, executor_kind, so_path = build_model("convnet", "graph")
+    exe = client.cpu.load_lib(executor_kind, so_path)
+    frames = [make_input(mod, seed) for seed in range(16)]
+    serial = [client.cpu.compute(executor_kind, exe, x) for x in frames]
+    pipeline = client.DevicePipeline("CPU", 3)
+    try:
+        outputs = [future.result(timeout=60) for future in [pipeline.submit(executor_kind, exe, x) for x in frames]]
+    finally:
+        pipeline.close(wait=True)
+    for out, ref in zip(outputs, serial):
+        np.testing.assert_allclose(out, ref, rtol=1e-5, atol=1e-6)
+
+
+def test_pipeline_exception_releases_slot(client, stages):
+    gate = threading.Event()
+    def exe(x):
+        if x[0] == 3:
+            raise RuntimeError("bad frame")
+        if x[0] >= 6:
+            gate.wait(5)
+        return x * 2
+    pipeline = client.DevicePipeline("CPU", 2)
+    try:
+        futures = [pipeline.submit("graph", exe, np.array([i])) for i in range(6)]
+        with pytest.raises(RuntimeError, match="bad frame"):
+            futures[3].result(timeout=5)
+        for i in (0, 1, 2, 4, 5):
+            assert futures[i].result(timeout=5)[0] == 2 * i
+        # 出错的请求也归还了 slot, 两个卡住的请求都能排进来
+        blocked = []
+        thread = threading.Thread(target=lambda: blocked.extend(pipeline.submit("graph", exe, np.array([i]))
+                                                                for i in (6, 7)), daemon=True)
+        thread.start()
+        thread.join(1)
+        assert not thread.is_alive(), "pipeline slot leaked"
+        gate.set()
+        assert [future.result(timeout=5)[0] for future in blocked] == [12, 14]
+    finally:
+        gate.set()
+        pipeline.close(wait=True)
+    assert pipeline.snapshot()["requests"] == 8
+
+
+def test_run_task_raises_pipeline_error(client, fake_cpu, stages):
+    def fn(x):
+        raise RuntimeError("bad frame")
+    fake_cpu.fn = fn
+    svc = client.TaskService(max_workers=2)
+    svc.registerTask("pipe_error", {"CPU": 1.0}, None)
+    svc.setPipeline("CPU", 2)
+    svc.task_num = 2
+    try:
+        for i in range(2):
+            with pytest.raises(RuntimeError, match="bad frame"):
+                svc.runTask("pipe_error", np.array([i]))
+        assert svc.dev_state["CPU"] == 2
+        assert "CPU" not in svc.busy_since
+    finally:
+        svc.setPipeline("CPU", None)
+
+
+@pytest.mark.parametrize("before, after", [(3, 2), (2, 4), (2, None)])
+def test_set_pipeline_while_requests_in_flight(client, fake_cpu, stages, before, after):
+    gate = threading.Event()
+    def fn(x):
+        gate.wait(5)
+        return x + 1
+    fake_cpu.fn = fn
+    svc = client.TaskService(max_workers=8)
+    svc.registerTask("pipe_slots", {"CPU": 1.0}, None)
+    svc.setPipeline("CPU", before)
+    svc.task_num = 8
+    results = {}
+    def request(i):
+        results[i] = svc.runTask("pipe_slots", np.array([i]))
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(before)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: svc.dev_state["CPU"] == 0)
+    svc.setPipeline("CPU", after)
+    slots = after or 1
+    assert svc.dev_state["CPU"] == slots - before
+    if slots > before:
+        # 多出来的 slot 马上能用
+        extra = [threading.Thread(target=request, args=(i,)) for i in range(before, slots)]
+        for thread in extra:
+            thread.start()
+        wait_until(lambda: svc.dev_state["CPU"] == 0)
+        threads += extra
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    try:
+        assert {i: int(out[0]) for i, out in results.items()} == {i: i + 1 for i in range(len(threads))}
+        assert svc.dev_state["CPU"] == slots
+        assert "CPU" not in svc.busy_since
+    finally:
+        svc.setPipeline("CPU", None)
+
+
+def test_staged_submit_skips_copies(client, stages, monkeypatch):
+    import sch.device.pipeline as pipeline_module
+    def copy(*args):
+        raise AssertionError("staged input was copied")
+    monkeypatch.setattr(pipeline_module, "stage_input", copy)
+    monkeypatch.setattr(pipeline_module, "fetch_output", copy)
+    pipeline = client.DevicePipeline("CPU", 2)
+    try:
+        staged = [np.array([1]), np.array([2])]
+        assert pipeline.submit("graph", sum, staged, staged=True).result(timeout=5)[0] == 3
+    finally:
+        pipeline.close(wait=True)
+
+
+def test_pipelines_of_one_device_never_invoke_together(client, stages):
+    # setPipeline 换流水线时旧流水线还在排空, 两个推理线程共用同一个执行器
+    active, overlap = [0], []
+    lock = threading.Lock()
+    def exe(x):
+        with lock:
+            active[0] += 1
+            overlap.append(active[0])
+        time.sleep(0.002)
+        with lock:
+            active[0] -= 1
+        return x
+    old, new = client.DevicePipeline("CPU", 2), client.DevicePipeline("CPU", 2)
+    try:
+        futures = [pipeline.submit("graph", exe, np.array([i])) for i in range(10) for pipeline in (old, new)]
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        old.close(wait=True)
+        new.close(wait=True)
+    assert max(overlap) == 1
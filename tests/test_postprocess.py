@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from tasks import yolo
+from tasks.postprocess import BatchPostprocessor
+
+
+def random_outputs(seed, frames=4, rows=200, classes=3):
+    rng = np.random.default_rng(seed)
+    out = np.empty((frames, rows, 5 + classes), dtype=np.float32)
+    out[..., :2] = rng.uniform(0, 100, (frames, rows, 2))
+    out[..., 2:4] = rng.uniform(5, 40, (frames, rows, 2))
+    out[..., 4] = rng.uniform(0, 1, (frames, rows))
+    out[..., 5:] = rng.uniform(0, 1, (frames, rows, classes))
+    return out
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batched_nms_matches_per_image_nms(seed):
+    outputs = random_outputs(seed)
+    results = yolo.postprocess(outputs, conf_threshold=0.2, iou_threshold=0.45)
+    assert len(results) == len(outputs)
+    for output, result in zip(outputs, results):
+        ref = yolo.nms(yolo.decode(output, 0.2), 0.45)
+        np.testing.assert_allclose(result, ref)
+
+
+def test_decode_batch_accepts_frames_of_different_sizes():
+    outputs = random_outputs(7)
+    parts = [outputs[0, :50], outputs[1], outputs[2, :10]]
+    dets, frame = yolo.decode_batch(parts, 0.2)
+    for i, part in enumerate(parts):
+        np.testing.assert_allclose(dets[frame == i], yolo.decode(part, 0.2))
+
+
+def test_empty_batch():
+    assert yolo.postprocess([]) == []
+    dets, frame = yolo.decode_batch([])
+    assert dets.shape == (0, 6) and frame.shape == (0,)
+    assert yolo.postprocess(np.zeros((0, 10, 8), dtype=np.float32)) == []
+
+
+def test_mismatched_result_count_fails_the_whole_batch():
+    post = BatchPostprocessor(lambda outputs: outputs[:1], max_batch=3, max_delay=1.0)
+    try:
+        futures = [post.submit(i) for i in range(3)]
+        for future in futures:
+            with pytest.raises(ValueError, match="returned 1 results for a batch of 3"):
+                future.result(timeout=5)
+    finally:
+        post.close()
@@ -0,0 +1,12 @@
+import numpy as np
+
+
+def test_unsupported_backend_reports_to_scheduler(client, rpc, fake_cpu):
+    svc = client.TaskService(max_workers=1)
+    svc.registerTask("no_profiler", {"CPU": 1.0}, None)
+    report = svc.profileTask("no_profiler", "CPU", [np.zeros(2), np.ones(2)])
+
+    assert report["requests"] == 0
+    assert "not supported" in report["error"]
+    assert [call for call in rpc.calls if call[0] == "put_profile"] == [("put_profile", "no_profiler", "CPU", report)]
+    assert svc.dev_state["CPU"] == 1
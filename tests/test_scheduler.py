@@ -0,0 +1,64 @@
+from schedule.scheduler import Scheduler
+from device.devicePool import cpu, gpu, npu
+
+
+def scheduler(affinity:dict):
+    # affinity 为 {device: {task: affinity}}
+    sched = Scheduler()
+    sched.mode = "balance"
+    for dev, tasks in affinity.items():
+        for task, value in tasks.items():
+            dev.add_ability(task, value, "relayVM", "")
+        sched.addDev(dev)
+    return sched
+
+
+def test_balance_skips_zero_affinity():
+    cpu0, gpu0 = cpu(0), gpu(0)
+    sched = scheduler({cpu0: {"a": 1.0, "b": 0.0}, gpu0: {"a": 0.0, "b": 1.0}})
+    strategy = dict(sched.find_balance_strategy(["a", "b"], sched.devs))
+    assert strategy == {"a": [cpu0], "b": [gpu0]}
+
+
+def test_balance_drops_task_without_capable_device():
+    cpu0, gpu0 = cpu(0), gpu(0)
+    sched = scheduler({cpu0: {"a": 1.0, "b": 0.0}, gpu0: {"a": 1.0}})
+    strategy = dict(sched.find_balance_strategy(["a", "b"], sched.devs))
+    assert set(strategy) == {"a"}
+    assert sorted(dev.DeviceType for dev in strategy["a"]) == ["CPU", "GPU"]
+
+
+def test_balance_idle_device_joins_heaviest_task():
+    cpu0, gpu0, npu0 = cpu(0), gpu(0), npu(0)
+    sched = scheduler({cpu0: {"a": 1.0}, gpu0: {"a": 1.0, "b": 1.0}, npu0: {"a": 1.0, "b": 1.0}})
+    sched.task_volume = {"a": 1000, "b": 10}
+    strategy = dict(sched.find_balance_strategy(["a", "b"], sched.devs))
+    assert strategy["b"] == [npu0]
+    assert strategy["a"] == [gpu0, cpu0]
+
+
+def test_task_without_capable_device_is_left_out():
+    cpu0, gpu0 = cpu(0), gpu(0)
+    for mode in Scheduler.modes:
+        sched = scheduler({cpu0: {"a": 1.0, "c": 0.0}, gpu0: {"a": 1.0}})
+        sched.mode = mode
+        sched.find_best_strategy(["a", "b", "c"])
+        assert set(sched.best_strategy) == {"a"}
+        assert sched.best_strategy["a"]
+
+
+def test_pick_free_follows_strategy_order():
+    from schedule.dispatch import pick_free
+    assert pick_free(["GPU", "CPU"], {"GPU": 0, "CPU": 2}) == "CPU"
+    assert pick_free(["GPU", "CPU"], {"GPU": 1, "CPU": 2}) == "GPU"
+    assert pick_free(["GPU", "NPU"], {"GPU": 0}) is None
+
+
+def test_simulator_completes_trace():
+    from schedule.simulator import Simulator, poisson_trace
+    devices = {"GPU": {"compute_power": 500, "latency": {"yolo": 0.01, "seg": 0.02}},
+               "CPU": {"compute_power": 40, "latency": {"yolo": 0.08}}}
+    trace = poisson_trace({"yolo": 50, "seg": 10}, 5)
+    for mode in Scheduler.modes:
+        report = Simulator(devices, mode).run(trace)
+        assert report["completed"] == len(trace)
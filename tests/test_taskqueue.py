@@ -0,0 +1,52 @@
+import time
+
+from tasks.taskqueue import TaskQueue
+
+
+def task_json(name, task_type = "test"):
+    return f'{{"name": "{name}", "type": "{task_type}", "source_addr": "/data/{name}"}}'
+
+
+def test_dequeue_in_order_and_complete(tmp_path):
+    queue = TaskQueue(str(tmp_path / "queue.db"))
+    for name in ("a", "b", "c"):
+        assert queue.add_task(task_json(name))
+    assert not queue.add_task(task_json("a"))
+    assert queue.dequeue().name == "a"
+    assert queue.dequeue().name == "b"
+    queue.requeue("a")
+    assert queue.dequeue().name == "a"
+    queue.complete_task("a")
+    assert len(queue) == 2
+    queue.close()
+
+
+def test_running_task_of_crashed_worker_is_requeued(tmp_path):
+    path = str(tmp_path / "queue.db")
+    worker = TaskQueue(path, lease=0.2)
+    worker.add_task(task_json("a"))
+    worker.add_task(task_json("b"))
+    assert worker.dequeue().name == "a"
+    # 处理 a 的进程崩溃, 没有 complete_task 也没有 requeue
+    worker.close()
+
+    queue = TaskQueue(path, lease=0.2)
+    assert queue.dequeue().name == "b"
+    queue.complete_task("b")
+    assert queue.dequeue() is None
+    assert not queue.add_task(task_json("a"))
+    time.sleep(0.3)
+    assert queue.dequeue().name == "a"
+    assert queue.dequeue() is None
+    queue.close()
+
+
+def test_renew_keeps_lease(tmp_path):
+    queue = TaskQueue(str(tmp_path / "queue.db"), lease=0.3)
+    queue.add_task(task_json("a"))
+    assert queue.dequeue().name == "a"
+    for _ in range(3):
+        time.sleep(0.15)
+        queue.renew("a")
+        assert queue.dequeue() is None
+    queue.close()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from tasks.tiling import tile_origins, split_tiles, assign_tiles, stitch_detections
+
+
+def test_tile_origins_cover_the_frame():
+    assert tile_origins(100, 128, 0.2) == [0]
+    assert tile_origins(100, 40, 0.25) == [0, 30, 60]
+    # 最后一块贴齐右边缘
+    assert tile_origins(100, 40, 0.0) == [0, 40, 60]
+
+
+def test_split_tiles_origins_and_padding():
+    frame = np.arange(3 * 50 * 70, dtype=np.float32).reshape(3, 50, 70)
+    tiles = split_tiles(frame, (32, 32), overlap=0.5, pad_value=-1)
+    assert [(y, x) for y, x, _ in tiles] == [(y, x) for y in (0, 16, 18) for x in (0, 16, 32, 38)]
+    for y, x, tile in tiles:
+        assert tile.shape == (3, 32, 32)
+        np.testing.assert_array_equal(tile, frame[:, y:y + 32, x:x + 32])
+    small = split_tiles(frame[:, :20, :20], (32, 32), pad_value=-1)
+    assert len(small) == 1 and small[0][:2] == (0, 0)
+    assert (small[0][2][:, 20:, :] == -1).all() and (small[0][2][:, :, 20:] == -1).all()
+
+
+def test_assign_tiles_proportional_to_rates():
+    plan = assign_tiles(30, {"GPU": 20.0, "CPU": 10.0})
+    assert len(plan["GPU"]) == 20 and len(plan["CPU"]) == 10
+    assert sorted(plan["GPU"] + plan["CPU"]) == list(range(30))
+    assert assign_tiles(3, {"GPU": 100.0, "CPU": 1.0}) == {"GPU": [0, 1, 2], "CPU": []}
+
+
+def test_stitch_detections_offsets_clips_and_dedups():
+    box = [[2, 4, 12, 14, 0.9, 0]]
+    detections = [np.array(box, dtype=np.float32),
+                  np.array([[0, 0, 10, 10, 0.8, 0], [30, 30, 60, 60, 0.7, 1]], dtype=np.float32),
+                  np.zeros((0, 6), dtype=np.float32)]
+    # 第二块里的第一个框平移后和第一块的框是同一个目标, 第二个框超出原图被裁剪
+    origins = [(10, 20), (14, 22), (0, 0)]
+    out = stitch_detections(detections, origins, (3, 64, 64), iou_threshold=0.5)
+    np.testing.assert_allclose(out, [[22, 14, 32, 24, 0.9, 0], [52, 44, 64, 64, 0.7, 1]])
+
+
+def test_stitch_detections_empty():
+    assert stitch_detections([np.zeros((0, 6))], [(0, 0)], (8, 8)).shape == (0, 6)